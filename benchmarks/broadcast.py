@@ -0,0 +1,162 @@
+"""
+Load test of the report fan-out against the rate limited fake Bot API.
+
+Sends evening reports with their photo album to many recipients at once through a
+Broadcaster, as the outbox does, with the Bot API answering 429 over Telegram's
+limits, and with the injected latency, jitter and server errors. Reports
+deliveries/s, p50/p99 delivery time, retries, and the rates the fake API saw:
+with the broadcaster's limiter working, flood waits stay rare and no chat gets
+more than 1 message per second.
+
+Run from the repository root:
+    python -m benchmarks.broadcast --recipients 100 --reports 3 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+
+from benchmarks.fake_bot_api import Call, FakeBotAPI
+from benchmarks.report_flow import percentile
+from tgbot.misc.report_to_owners import ReportBuilder
+from tgbot.models.report_draft import ReportDraft
+from tgbot.services.broadcaster import Broadcaster, SendResult
+
+TOKEN = "42:BENCHMARK"
+FIRST_RECIPIENT_ID = 200_000
+FIRST_GROUP_ID = -1_000_000_000
+
+
+def build_report(index: int, album_size: int) -> tuple[str, list]:
+    draft = ReportDraft.from_state(
+        {
+            "daytime": "evening",
+            "author": f"admin{index}",
+            "author_name": f"Admin {index}",
+            "location_name": f"Филиал {index}",
+            "address": f"ул. Бенчмарк, {index}",
+            "clients_lost": {"- мужской зал:": "1", "- женский зал:": "2"},
+            "total_clients": "42",
+            "sbp_sum": "15000",
+            "day_resume": "Клиентов было много, все довольны",
+            "z_report": [
+                [index, photo, f"photo-{index}-{photo}", f"{index}-{photo}"]
+                for photo in range(album_size)
+            ],
+        }
+    )
+    report = ReportBuilder(draft)
+    return report.construct_evening_report(), report.build_album()
+
+
+def max_in_window(calls: list[Call], period: float) -> int:
+    """
+    Most calls made within any period seconds.
+    """
+    times = sorted(call.at for call in calls)
+    most = start = 0
+    for end, at in enumerate(times):
+        while times[start] <= at - period:
+            start += 1
+        most = max(most, end - start + 1)
+    return most
+
+
+async def deliver(
+    broadcaster: Broadcaster,
+    bot: Bot,
+    chat_id: int,
+    text: str,
+    media: list,
+    durations: list[float],
+) -> SendResult:
+    started = time.perf_counter()
+    result = await broadcaster.send_message(
+        bot, chat_id, text, parse_mode=ParseMode.MARKDOWN_V2, media=media
+    )
+    durations.append(time.perf_counter() - started)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipients", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=0, help="group chats among them")
+    parser.add_argument("--reports", type=int, default=3, help="fanned out at once")
+    parser.add_argument("--album-size", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fake_api = FakeBotAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    await fake_api.start()
+    bot = Bot(TOKEN, session=AiohttpSession(api=fake_api.api))
+    broadcaster = Broadcaster()
+
+    recipients = [FIRST_GROUP_ID - index for index in range(args.groups)] + [
+        FIRST_RECIPIENT_ID + index for index in range(args.recipients - args.groups)
+    ]
+    reports = [build_report(index, args.album_size) for index in range(args.reports)]
+    durations: list[float] = []
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            deliver(broadcaster, bot, chat_id, text, media, durations)
+            for text, media in reports
+            for chat_id in recipients
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    await bot.session.close()
+    await fake_api.close()
+
+    outcomes = Counter(
+        "delivered" if result.ok else "retryable" if result.retryable else "failed"
+        for result in results
+    )
+    attempts = Counter(result.attempts for result in results)
+    sent = fake_api.sent()
+    by_chat: defaultdict[int | str | None, list[Call]] = defaultdict(list)
+    for call in sent:
+        by_chat[call.chat_id].append(call)
+
+    print(
+        f"{args.reports} reports to {args.recipients} recipients "
+        f"({args.groups} groups), latency {args.latency}+{args.jitter} s, "
+        f"error rate {args.error_rate}"
+    )
+    print(
+        f"{len(results)} deliveries in {elapsed:.1f} s, "
+        f"{outcomes['delivered'] / elapsed:.1f} delivered/s, {dict(outcomes)}"
+    )
+    print(
+        f"Delivery time p50 {percentile(durations, 0.5):.2f} s, "
+        f"p99 {percentile(durations, 0.99):.2f} s; attempts {dict(sorted(attempts.items()))}"
+    )
+    print(
+        f"Bot API: {len(fake_api.records)} calls, {len(fake_api.rejected())} rate limited, "
+        f"{len(fake_api.rejected(500))} server errors"
+    )
+    print(
+        f"Most messages in 1 s: {max_in_window(sent, 1.0)} overall, "
+        f"{max((max_in_window(calls, 1.0) for calls in by_chat.values()), default=0)} "
+        f"to one chat"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
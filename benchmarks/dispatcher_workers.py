@@ -0,0 +1,124 @@
+"""
+Throughput of the chat-affine dispatcher workers.
+
+Feeds synthetic report steps from many chats through ChatAffineDispatcher and
+reports the updates handled per second for each number of workers. Handlers
+keep a report draft in FSM data and format the report as the real flow does,
+without network calls. --workers 0 handles the updates in this process, as plain
+polling does.
+
+Run from the repository root:
+    python -m benchmarks.dispatcher_workers --updates 5000 --workers 0 1 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+
+from tgbot.misc.report_to_owners import ReportBuilder
+from tgbot.models.report_draft import ReportDraft
+from tgbot.services.sharding import ChatAffineDispatcher
+
+router = Router()
+
+
+@router.message(F.text)
+async def report_step(message: Message, state: FSMContext):
+    state_data = await state.get_data()
+    steps = state_data.get("steps", 0) + 1
+    await state.update_data(
+        steps=steps,
+        author=message.from_user.username,
+        author_name=message.from_user.full_name,
+        location_name=f"Location {message.chat.id % 10}",
+        day_resume=message.text,
+        clients_lost={"data": message.text[:20]},
+    )
+    ReportBuilder(ReportDraft.from_state(await state.get_data())).construct_evening_report()
+
+
+async def create_benchmark_worker(index: int) -> tuple[Bot, Dispatcher]:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(router)
+    return Bot("42:TEST"), dp
+
+
+def make_updates(count: int, chats: int) -> list[dict]:
+    text = "Клиентов было много, все довольны. " * 8
+    return [
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {
+                    "id": chat_id,
+                    "is_bot": False,
+                    "first_name": "Admin",
+                    "username": f"admin{chat_id}",
+                },
+                "text": f"{update_id}. {text}",
+            },
+        }
+        for update_id in range(count)
+        for chat_id in [1000 + update_id % chats]
+    ]
+
+
+async def run_in_process(updates: list[dict]) -> float:
+    bot, dp = await create_benchmark_worker(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(dp.feed_raw_update(bot, update) for update in updates))
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+    return elapsed
+
+
+async def run_workers(updates: list[dict], workers: int) -> float:
+    dispatcher = ChatAffineDispatcher(create_benchmark_worker, workers)
+    await dispatcher.start()
+    started = time.perf_counter()
+    for update in updates:
+        dispatcher.route(update)
+    await dispatcher.stop()
+    elapsed = time.perf_counter() - started
+
+    if sum(dispatcher.handled) != len(updates):
+        raise RuntimeError(f"Handled {dispatcher.handled} of {len(updates)} updates")
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    updates = make_updates(args.updates, args.chats)
+    print(f"{args.updates} updates from {args.chats} chats, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in args.workers:
+        if workers == 0:
+            elapsed = await run_in_process(updates)
+        else:
+            elapsed = await run_workers(updates, workers)
+
+        throughput = len(updates) / elapsed
+        baseline = baseline or throughput
+        print(
+            f"workers={workers}: {throughput:8.0f} updates/s, "
+            f"x{throughput / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
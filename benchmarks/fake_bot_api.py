@@ -0,0 +1,429 @@
+"""
+Local stand-in of the Telegram Bot API for benchmarks and load tests.
+
+Answers every method the bot calls with a plausible result, without sending
+anything anywhere, and records every call. Sending methods are limited like
+Telegram does it: about 30 messages per second overall, 1 per second to a chat
+and 20 per minute to a group; over the limits the answer is 429 with
+retry_after. Latency, jitter and server errors can be injected.
+
+getUpdates long-polls like Telegram: it answers with the updates queued with
+push_update(), or POSTed as JSON to /updates, or with none once its timeout
+has passed.
+
+Plug it into a bot with AiohttpSession(api=fake.api), or run it and point the
+bot at it with BOT_API_SERVER_URL:
+    python -m benchmarks.fake_bot_api --port 8081 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Hashable
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+
+BOT_USER = {
+    "id": 42,
+    "is_bot": True,
+    "first_name": "Cirulnik",
+    "username": "cirulnik_admin_bot",
+}
+
+# Methods answered with a message, with a list of messages or with message IDs
+MESSAGE_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "sendDocument",
+    "sendVideo",
+    "sendAudio",
+    "editMessageText",
+    "editMessageCaption",
+    "editMessageMedia",
+    "editMessageReplyMarkup",
+    "forwardMessage",
+}
+MESSAGE_ID_METHODS = {"copyMessage"}
+MESSAGE_IDS_METHODS = {"copyMessages", "forwardMessages"}
+
+# Methods sending messages, the ones the rate limits apply to; a media group counts as one
+SEND_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "sendDocument",
+    "sendVideo",
+    "sendAudio",
+    "sendMediaGroup",
+    "copyMessage",
+    "copyMessages",
+    "forwardMessage",
+    "forwardMessages",
+}
+
+# Telegram's limits, as (messages, seconds)
+GLOBAL_LIMIT = (30, 1.0)
+CHAT_LIMIT = (1, 1.0)
+GROUP_LIMIT = (20, 60.0)
+
+
+def _value(params: dict, key: str, default: Any = None) -> Any:
+    """
+    Form fields of complex types are JSON, like aiogram sends them.
+    """
+    value = params.get(key, default)
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        return json.loads(value)
+    return value
+
+
+def _chat_id(params: dict) -> int | str:
+    chat_id = params.get("chat_id", 0)
+    try:
+        return int(chat_id)
+    except ValueError:
+        return chat_id
+
+
+@dataclass
+class Call:
+    """
+    A request made to the fake API.
+
+    Attributes:
+        method (str): Bot API method.
+        params (dict): Form fields of the request, JSON ones as sent.
+        at (float): time.monotonic() when the request arrived.
+        status (int): HTTP status of the answer, 429 if rate limited.
+    """
+
+    method: str
+    params: dict
+    at: float
+    status: int = 200
+
+    @property
+    def chat_id(self) -> int | str | None:
+        return _chat_id(self.params) if "chat_id" in self.params else None
+
+
+class SlidingWindow:
+    """
+    Allows at most limit hits per period seconds for every key.
+    """
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.hits: defaultdict[Hashable, deque[float]] = defaultdict(deque)
+
+    def wait(self, key: Hashable, now: float) -> float:
+        """
+        :return: Seconds until the key may be hit again, 0 if it may now.
+        """
+        hits = self.hits[key]
+        while hits and hits[0] <= now - self.period:
+            hits.popleft()
+        if len(hits) < self.limit:
+            return 0.0
+        return hits[0] + self.period - now
+
+    def hit(self, key: Hashable, now: float):
+        self.hits[key].append(now)
+
+    def clear(self):
+        self.hits.clear()
+
+
+class FakeBotAPI:
+    """
+    aiohttp server answering Bot API requests at /bot<token>/<method>.
+
+    Attributes:
+        calls (Counter): Number of calls by method since the last reset(),
+            getUpdates excluded.
+        records (list[Call]): Every call since the last reset(), in order,
+            getUpdates excluded.
+        updates (list[dict]): Updates pushed and not yet confirmed by a getUpdates offset.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limits: bool = True,
+        seed: int | None = None,
+    ):
+        """
+        :param latency: Seconds every answer is delayed by.
+        :param jitter: Up to this many seconds more, at random.
+        :param error_rate: Share of requests answered with 500 Internal Server Error.
+        :param rate_limits: Whether sending methods are rate limited.
+        :param seed: Seed of the jitter and the errors, for repeatable runs.
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limits = rate_limits
+        self.random = random.Random(seed)
+        self.calls: Counter[str] = Counter()
+        self.records: list[Call] = []
+        self.global_window = SlidingWindow(*GLOBAL_LIMIT)
+        self.chat_window = SlidingWindow(*CHAT_LIMIT)
+        self.group_window = SlidingWindow(*GROUP_LIMIT)
+        self.updates: list[dict] = []
+        self.runner: web.AppRunner | None = None
+        self._message_ids = itertools.count(1_000_000)
+        self._update_ids = itertools.count(1)
+        self._new_update = asyncio.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api(self) -> TelegramAPIServer:
+        return TelegramAPIServer.from_base(self.url)
+
+    def reset(self):
+        self.calls.clear()
+        self.records.clear()
+        self.global_window.clear()
+        self.chat_window.clear()
+        self.group_window.clear()
+
+    def push_update(self, update: dict) -> dict:
+        """
+        Queues an update for getUpdates, waking up a poll waiting for one.
+        :param update: Update without update_id, e.g. {"message": {...}}.
+        :return: The update with its update_id.
+        """
+        update = {"update_id": next(self._update_ids), **update}
+        self.updates.append(update)
+        self._new_update.set()
+        return update
+
+    async def get_updates(self, params: dict) -> list[dict]:
+        """
+        Answers getUpdates: the queued updates from the offset on, waiting up to
+        timeout seconds for one if there are none.
+        """
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        # Updates before the offset are confirmed and forgotten
+        self.updates = [
+            update for update in self.updates if update["update_id"] >= offset
+        ]
+        if not self.updates and timeout and self.runner is not None:
+            self._new_update.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+        return self.updates[:limit]
+
+    def sent(self, chat_id: int | str | None = None) -> list[Call]:
+        """
+        Messages delivered, to the chat if given.
+        """
+        return [
+            call
+            for call in self.records
+            if call.method in SEND_METHODS
+            and call.status == 200
+            and (chat_id is None or call.chat_id == chat_id)
+        ]
+
+    def rejected(self, status: int = 429) -> list[Call]:
+        """
+        Calls answered with the status, rate limited ones by default.
+        """
+        return [call for call in self.records if call.status == status]
+
+    def retry_after(self, method: str, params: dict, now: float) -> float:
+        """
+        Checks the rate limits of a sending method and counts the message if it's allowed.
+        :return: Seconds to wait, 0 if the message is allowed.
+        """
+        if not self.rate_limits or method not in SEND_METHODS:
+            return 0.0
+
+        chat_id = _chat_id(params)
+        # Groups and channels have negative IDs
+        chat_window = (
+            self.group_window
+            if isinstance(chat_id, int) and chat_id < 0
+            else self.chat_window
+        )
+        wait = max(
+            self.global_window.wait(None, now), chat_window.wait(chat_id, now)
+        )
+        if not wait:
+            self.global_window.hit(None, now)
+            chat_window.hit(chat_id, now)
+        return wait
+
+    def message(self, params: dict, **content: Any) -> dict:
+        message_id = params.get("message_id")
+        return {
+            "message_id": int(message_id) if message_id else next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": _chat_id(params), "type": "private"},
+            "from": BOT_USER,
+            **content,
+        }
+
+    def result(self, method: str, params: dict) -> Any:
+        if method == "getMe":
+            return BOT_USER
+        if method in MESSAGE_METHODS:
+            content = {"text": params.get("text") or params.get("caption") or ""}
+            return self.message(params, **content)
+        if method == "sendMediaGroup":
+            media_group_id = str(next(self._message_ids))
+            return [
+                self.message(
+                    {"chat_id": params.get("chat_id")},
+                    media_group_id=media_group_id,
+                    photo=[
+                        {
+                            "file_id": str(item.get("media")),
+                            "file_unique_id": str(item.get("media")),
+                            "width": 1280,
+                            "height": 960,
+                        }
+                    ],
+                )
+                for item in _value(params, "media", [])
+            ]
+        if method in MESSAGE_ID_METHODS:
+            return {"message_id": next(self._message_ids)}
+        if method in MESSAGE_IDS_METHODS:
+            return [
+                {"message_id": next(self._message_ids)}
+                for _ in _value(params, "message_ids", [])
+            ]
+        # deleteMessage(s), answerCallbackQuery, setMyCommands, deleteWebhook...
+        return True
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        # aiogram sends form fields, ChatAffineDispatcher.poll() sends JSON
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        # Long polls aren't calls the bot makes per update, so they aren't recorded
+        if method == "getUpdates":
+            return web.json_response(
+                {"ok": True, "result": await self.get_updates(params)}
+            )
+
+        call = Call(method, params, time.monotonic())
+        self.calls[method] += 1
+        self.records.append(call)
+
+        # Limits are checked on arrival, as Telegram does; failed requests don't count
+        if self.error_rate and self.random.random() < self.error_rate:
+            call.status = 500
+        elif wait := self.retry_after(method, params, call.at):
+            call.status = 429
+
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if call.status == 500:
+            return web.json_response(
+                {"ok": False, "error_code": 500, "description": "Internal Server Error"},
+                status=500,
+            )
+        if call.status == 429:
+            retry_after = max(1, math.ceil(wait))
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                },
+                status=429,
+            )
+        return web.json_response({"ok": True, "result": self.result(method, params)})
+
+    async def handle_push(self, request: web.Request) -> web.Response:
+        return web.json_response(self.push_update(await request.json()))
+
+    async def start(self):
+        app = web.Application(client_max_size=50 * 1024**2)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_post("/updates", self.handle_push)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # Port 0 binds a free port
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.runner is not None:
+            runner, self.runner = self.runner, None
+            # Waiting polls answer right away instead of holding the shutdown
+            self._new_update.set()
+            await runner.cleanup()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    args = parser.parse_args()
+
+    fake_api = FakeBotAPI(
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limits=not args.no_rate_limits,
+    )
+    await fake_api.start()
+    print(
+        f"Fake Bot API on {fake_api.url}, POST updates to {fake_api.url}/updates, "
+        f"stop with Ctrl+C"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake_api.close()
+        print(
+            f"Calls: {dict(fake_api.calls.most_common())}, "
+            f"rate limited: {len(fake_api.rejected())}, "
+            f"server errors: {len(fake_api.rejected(500))}"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
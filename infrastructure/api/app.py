@@ -1,23 +1,132 @@
+import asyncio
 import logging
+import secrets
+from contextlib import asynccontextmanager
 
 import betterlogging as bl
 import fastapi
-from aiogram import Bot
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
 from fastapi import FastAPI
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 
+from bot import create_bot, create_dispatcher, set_webhook
+from infrastructure.database.setup import create_engine, create_session_pool
 from tgbot.config import load_config, Config
+from tgbot.misc.notify_admins import on_down, on_startup
+from tgbot.services.logs import setup_queue_logging
+from tgbot.services.metrics import CONTENT_TYPE, registry
 
-app = FastAPI()
-log_level = logging.INFO
-bl.basic_colorized_config(level=log_level)
 log = logging.getLogger(__name__)
 
-config: Config = load_config()
-# session_pool = create_session_pool(config.db)
-bot = Bot(token=config.tg_bot.token)
+# Seconds updates still being processed get to finish on shutdown
+SHUTDOWN_TIMEOUT = 10
 
 
-@app.post("/api")
-async def webhook_endpoint(request: fastapi.Request):
-    return JSONResponse(status_code=200, content={"status": "ok"})
+def create_app(config: Config, register_webhook: bool = False) -> FastAPI:
+    """
+    Create the webhook app. Updates are fed to a dispatcher with the same routers,
+    dialogs and middlewares as in polling mode. Telegram gets its answer right away,
+    the update is processed in the background.
+
+    Serve it with one process: updates of a chat are handled in order, and the FSM
+    state in memory and the caches are kept, within the process only. To use more
+    CPU cores, poll with BOT_WORKERS instead, which routes every chat to one worker.
+
+    :param config: The configuration object.
+    :param register_webhook: Register the webhook, notify admins and deliver the
+        outbox; without it the app only handles the updates it receives.
+    :return: FastAPI app.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        bot = create_bot(config)
+        engine = (
+            create_engine(
+                config.db, echo=(config.tg_bot.console_log_level == "DEBUG")
+            )
+            if config.db
+            else None
+        )
+        session_pool = create_session_pool(engine) if engine else None
+        dp = create_dispatcher(config, bot, session_pool, run_outbox=register_webhook)
+
+        app.state.bot = bot
+        app.state.dp = dp
+        app.state.tasks = set()
+
+        await dp.emit_startup(bot=bot)
+        if register_webhook:
+            await set_webhook(bot, dp, config.webhook)
+            await on_startup(bot, config.tg_bot.admin_ids)
+
+        try:
+            yield
+
+        finally:
+            if app.state.tasks:
+                await asyncio.wait(app.state.tasks, timeout=SHUTDOWN_TIMEOUT)
+            if register_webhook:
+                await on_down(bot, config.tg_bot.admin_ids)
+            await dp.emit_shutdown()
+            await dp.storage.close()
+            await bot.session.close()
+            if engine is not None:
+                await engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+    webhook_path = config.webhook.path if config.webhook else "/webhook"
+
+    @app.post("/api")
+    async def health_endpoint(request: fastapi.Request):
+        return JSONResponse(status_code=200, content={"status": "ok"})
+
+    if config.metrics:
+
+        @app.get("/metrics")
+        async def metrics_endpoint():
+            return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+    @app.post(webhook_path)
+    async def webhook_endpoint(request: fastapi.Request):
+        # Compared as bytes, a header may have characters other than ASCII
+        secret_token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if config.webhook is None or not secrets.compare_digest(
+            secret_token.encode(), config.webhook.secret.encode()
+        ):
+            return JSONResponse(status_code=403, content={"status": "forbidden"})
+
+        bot: Bot = request.app.state.bot
+        dp: Dispatcher = request.app.state.dp
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except ValueError as e:
+            # Not JSON or not an update, Telegram would retry it after a 500
+            log.warning(f"Invalid update:\n {str(e)}")
+            return JSONResponse(status_code=400, content={"status": "bad request"})
+
+        task = asyncio.create_task(process_update(dp, bot, update))
+        request.app.state.tasks.add(task)
+        task.add_done_callback(request.app.state.tasks.discard)
+
+        return JSONResponse(status_code=200, content={"status": "ok"})
+
+    return app
+
+
+async def process_update(dp: Dispatcher, bot: Bot, update: Update):
+    try:
+        await dp.feed_update(bot, update)
+    except Exception:
+        log.exception(f"Update {update.update_id} failed")
+
+
+def create_app_from_env() -> FastAPI:
+    """
+    Factory of the app for uvicorn, the configuration is only loaded when it's called:
+        uvicorn infrastructure.api.app:create_app_from_env --factory
+    """
+    bl.basic_colorized_config(level=logging.INFO)
+    setup_queue_logging()
+    return create_app(load_config(".env"), register_webhook=True)
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.engine import Dialect
+
+
+@dataclass(frozen=True)
+class DialectCapabilities:
+    """
+    SQL features of the connected database server the repositories rely on.
+
+    Attributes:
+        name (str): Dialect name, "postgresql", "mysql" (MariaDB included) or "sqlite".
+        is_mariadb (bool): True if the "mysql" dialect is connected to MariaDB.
+        insert_returning (bool): Supports INSERT ... RETURNING, upserts included.
+        update_returning (bool): Supports UPDATE ... RETURNING.
+        delete_returning (bool): Supports DELETE ... RETURNING.
+    """
+
+    name: str
+    is_mariadb: bool = False
+    insert_returning: bool = False
+    update_returning: bool = False
+    delete_returning: bool = False
+
+    @classmethod
+    def from_dialect(cls, dialect: Dialect) -> "DialectCapabilities":
+        return cls(
+            name=dialect.name,
+            is_mariadb=bool(getattr(dialect, "is_mariadb", False)),
+            insert_returning=dialect.insert_returning,
+            update_returning=dialect.update_returning,
+            delete_returning=dialect.delete_returning,
+        )
+
+
+_capabilities: WeakKeyDictionary[Dialect, DialectCapabilities] = WeakKeyDictionary()
+
+
+def detect_capabilities(dialect: Dialect) -> DialectCapabilities:
+    """
+    Stores the capabilities of an initialized dialect, called once on the first connection.
+    :param dialect: Dialect of the engine, after SQLAlchemy has read the server version.
+    :return: DialectCapabilities.
+    """
+
+    capabilities = DialectCapabilities.from_dialect(dialect)
+    _capabilities[dialect] = capabilities
+    return capabilities
+
+
+def get_capabilities(dialect: Dialect) -> DialectCapabilities:
+    """
+    Returns the capabilities detected for the dialect.
+    Engines not made by create_engine are detected on the first call, after connecting.
+    :param dialect: Dialect of the session's bind.
+    :return: DialectCapabilities.
+    """
+
+    capabilities = _capabilities.get(dialect)
+    if capabilities is None:
+        if getattr(dialect, "server_version_info", None) is None:
+            # Not connected yet, MariaDB features are unknown until then
+            return DialectCapabilities.from_dialect(dialect)
+        capabilities = detect_capabilities(dialect)
+    return capabilities
@@ -3,11 +3,13 @@
 from .base import Base
 from .users import User
 from .locations import Location
+from .outbox import OutboxMessage
 
 models_list = [
     Base,
     User,
     Location,
+    OutboxMessage,
 ]
 
 __all__ = [
@@ -0,0 +1,57 @@
+import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import BIGINT, JSON, TIMESTAMP, Integer, String, Text
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TableNameMixin, TimestampMixin, int_pk
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+
+class OutboxMessage(Base, TimestampMixin, TableNameMixin):
+    """
+    Represents a message queued for delivery to one chat.
+
+    Attributes:
+        id (Mapped[int]): The unique identifier of the delivery.
+        chat_id (Mapped[int]): The recipient.
+        text (Mapped[str]): Text of the message, the caption if there is media.
+        parse_mode (Mapped[Optional[str]]): Parse mode of the text.
+        media (Mapped[Optional[list]]): Serialized InputMedia list, sent as a media group.
+        status (Mapped[str]): One of OutboxStatus values.
+        attempts (Mapped[int]): Delivery attempts made.
+        next_attempt_at (Mapped[datetime.datetime]): When the delivery is due.
+        locked_until (Mapped[Optional[datetime.datetime]]): When a delivery claimed
+            by a worker that died can be claimed again.
+        last_error (Mapped[Optional[str]]): Error of the last failed attempt.
+        sent_at (Mapped[Optional[datetime.datetime]]): When the message was delivered.
+
+    Inherited Attributes:
+        Inherits from Base, TimestampMixin, and TableNameMixin classes, which provide additional attributes and functionality.
+
+    """
+
+    id: Mapped[int_pk]
+    chat_id: Mapped[int] = mapped_column(BIGINT)
+    text: Mapped[str] = mapped_column(Text)
+    parse_mode: Mapped[Optional[str]] = mapped_column(String(16))
+    media: Mapped[Optional[list]] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(
+        String(16), server_default=sql_text(f"'{OutboxStatus.PENDING.value}'"), index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, server_default=sql_text("0"))
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, index=True)
+    locked_until: Mapped[Optional[datetime.datetime]] = mapped_column(TIMESTAMP)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    sent_at: Mapped[Optional[datetime.datetime]] = mapped_column(TIMESTAMP)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.id} {self.chat_id} {self.status}>"
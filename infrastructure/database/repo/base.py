@@ -1,4 +1,6 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+
+from infrastructure.database.capabilities import DialectCapabilities, get_capabilities
 
 
 class BaseRepo:
@@ -7,8 +9,34 @@ class BaseRepo:
 
     Attributes:
         session (AsyncSession): The database session used by the repository.
+        unit_of_work (bool): If True, write methods only flush and the owner
+            of the session commits once, at the end of the unit of work.
 
     """
 
-    def __init__(self, session):
+    def __init__(self, session, unit_of_work: bool = False):
         self.session: AsyncSession = session
+        self.unit_of_work = unit_of_work
+
+    @property
+    def dialect(self) -> DialectCapabilities:
+        """
+        Capabilities of the database server, detected once per engine.
+        """
+        return get_capabilities(self.session.bind.dialect)
+
+    async def commit(self):
+        """
+        Commits the transaction, or only flushes it in unit-of-work mode.
+        """
+        if self.unit_of_work:
+            await self.session.flush()
+        else:
+            await self.session.commit()
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        """
+        Begins a savepoint, use as 'async with repo.savepoint(): ...' to roll back
+        only the statements inside the block on error.
+        """
+        return self.session.begin_nested()
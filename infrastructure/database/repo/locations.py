@@ -1,7 +1,9 @@
+from collections.abc import Sequence
 from typing import Optional
-from sqlalchemy import select, text, update
+from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.mysql import insert as my_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from infrastructure.database.models import Location
 from infrastructure.database.repo.base import BaseRepo
@@ -25,8 +27,7 @@ class LocationRepo(BaseRepo):
         :return: Location object, None if there was an error while making a transaction.
         """
 
-        # Determine the dialect name
-        dialect_name = self.session.bind.dialect.name
+        dialect = self.dialect
 
         # Common values to insert
         values = {
@@ -41,61 +42,133 @@ class LocationRepo(BaseRepo):
         else:
             index_elements = [Location.location_name]
 
-        if dialect_name == "postgresql":
+        if dialect.name == "postgresql":
             # PostgreSQL upsert statement
             insert_stmt = (
                 pg_insert(Location)
                 .values(**values)
                 .on_conflict_do_update(index_elements=index_elements, set_=values)
-                .returning(Location)
             )
 
-            result = await self.session.execute(insert_stmt)
-            inserted_location = result.scalar_one()
-
-        elif dialect_name == "mysql":
+        elif dialect.name == "mysql":
             # MySQL upsert statement
             insert_stmt = (
                 my_insert(Location).values(**values).on_duplicate_key_update(**values)
             )
 
+        elif dialect.name == "sqlite":
+            # SQLite upsert statement, for local runs and benchmarks
+            insert_stmt = (
+                sqlite_insert(Location)
+                .values(**values)
+                .on_conflict_do_update(index_elements=index_elements, set_=values)
+            )
+
+        else:
+            raise ValueError(f"Unsupported database dialect: {dialect.name}")
+
+        if dialect.insert_returning:
+            # PostgreSQL and MariaDB 10.5+ return the row with the upsert itself
+            result = await self.session.execute(
+                insert_stmt.returning(Location),
+                execution_options={"populate_existing": True},
+            )
+            inserted_location = result.scalar_one()
+
+        else:
             await self.session.execute(insert_stmt)
-            # Flush the self.session to ensure the insert/update operation is executed
-            await self.session.flush()
 
-            # Retrieve the last inserted ID using a raw SQL query
-            last_insert_id_query = text("SELECT LAST_INSERT_ID()")
-            result = await self.session.execute(last_insert_id_query)
-            last_id = result.scalar_one()
+            # The location name is unique, so it identifies the row either way
+            location_query = select(Location).where(
+                Location.location_name == values["location_name"]
+            )
+            result = await self.session.execute(
+                location_query, execution_options={"populate_existing": True}
+            )
+            inserted_location = result.scalar_one()
 
-            if not last_id:
-                location_query = select(Location).where(
-                    Location.location_name == values["location_name"]
+        await self.commit()
+        return inserted_location
+
+    async def upsert_locations(self, locations: Sequence[dict]) -> list[Location]:
+        """
+        Creates or updates several locations with one multi-row statement per conflict target.
+        Rows with location_id are matched by location_id, the others by location_name.
+        Doesn't commit or flush, so that a whole import can run in one transaction.
+        :param locations: Dicts with location_name, address, has_solarium and optional location_id keys.
+        :return: List of created or updated Location objects.
+        """
+
+        dialect = self.dialect
+        updated_columns = ("location_name", "address", "has_solarium")
+
+        by_id = [values for values in locations if values.get("location_id")]
+        by_name = [values for values in locations if not values.get("location_id")]
+        by_name = [
+            {key: value for key, value in values.items() if key != "location_id"}
+            for values in by_name
+        ]
+
+        upserted_locations = []
+        for rows, index_elements in (
+            (by_id, [Location.location_id]),
+            (by_name, [Location.location_name]),
+        ):
+            if not rows:
+                continue
+
+            if dialect.name == "postgresql":
+                insert_stmt = pg_insert(Location).values(rows)
+                insert_stmt = insert_stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={column: insert_stmt.excluded[column] for column in updated_columns},
+                )
+
+            elif dialect.name == "mysql":
+                insert_stmt = my_insert(Location).values(rows)
+                insert_stmt = insert_stmt.on_duplicate_key_update(
+                    **{column: insert_stmt.inserted[column] for column in updated_columns}
+                )
+
+            elif dialect.name == "sqlite":
+                insert_stmt = sqlite_insert(Location).values(rows)
+                insert_stmt = insert_stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={column: insert_stmt.excluded[column] for column in updated_columns},
                 )
 
             else:
-                # Query the location after insertion/updation
-                location_query = select(Location).where(Location.location_id == last_id)
+                raise ValueError(f"Unsupported database dialect: {dialect.name}")
 
-            result = await self.session.execute(location_query)
-            inserted_location = result.scalar_one()
+            if dialect.insert_returning:
+                result = await self.session.execute(
+                    insert_stmt.returning(Location),
+                    execution_options={"populate_existing": True},
+                )
+                upserted_locations.extend(result.scalars().all())
 
-        else:
-            raise ValueError(f"Unsupported database dialect: {dialect_name}")
+            else:
+                await self.session.execute(insert_stmt)
 
-        await self.session.commit()
-        return inserted_location
+                # MySQL has no RETURNING, query the rows by their unique names
+                location_query = select(Location).where(
+                    Location.location_name.in_([row["location_name"] for row in rows])
+                )
+                result = await self.session.execute(
+                    location_query, execution_options={"populate_existing": True}
+                )
+                upserted_locations.extend(result.scalars().all())
+
+        return upserted_locations
 
     async def get_location_by_id(self, location_id: int):
         select_stmt = select(Location).where(Location.location_id == location_id)
         result = await self.session.execute(select_stmt)
-        await self.session.commit()
 
         return result.scalars().first()
 
     async def get_all_locations(self):
         select_stmt = select(Location).order_by(Location.location_name.asc())
         result = await self.session.execute(select_stmt)
-        await self.session.commit()
 
         return result.scalars().all()
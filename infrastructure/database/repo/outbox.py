@@ -0,0 +1,214 @@
+import datetime
+from collections.abc import Sequence
+
+from sqlalchemy import and_, func, or_, select, update
+
+from infrastructure.database.models.outbox import OutboxMessage, OutboxStatus
+from infrastructure.database.repo.base import BaseRepo
+
+
+class OutboxRepo(BaseRepo):
+    async def enqueue(
+        self,
+        chat_ids: Sequence[int],
+        text: str,
+        parse_mode: str | None = None,
+        media: list[dict] | None = None,
+    ) -> list[OutboxMessage]:
+        """
+        Queues a message for delivery to every chat, one row per chat.
+        In unit-of-work mode the rows are committed together with the other writes.
+        :param chat_ids: Recipients.
+        :param text: Text of the message, the caption if there is media.
+        :param parse_mode: Parse mode of the text.
+        :param media: Serialized InputMedia list, sent as a media group.
+        :return: List of queued OutboxMessage objects.
+        """
+
+        now = datetime.datetime.now()
+        messages = [
+            OutboxMessage(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                media=media,
+                status=OutboxStatus.PENDING.value,
+                attempts=0,
+                next_attempt_at=now,
+            )
+            for chat_id in chat_ids
+        ]
+        self.session.add_all(messages)
+        await self.commit()
+
+        return messages
+
+    async def claim_due(
+        self, limit: int, lock_for: datetime.timedelta
+    ) -> Sequence[OutboxMessage]:
+        """
+        Claims due deliveries for a worker, skipping rows claimed by other workers.
+        Deliveries claimed by a worker that didn't finish them are due again after lock_for.
+        Every claim counts an attempt, so the attempts of a claimed row tell whether
+        the claim still holds, see extend_claim, mark_sent and mark_failed.
+        :param limit: Maximum number of deliveries to claim.
+        :param lock_for: How long the claim holds.
+        :return: Claimed OutboxMessage objects, their attempts already counted.
+        """
+
+        now = datetime.datetime.now()
+        select_stmt = (
+            select(OutboxMessage)
+            .where(
+                or_(
+                    and_(
+                        OutboxMessage.status == OutboxStatus.PENDING.value,
+                        OutboxMessage.next_attempt_at <= now,
+                    ),
+                    and_(
+                        OutboxMessage.status == OutboxStatus.SENDING.value,
+                        OutboxMessage.locked_until <= now,
+                    ),
+                )
+            )
+            .order_by(OutboxMessage.next_attempt_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(select_stmt)
+        messages = result.scalars().all()
+
+        for message in messages:
+            message.status = OutboxStatus.SENDING.value
+            message.locked_until = now + lock_for
+            message.attempts += 1
+        await self.commit()
+
+        return messages
+
+    @staticmethod
+    def _claimed(message_id: int, attempts: int):
+        """
+        Matches the row only while the claim that counted the attempt holds.
+        """
+        return and_(
+            OutboxMessage.id == message_id,
+            OutboxMessage.attempts == attempts,
+            OutboxMessage.status == OutboxStatus.SENDING.value,
+        )
+
+    async def extend_claim(
+        self, message_id: int, attempts: int, lock_for: datetime.timedelta
+    ) -> bool:
+        """
+        Extends the claim of a delivery that is still being sent.
+        :param message_id: The delivery's ID.
+        :param attempts: Attempts of the delivery when it was claimed.
+        :param lock_for: How long the claim holds from now.
+        :return: False if the claim was lost to another worker or the delivery is done.
+        """
+
+        update_stmt = (
+            update(OutboxMessage)
+            .where(self._claimed(message_id, attempts))
+            .values(locked_until=datetime.datetime.now() + lock_for)
+        )
+        result = await self.session.execute(update_stmt)
+        await self.commit()
+
+        return result.rowcount == 1
+
+    async def mark_sent(self, message_id: int, attempts: int) -> bool:
+        """
+        Records a delivered message.
+        :param message_id: The delivery's ID.
+        :param attempts: Attempts of the delivery when it was claimed.
+        :return: False if the claim was lost to another worker, nothing is recorded.
+        """
+
+        update_stmt = (
+            update(OutboxMessage)
+            .where(self._claimed(message_id, attempts))
+            .values(
+                status=OutboxStatus.SENT.value,
+                sent_at=datetime.datetime.now(),
+                locked_until=None,
+                last_error=None,
+            )
+        )
+        result = await self.session.execute(update_stmt)
+        await self.commit()
+
+        return result.rowcount == 1
+
+    async def mark_failed(
+        self,
+        message_id: int,
+        attempts: int,
+        error: str | None,
+        retry_at: datetime.datetime | None,
+    ) -> bool:
+        """
+        Records a failed attempt.
+        :param message_id: The delivery's ID.
+        :param attempts: Attempts of the delivery when it was claimed.
+        :param error: Error of the attempt.
+        :param retry_at: When to try again, None moves the delivery to the dead letters.
+        :return: False if the claim was lost to another worker, nothing is recorded.
+        """
+
+        values = {"last_error": error, "locked_until": None}
+        if retry_at is None:
+            values["status"] = OutboxStatus.DEAD.value
+        else:
+            values["status"] = OutboxStatus.PENDING.value
+            values["next_attempt_at"] = retry_at
+
+        update_stmt = (
+            update(OutboxMessage)
+            .where(self._claimed(message_id, attempts))
+            .values(**values)
+        )
+        result = await self.session.execute(update_stmt)
+        await self.commit()
+
+        return result.rowcount == 1
+
+    async def get_status_counts(self) -> dict[str, int]:
+        select_stmt = select(OutboxMessage.status, func.count()).group_by(
+            OutboxMessage.status
+        )
+        result = await self.session.execute(select_stmt)
+
+        return {status: count for status, count in result}
+
+    async def get_stuck(self, limit: int = 20) -> Sequence[OutboxMessage]:
+        """
+        Retrieve deliveries that need attention: dead letters, deliveries being retried,
+        and deliveries whose worker didn't finish them.
+        :param limit: Maximum number of deliveries to return.
+        :return: List of OutboxMessage objects, the oldest first.
+        """
+
+        now = datetime.datetime.now()
+        select_stmt = (
+            select(OutboxMessage)
+            .where(
+                or_(
+                    OutboxMessage.status == OutboxStatus.DEAD.value,
+                    and_(
+                        OutboxMessage.status == OutboxStatus.PENDING.value,
+                        OutboxMessage.attempts > 0,
+                    ),
+                    and_(
+                        OutboxMessage.status == OutboxStatus.SENDING.value,
+                        OutboxMessage.locked_until <= now,
+                    ),
+                )
+            )
+            .order_by(OutboxMessage.created_at.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(select_stmt)
+
+        return result.scalars().all()
@@ -1,36 +1,258 @@
-from dataclasses import dataclass
+import functools
+import inspect
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
+from betterlogging import logging
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    AsyncSessionTransaction,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
 from faker import Faker
 
+from infrastructure.database.repo.base import BaseRepo
 from infrastructure.database.repo.locations import LocationRepo
+from infrastructure.database.repo.outbox import OutboxRepo
 from infrastructure.database.repo.users import UserRepo
 
 
+logger = logging.getLogger(__name__)
+
+
 @dataclass
 class RequestsRepo:
     """
     Repository for handling database operations. This class holds all the repositories for the database models.
 
     You can add more repositories as properties to this class, so they will be easily accessible.
+
+    In unit-of-work mode repositories only flush their writes, and the owner of
+    the session commits them once with commit_unit_of_work(). Changes that must
+    only follow a successful commit, like updates of in-memory caches, are
+    registered with after_commit().
     """
 
     session: AsyncSession
+    unit_of_work: bool = False
+    _after_commit: list[Callable[[], None]] = field(
+        default_factory=list, init=False, repr=False
+    )
 
     @property
     def users(self) -> UserRepo:
         """
         The User repository sessions are required to manage user operations.
         """
-        return UserRepo(self.session)
+        return UserRepo(self.session, self.unit_of_work)
 
     @property
     def locations(self) -> LocationRepo:
         """
         The User repository sessions are required to manage user operations.
         """
-        return LocationRepo(self.session)
+        return LocationRepo(self.session, self.unit_of_work)
+
+    @property
+    def outbox(self) -> OutboxRepo:
+        """
+        The Outbox repository queues messages for delivery.
+        """
+        return OutboxRepo(self.session, self.unit_of_work)
+
+    async def commit(self):
+        """
+        Commits the transaction, or only flushes it in unit-of-work mode.
+        """
+        await BaseRepo(self.session, self.unit_of_work).commit()
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        """
+        Begins a savepoint, use as 'async with repo.savepoint(): ...'.
+        """
+        return self.session.begin_nested()
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Runs the callback once the writes made so far are committed. In unit-of-work
+        mode that is in commit_unit_of_work(), and the callback is dropped if the
+        session rolls back instead; otherwise the writes are committed already and
+        the callback runs right away.
+        """
+        if not self.unit_of_work:
+            self._run_callbacks([callback])
+            return
+
+        sync_session = self.session.sync_session
+        if not event.contains(sync_session, "after_rollback", self._drop_after_commit):
+            event.listen(sync_session, "after_rollback", self._drop_after_commit)
+        self._after_commit.append(callback)
+
+    def _drop_after_commit(self, session: Session):
+        self._after_commit.clear()
+
+    async def commit_unit_of_work(self):
+        """
+        Commits everything written during the unit of work.
+        """
+        try:
+            if self.session.in_transaction():
+                await self.session.commit()
+        except Exception:
+            self._after_commit.clear()
+            raise
+        self._run_after_commit()
+
+    def _run_after_commit(self):
+        callbacks, self._after_commit = self._after_commit, []
+        self._run_callbacks(callbacks)
+
+    @staticmethod
+    def _run_callbacks(callbacks: list[Callable[[], None]]):
+        for callback in callbacks:
+            # The writes are committed, a failing callback mustn't fail the request
+            try:
+                callback()
+            except Exception:
+                logger.exception(f"After commit callback {callback} failed")
+
+
+def _track_writes(orm_execute_state: ORMExecuteState):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["has_writes"] = True
+
+
+def _track_flush(session: Session, flush_context):
+    session.info["has_writes"] = True
+
+
+def _reset_writes(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None:
+        session.info["has_writes"] = False
+
+
+class _ReleasingRepo:
+    """
+    Proxy of a model repository that lets LazyRequestsRepo release its session
+    after every repository call.
+    """
+
+    def __init__(self, repo, owner: "LazyRequestsRepo"):
+        self._repo = repo
+        self._owner = owner
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                await self._owner.release()
+
+        return call
+
+
+class LazyRequestsRepo(RequestsRepo):
+    """
+    RequestsRepo that checks out a session from the pool only on first use.
+
+    After every repository call the session is closed, and its connection returned
+    to the pool, unless the call left uncommitted writes. The next call checks out
+    a new session, so handlers that don't touch the database never use the pool.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker, unit_of_work: bool = False):
+        self.session_pool = session_pool
+        self.unit_of_work = unit_of_work
+        self._session: AsyncSession | None = None
+        self._after_commit = []
+        self.touched = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} touched={self.touched}>"
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self.session_pool()
+            self.touched = True
+
+            sync_session = self._session.sync_session
+            event.listen(sync_session, "do_orm_execute", _track_writes)
+            event.listen(sync_session, "after_flush", _track_flush)
+            event.listen(sync_session, "after_transaction_end", _reset_writes)
+
+        return self._session
+
+    @property
+    def users(self) -> UserRepo:
+        return _ReleasingRepo(UserRepo(self.session, self.unit_of_work), self)
+
+    @property
+    def locations(self) -> LocationRepo:
+        return _ReleasingRepo(LocationRepo(self.session, self.unit_of_work), self)
+
+    @property
+    def outbox(self) -> OutboxRepo:
+        return _ReleasingRepo(OutboxRepo(self.session, self.unit_of_work), self)
+
+    @property
+    def has_writes(self) -> bool:
+        """
+        True if the session has writes that are not committed yet.
+        """
+        return self._session is not None and bool(
+            self._session.sync_session.info.get("has_writes")
+        )
+
+    async def commit_unit_of_work(self):
+        """
+        Commits the writes of the unit of work, without checking out a session if there are none.
+        A transaction already failed by a handled error is rolled back instead, and
+        the after commit callbacks are dropped.
+        """
+        if not self.has_writes:
+            self._run_after_commit()
+            return
+
+        transaction = self.session.get_transaction()
+        if transaction is not None and not transaction.is_active:
+            self._after_commit.clear()
+            await self.session.rollback()
+            return
+
+        try:
+            await self.session.commit()
+        except Exception:
+            self._after_commit.clear()
+            raise
+        self._run_after_commit()
+
+    async def release(self):
+        """
+        Closes the session unless it has uncommitted writes.
+        """
+        if self._session is not None and not self.has_writes:
+            await self.close()
+
+    async def close(self):
+        """
+        Closes the session, rolling back anything uncommitted.
+        """
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
 
 
 if __name__ == "__main__":
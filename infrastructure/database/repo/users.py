@@ -4,6 +4,7 @@ from typing import Optional
 from sqlalchemy import delete, insert, select, update
 from sqlalchemy.dialects.mysql import insert as my_insert
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from infrastructure.database.models import User
 from infrastructure.database.models.locations import Location, UserLocation
@@ -28,8 +29,7 @@ class UserRepo(BaseRepo):
         :return: User object, None if there was an error while making a transaction.
         """
 
-        # Determine the dialect name
-        dialect_name = self.session.bind.dialect.name
+        dialect = self.dialect
 
         # Common values to insert
         values = {
@@ -40,46 +40,115 @@ class UserRepo(BaseRepo):
             # "logged_as": logged_as,
         }
 
-        if dialect_name == "postgresql":
+        if dialect.name == "postgresql":
             # PostgreSQL upsert statement
             insert_stmt = (
                 pg_insert(User)
                 .values(**values)
                 .on_conflict_do_update(index_elements=[User.user_id], set_=values)
-                .returning(User)
             )
 
-            result = await self.session.execute(insert_stmt)
-            inserted_user = result.scalar_one()
-
-        elif dialect_name == "mysql":
+        elif dialect.name == "mysql":
             # MySQL upsert statement
             insert_stmt = (
                 my_insert(User).values(**values).on_duplicate_key_update(**values)
             )
 
-            await self.session.execute(insert_stmt)
-            # Flush the self.session to ensure the insert/update operation is executed
-            await self.session.flush()
-            # Query the user after insertion/updation
-            user_query = select(User).where(User.user_id == user_id)
-            result = await self.session.execute(user_query)
+        elif dialect.name == "sqlite":
+            # SQLite upsert statement, for local runs and benchmarks
+            insert_stmt = (
+                sqlite_insert(User)
+                .values(**values)
+                .on_conflict_do_update(index_elements=[User.user_id], set_=values)
+            )
+
+        else:
+            raise ValueError(f"Unsupported database dialect: {dialect.name}")
+
+        if dialect.insert_returning:
+            # PostgreSQL and MariaDB 10.5+ return the row with the upsert itself
+            result = await self.session.execute(
+                insert_stmt.returning(User),
+                execution_options={"populate_existing": True},
+            )
             inserted_user = result.scalar_one()
+        else:
+            await self.session.execute(insert_stmt)
+            inserted_user = await self.session.get(
+                User, user_id, populate_existing=True
+            )
+
+        await self.commit()
+        return inserted_user
+
+    async def upsert_users(self, users: Sequence[dict]):
+        """
+        Creates or updates several users with a single multi-row statement.
+        :param users: Dicts with user_id, username, full_name and language keys.
+        :return: None
+        """
+
+        if not users:
+            return
+
+        dialect_name = self.dialect.name
+        updated_columns = ("username", "full_name", "language")
+
+        if dialect_name == "postgresql":
+            insert_stmt = pg_insert(User).values(list(users))
+            insert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=[User.user_id],
+                set_={column: insert_stmt.excluded[column] for column in updated_columns},
+            )
+
+        elif dialect_name == "mysql":
+            insert_stmt = my_insert(User).values(list(users))
+            insert_stmt = insert_stmt.on_duplicate_key_update(
+                **{column: insert_stmt.inserted[column] for column in updated_columns}
+            )
+
+        elif dialect_name == "sqlite":
+            insert_stmt = sqlite_insert(User).values(list(users))
+            insert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=[User.user_id],
+                set_={column: insert_stmt.excluded[column] for column in updated_columns},
+            )
 
         else:
             raise ValueError(f"Unsupported database dialect: {dialect_name}")
 
-        await self.session.commit()
-        return inserted_user
+        await self.session.execute(insert_stmt)
+        await self.commit()
+
+    async def set_user_logged_as(
+        self, user_id: int, logged_as: str | None
+    ) -> User | None:
+        """
+        Sets the name the user has logged in as.
+        :param user_id: The user's ID.
+        :param logged_as: Name to log in as, None to log out.
+        :return: Updated User object, None if there is no such user.
+        """
 
-    async def set_user_logged_as(self, user_id: int, logged_as: str | None):
-        insert_stmt = (
+        update_stmt = (
             update(User).where(User.user_id == user_id).values(logged_as=logged_as)
         )
-        result = await self.session.execute(insert_stmt)
-        await self.session.commit()
 
-        return result.last_updated_params()
+        if self.dialect.update_returning:
+            result = await self.session.execute(
+                update_stmt.returning(User),
+                execution_options={"populate_existing": True},
+            )
+            updated_user = result.scalar_one_or_none()
+        else:
+            # MySQL and MariaDB have no UPDATE ... RETURNING
+            await self.session.execute(update_stmt)
+            updated_user = await self.session.get(
+                User, user_id, populate_existing=True
+            )
+
+        await self.commit()
+        return updated_user
 
     async def get_user_by_id(self, user_id: int):
         select_stmt = select(User).where(User.user_id == user_id)
@@ -87,21 +156,32 @@ class UserRepo(BaseRepo):
 
         return result.scalars().first()
 
-    async def del_user_by_id(self, user_id: int):
-        # Step 1: Retrieve the rows to be deleted
-        select_stmt = select(User).where(User.user_id == user_id)
-        result = await self.session.execute(select_stmt)
-        user_to_delete = result.scalars().first()
+    async def del_user_by_id(self, user_id: int) -> User | None:
+        """
+        Deletes the user.
+        :param user_id: The user's ID.
+        :return: Deleted User object, None if there was no such user.
+        """
 
-        if user_to_delete:
-            # Step 2: Delete the rows
-            delete_stmt = delete(User).where(User.user_id == user_id)
-            await self.session.execute(delete_stmt)
-            await self.session.commit()
+        delete_stmt = delete(User).where(User.user_id == user_id)
 
-            return user_to_delete
+        if self.dialect.delete_returning:
+            result = await self.session.execute(delete_stmt.returning(User))
+            user_to_delete = result.scalar_one_or_none()
         else:
-            return None
+            # MySQL has no DELETE ... RETURNING, retrieve the row first
+            result = await self.session.execute(
+                select(User).where(User.user_id == user_id)
+            )
+            user_to_delete = result.scalars().first()
+            if user_to_delete is None:
+                return None
+            await self.session.execute(delete_stmt)
+
+        if user_to_delete is not None:
+            await self.commit()
+
+        return user_to_delete
 
     async def get_all_users(self):
         select_stmt = (
@@ -125,6 +205,19 @@ class UserRepo(BaseRepo):
 
         return result.scalar()
 
+    async def get_user_role_flags(self, user_id: int) -> tuple[bool, bool] | None:
+        """
+        Retrieve the flags the user's role depends on.
+        :param user_id: The user's ID.
+        :return: Tuple of is_owner and active, None if there is no such user.
+        """
+
+        select_stmt = select(User.is_owner, User.active).where(User.user_id == user_id)
+        result = await self.session.execute(select_stmt)
+        row = result.first()
+
+        return (row.is_owner, row.active) if row is not None else None
+
     async def get_all_user_locations_relationships(
         self, user_id: int
     ) -> Sequence[Location]:
@@ -155,14 +248,25 @@ class UserRepo(BaseRepo):
             user_id=user_id, location_id=location_id
         )
         await self.session.execute(insert_stmt)
-        await self.session.commit()
+        await self.commit()
 
     async def del_user_location(self, user_id: int, location_id: int):
         delete_stmt = delete(UserLocation).where(
             UserLocation.user_id == user_id, UserLocation.location_id == location_id
         )
         await self.session.execute(delete_stmt)
-        await self.session.commit()
+        await self.commit()
+
+    async def get_all_user_location_pairs(self) -> Sequence[tuple[int, int]]:
+        """
+        Retrieve all user-location relationships as plain (user_id, location_id) pairs.
+        :return: List of (user_id, location_id) tuples.
+        """
+
+        select_stmt = select(UserLocation.user_id, UserLocation.location_id)
+        result = await self.session.execute(select_stmt)
+
+        return [(row.user_id, row.location_id) for row in result]
 
     async def get_all_users_locations(self) -> Sequence[UserLocation]:
         """
@@ -1,6 +1,27 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from infrastructure.database.capabilities import detect_capabilities
 from tgbot.config import DbConfig
+from tgbot.services.metrics import DB_POOL_WAIT, register_pool_metrics
+from tgbot.services.tracing import trace_engine
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long checkouts wait for a connection, opening one included,
+    to size pool_size and max_overflow.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
 
 
 def create_engine(db: DbConfig, echo=False):
@@ -12,6 +33,19 @@ def create_engine(db: DbConfig, echo=False):
         future=True,
         echo=echo,
         pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+    )
+    register_pool_metrics(engine.sync_engine.pool)
+    # Statements are traced only while a sampled update is handled
+    trace_engine(engine)
+
+    # Runs after SQLAlchemy has initialized the dialect with the server version
+    dialect = engine.sync_engine.dialect
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda dbapi_connection, connection_record: detect_capabilities(dialect),
+        once=True,
     )
     return engine
 
@@ -0,0 +1,45 @@
+"""Added outboxmessages table
+
+Revision ID: 3c9e5b7a1d42
+Revises: 75f7a26a39a2
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5b7a1d42'
+down_revision: Union[str, None] = '75f7a26a39a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outboxmessages',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('chat_id', sa.BIGINT(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(length=16), nullable=True),
+        sa.Column('media', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default=sa.text("'pending'"), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=False),
+        sa.Column('locked_until', sa.TIMESTAMP(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outboxmessages_status'), 'outboxmessages', ['status'], unique=False)
+    op.create_index(op.f('ix_outboxmessages_next_attempt_at'), 'outboxmessages', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_outboxmessages_next_attempt_at'), table_name='outboxmessages')
+    op.drop_index(op.f('ix_outboxmessages_status'), table_name='outboxmessages')
+    op.drop_table('outboxmessages')
@@ -0,0 +1,60 @@
+import asyncio
+
+from aiogram.types import Message
+
+from tgbot.middlewares.albums_collector import AlbumsMiddleware
+
+
+def album_part(message_id: int, media_group_id: str = "album") -> Message:
+    return Message.model_validate(
+        {
+            "message_id": message_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "media_group_id": media_group_id,
+            "photo": [
+                {
+                    "file_id": str(message_id),
+                    "file_unique_id": str(message_id),
+                    "width": 1,
+                    "height": 1,
+                }
+            ],
+        }
+    )
+
+
+def collect(delays: list[float]) -> tuple[list[list[int]], AlbumsMiddleware]:
+    """
+    Feeds album parts with the delays before them, returns the albums handled.
+    """
+
+    async def main():
+        middleware = AlbumsMiddleware(quiet_window=0.05, max_wait=0.5)
+        albums = []
+
+        async def handler(event, data):
+            albums.append([message.message_id for message in data["album"]])
+
+        tasks = []
+        for message_id, delay in enumerate(delays, start=1):
+            await asyncio.sleep(delay)
+            tasks.append(
+                asyncio.create_task(middleware(handler, album_part(message_id), {}))
+            )
+        await asyncio.gather(*tasks)
+        return albums, middleware
+
+    return asyncio.run(main())
+
+
+def test_parts_are_handled_as_one_album():
+    albums, middleware = collect([0, 0.01, 0.01])
+    assert albums == [[1, 2, 3]]
+    assert middleware.stats["albums_total"] == 1
+
+
+def test_late_part_is_dropped_instead_of_starting_an_album():
+    albums, middleware = collect([0, 0.01, 0.2])
+    assert albums == [[1, 2]]
+    assert middleware.stats["late_parts_total"] == 1
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from bot import poll_with_workers
+from infrastructure.database.models import Location
+from tgbot.config import Config, DbConfig, TgBot
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.cache_sync import CacheSync
+from tgbot.services.locations_catalog import LocationCatalog
+from tgbot.services.roles import Role, RoleIndex
+
+
+def worker(server: FakeServer | None) -> CacheSync:
+    access_index = AccessIndex(session_pool=None)
+    # Nothing to load, the index starts empty
+    access_index._loaded = True
+    location_catalog = LocationCatalog(session_pool=None)
+    location_catalog._loaded = True
+    redis = FakeRedis(server=server) if server else None
+    return CacheSync(
+        access_index, location_catalog, role_index=RoleIndex([]), redis=redis
+    )
+
+
+async def received(sync: CacheSync, total: int):
+    while sync.received_total < total:
+        await asyncio.sleep(0.01)
+
+
+def test_changes_reach_the_other_process():
+    server = FakeServer()
+    first, second = worker(server), worker(server)
+
+    async def main():
+        for sync in first, second:
+            await sync.start()
+            await sync.wait_subscribed()
+
+        first.add_access(7, 1)
+        first.add_access(7, 2)
+        await asyncio.wait_for(received(second, 2), 1)
+        second.remove_access(7, 1)
+        await asyncio.wait_for(received(first, 1), 1)
+        access = (
+            await first.access_index.locations_for(7),
+            await second.access_index.locations_for(7),
+        )
+
+        for sync in first, second:
+            await sync.close()
+        return access
+
+    assert asyncio.run(main()) == (frozenset({2}), frozenset({2}))
+    # Own changes come back from the channel and are skipped
+    assert first.stats == {"published_total": 2, "received_total": 1}
+    assert second.stats == {"published_total": 1, "received_total": 2}
+
+
+def test_removed_user_and_changed_locations_are_reloaded_elsewhere():
+    server = FakeServer()
+    first, second = worker(server), worker(server)
+    second.role_index.roles[7] = Role.ADMIN
+    second.access_index.add(7, 1)
+
+    async def main():
+        for sync in first, second:
+            await sync.start()
+            await sync.wait_subscribed()
+
+        first.remove_user(7)
+        first.apply_locations(
+            Location(location_id=1, location_name="Арбат", address="", has_solarium=False)
+        )
+        await asyncio.wait_for(received(second, 2), 1)
+
+        for sync in first, second:
+            await sync.close()
+
+    asyncio.run(main())
+    assert 7 not in second.role_index.roles
+    assert 7 not in second.access_index.locations_by_user
+    assert 1 in first.location_catalog.locations
+    # Locations aren't sent, the other catalog reloads from the database
+    assert not second.location_catalog._loaded
+
+
+def test_without_redis_only_this_process_changes():
+    sync = worker(None)
+
+    async def main():
+        await sync.start()
+        sync.add_access(7, 1)
+        await sync.close()
+        return await sync.access_index.locations_for(7)
+
+    assert asyncio.run(main()) == frozenset({1})
+    assert sync.stats == {"published_total": 0, "received_total": 0}
+
+
+def test_workers_with_a_database_need_redis():
+    config = Config(
+        tg_bot=TgBot(
+            token="42:TEST",
+            admin_ids=[],
+            proxy_url="",
+            use_redis=False,
+            console_log_level="INFO",
+            workers=2,
+        ),
+        db=DbConfig(
+            host="",
+            password="",
+            user="",
+            database="bot.db",
+            dialect="sqlite",
+            driver="aiosqlite",
+        ),
+        redis=None,
+        misc=None,
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(poll_with_workers(config))
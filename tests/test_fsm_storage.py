@@ -0,0 +1,102 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Message
+from environs import Env
+from fakeredis.aioredis import FakeRedis
+
+from tgbot.config import RedisConfig
+from tgbot.services.fsm_storage import create_redis_storage
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+def redis_config(**kwargs) -> RedisConfig:
+    return RedisConfig(
+        redis_pass=None, redis_port=6379, redis_host="localhost", **kwargs
+    )
+
+
+def bot_message() -> Message:
+    return Message.model_validate(
+        {
+            "message_id": 7,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "text": "Выберите филиал",
+        }
+    )
+
+
+def test_state_and_data_round_trip():
+    async def main():
+        bot = Bot("42:TEST")
+        storage = create_redis_storage(redis_config(), bot, redis=FakeRedis())
+        await storage.set_state(KEY, "ReportMenu:location")
+        await storage.set_data(
+            KEY,
+            {
+                "location_id": 3,
+                "clients_lost": {"- мужской зал:": "1"},
+                "photo_ids": {"a", "b"},
+                "location_message": bot_message(),
+            },
+        )
+
+        # A new storage on the same Redis, as after a restart
+        restored = create_redis_storage(redis_config(), bot, redis=storage.redis)
+        state = await restored.get_state(KEY)
+        data = await restored.get_data(KEY)
+        await bot.session.close()
+        return bot, state, data
+
+    bot, state, data = asyncio.run(main())
+    assert state == "ReportMenu:location"
+    assert data["location_id"] == 3
+    assert data["clients_lost"] == {"- мужской зал:": "1"}
+    assert sorted(data["photo_ids"]) == ["a", "b"]
+    message = data["location_message"]
+    assert isinstance(message, Message)
+    assert (message.message_id, message.chat.id, message.text) == (7, 1, "Выберите филиал")
+    # Restored messages are bound to the bot, so message.delete() works
+    assert message.bot is bot
+
+
+def test_state_and_data_expire_after_their_ttl():
+    async def main():
+        storage = create_redis_storage(
+            redis_config(state_ttl=60, data_ttl=120), redis=FakeRedis()
+        )
+        await storage.set_state(KEY, "ReportMenu:location")
+        await storage.set_data(KEY, {"location_id": 3})
+        state_key = storage.key_builder.build(KEY, "state")
+        data_key = storage.key_builder.build(KEY, "data")
+        return await storage.redis.ttl(state_key), await storage.redis.ttl(data_key)
+
+    state_ttl, data_ttl = asyncio.run(main())
+    assert 0 < state_ttl <= 60
+    assert 60 < data_ttl <= 120
+
+
+def test_state_is_kept_without_ttl():
+    async def main():
+        storage = create_redis_storage(redis_config(), redis=FakeRedis())
+        await storage.set_state(KEY, "ReportMenu:location")
+        return await storage.redis.ttl(storage.key_builder.build(KEY, "state"))
+
+    # -1: the key exists and has no expiry
+    assert asyncio.run(main()) == -1
+
+
+def test_redis_db_setting(monkeypatch):
+    monkeypatch.setenv("REDIS_DB", "3")
+    monkeypatch.setenv("REDIS_PASSWORD", "secret")
+    config = RedisConfig.from_env(Env())
+
+    assert config.redis_db == 3
+    assert config.dsn() == "redis://:secret@localhost:6379/3"
+    # Nothing connects until the storage is used
+    storage = create_redis_storage(config)
+    assert storage.redis.connection_pool.connection_kwargs["db"] == 3
+    assert storage.redis.connection_pool.connection_kwargs["password"] == "secret"
@@ -0,0 +1,60 @@
+import asyncio
+
+from infrastructure.database.models import Location
+from tgbot.keyboards.inline import UserCallbackData
+from tgbot.services.locations_catalog import LocationCatalog
+
+
+def catalog(*names: str) -> LocationCatalog:
+    catalog = LocationCatalog(session_pool=None)
+    catalog.apply(
+        *(
+            Location(
+                location_id=location_id,
+                location_name=name,
+                address="",
+                has_solarium=False,
+            )
+            for location_id, name in enumerate(names, start=1)
+        )
+    )
+    # Nothing to load, the applied locations are the whole catalog
+    catalog._loaded = True
+    return catalog
+
+
+def offered(markup) -> list[int]:
+    return [
+        UserCallbackData.unpack(row[0].callback_data).location_id
+        for row in markup.inline_keyboard
+    ]
+
+
+def test_keyboard_offers_only_the_given_locations():
+    locations = catalog("Арбат", "Тверская", "Мира")
+
+    async def main():
+        return (
+            await locations.keyboard(7),
+            await locations.keyboard(7, frozenset({1, 3})),
+            await locations.keyboard(7, frozenset()),
+        )
+
+    everything, allowed, nothing = asyncio.run(main())
+    assert offered(everything) == [1, 3, 2]
+    assert offered(allowed) == [1, 3]
+    assert offered(nothing) == []
+
+
+def test_keyboard_is_rendered_again_when_the_access_changes():
+    locations = catalog("Арбат", "Тверская")
+
+    async def main():
+        first = await locations.keyboard(7, frozenset({1}))
+        cached = await locations.keyboard(7, frozenset({1}))
+        changed = await locations.keyboard(7, frozenset({1, 2}))
+        return first, cached, changed
+
+    first, cached, changed = asyncio.run(main())
+    assert cached is first
+    assert offered(changed) == [1, 2]
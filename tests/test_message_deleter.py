@@ -0,0 +1,68 @@
+import asyncio
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods import DeleteMessages
+
+from tgbot.models.report_draft import MessageRef
+from tgbot.services.message_deleter import delete_messages
+
+
+class FakeBot:
+    """
+    Raises the queued errors of deleteMessages before answering, records the calls.
+    """
+
+    def __init__(self, *bulk_errors: Exception):
+        self.bulk_errors = list(bulk_errors)
+        self.calls = []
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.calls.append(("deleteMessages", chat_id, message_ids))
+        if self.bulk_errors:
+            raise self.bulk_errors.pop(0)
+        return True
+
+    async def delete_message(self, chat_id, message_id):
+        self.calls.append(("deleteMessage", chat_id, message_id))
+        return True
+
+
+def flood_wait() -> TelegramRetryAfter:
+    return TelegramRetryAfter(
+        DeleteMessages(chat_id=1, message_ids=[1]), "Too Many Requests", retry_after=0
+    )
+
+
+def delete(bot: FakeBot):
+    asyncio.run(delete_messages(bot, [MessageRef(1, 10), MessageRef(1, 11), None]))
+    return [call[0] for call in bot.calls]
+
+
+def test_bulk_call_is_retried_after_a_flood_wait():
+    assert delete(FakeBot(flood_wait())) == ["deleteMessages", "deleteMessages"]
+
+
+def test_messages_are_deleted_one_by_one_after_a_bad_request():
+    bad_request = TelegramBadRequest(
+        DeleteMessages(chat_id=1, message_ids=[10, 11]), "message can't be deleted"
+    )
+    assert delete(FakeBot(bad_request)) == [
+        "deleteMessages",
+        "deleteMessage",
+        "deleteMessage",
+    ]
+
+
+def test_other_errors_dont_fall_back_to_single_calls():
+    server_error = TelegramServerError(
+        DeleteMessages(chat_id=1, message_ids=[10, 11]), "Bad Gateway"
+    )
+    assert delete(FakeBot(server_error)) == ["deleteMessages"]
+
+
+def test_flood_waits_are_retried_a_bounded_number_of_times():
+    assert delete(FakeBot(*(flood_wait() for _ in range(5)))) == ["deleteMessages"] * 3
@@ -0,0 +1,153 @@
+import asyncio
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from infrastructure.database.models import Base
+from infrastructure.database.models.outbox import OutboxMessage, OutboxStatus
+from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.services.broadcaster import SendResult
+from tgbot.services.outbox import OutboxWorker
+
+
+class FakeBroadcaster:
+    """
+    Answers every delivery with the result given for its chat.
+    """
+
+    def __init__(self, results: dict[int, SendResult], delay: float = 0.0):
+        self.results = results
+        self.delay = delay
+        self.sent: list[int] = []
+
+    async def send_message(self, bot, chat_id, text, **kwargs) -> SendResult:
+        self.sent.append(chat_id)
+        await asyncio.sleep(self.delay)
+        return self.results[chat_id]
+
+
+async def create_session_pool(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def run_batch(tmp_path, results: dict[int, SendResult], max_attempts: int = 5):
+    async def main():
+        engine, session_pool = await create_session_pool(tmp_path)
+
+        async with session_pool() as session:
+            await RequestsRepo(session).outbox.enqueue(list(results), "Report")
+
+        broadcaster = FakeBroadcaster(results)
+        worker = OutboxWorker(
+            session_pool, bot=None, max_attempts=max_attempts, broadcaster=broadcaster
+        )
+        claimed = await worker.process_batch()
+        # Nothing is due again right away
+        claimed_again = await worker.process_batch()
+
+        async with session_pool() as session:
+            messages = (await session.execute(select(OutboxMessage))).scalars().all()
+        await engine.dispose()
+        return claimed, claimed_again, {message.chat_id: message for message in messages}
+
+    return asyncio.run(main())
+
+
+def test_process_batch_records_outcomes(tmp_path):
+    claimed, claimed_again, messages = run_batch(
+        tmp_path,
+        {
+            1: SendResult(1, True, 1),
+            2: SendResult(2, False, 3, "Flood control", retryable=True),
+            3: SendResult(3, False, 1, "Forbidden: bot was blocked by the user"),
+        },
+    )
+
+    assert (claimed, claimed_again) == (3, 0)
+    assert messages[1].status == OutboxStatus.SENT.value
+    assert messages[1].sent_at is not None
+
+    assert messages[2].status == OutboxStatus.PENDING.value
+    assert messages[2].attempts == 1
+    assert messages[2].last_error == "Flood control"
+    assert messages[2].next_attempt_at > datetime.datetime.now()
+
+    assert messages[3].status == OutboxStatus.DEAD.value
+    assert messages[3].last_error.startswith("Forbidden")
+
+
+def test_retryable_delivery_is_dead_after_max_attempts(tmp_path):
+    _, _, messages = run_batch(
+        tmp_path,
+        {1: SendResult(1, False, 3, "Bad Gateway", retryable=True)},
+        max_attempts=1,
+    )
+
+    assert messages[1].status == OutboxStatus.DEAD.value
+    assert messages[1].attempts == 1
+
+
+def test_claim_is_kept_while_sending(tmp_path):
+    lock_for = datetime.timedelta(seconds=0.3)
+
+    async def main():
+        engine, session_pool = await create_session_pool(tmp_path)
+        async with session_pool() as session:
+            await RequestsRepo(session).outbox.enqueue([1], "Report")
+
+        # The send outlasts the claim several times, like a long flood wait
+        slow = OutboxWorker(
+            session_pool,
+            bot=None,
+            lock_for=lock_for,
+            broadcaster=FakeBroadcaster({1: SendResult(1, True, 1)}, delay=1.0),
+        )
+        other = OutboxWorker(
+            session_pool, bot=None, lock_for=lock_for, broadcaster=FakeBroadcaster({})
+        )
+
+        sending = asyncio.create_task(slow.process_batch())
+        await asyncio.sleep(0.6)
+        claimed_by_other = await other.process_batch()
+        claimed = await sending
+
+        async with session_pool() as session:
+            message = (await session.execute(select(OutboxMessage))).scalar_one()
+        await engine.dispose()
+        return claimed, claimed_by_other, message
+
+    claimed, claimed_by_other, message = asyncio.run(main())
+
+    assert (claimed, claimed_by_other) == (1, 0)
+    assert message.status == OutboxStatus.SENT.value
+    assert message.attempts == 1
+
+
+def test_lost_claim_records_nothing(tmp_path):
+    async def main():
+        engine, session_pool = await create_session_pool(tmp_path)
+        async with session_pool() as session:
+            repo = RequestsRepo(session)
+            await repo.outbox.enqueue([1], "Report")
+
+            # The first claim expires right away and the delivery is claimed again
+            (first,) = await repo.outbox.claim_due(1, datetime.timedelta(0))
+            first_attempts = first.attempts
+            (second,) = await repo.outbox.claim_due(1, datetime.timedelta(minutes=5))
+
+            outcomes = (
+                await repo.outbox.extend_claim(
+                    first.id, first_attempts, datetime.timedelta(minutes=5)
+                ),
+                await repo.outbox.mark_sent(first.id, first_attempts),
+                await repo.outbox.mark_failed(first.id, first_attempts, "Late", None),
+                await repo.outbox.mark_sent(second.id, second.attempts),
+            )
+        await engine.dispose()
+        return outcomes
+
+    assert asyncio.run(main()) == (False, False, False, True)
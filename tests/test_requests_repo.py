@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from infrastructure.database.models import Base
+from infrastructure.database.repo.requests import LazyRequestsRepo, RequestsRepo
+
+USER = {"user_id": 1, "username": "admin", "full_name": "Admin", "language": "ru"}
+
+
+def run(tmp_path, scenario) -> list[str]:
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'repo.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_pool = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        done: list[str] = []
+        await scenario(session_pool, done)
+        await engine.dispose()
+        return done
+
+    return asyncio.run(main())
+
+
+def test_callbacks_run_after_the_commit(tmp_path):
+    async def scenario(session_pool, done):
+        repo = LazyRequestsRepo(session_pool, unit_of_work=True)
+        await repo.users.upsert_users([USER])
+        repo.after_commit(lambda: done.append("cache updated"))
+        assert done == []
+
+        await repo.commit_unit_of_work()
+        await repo.close()
+        async with session_pool() as session:
+            assert await RequestsRepo(session).users.get_user_by_id(1)
+
+    assert run(tmp_path, scenario) == ["cache updated"]
+
+
+def test_callbacks_are_dropped_on_rollback(tmp_path):
+    async def scenario(session_pool, done):
+        repo = LazyRequestsRepo(session_pool, unit_of_work=True)
+        await repo.users.upsert_users([USER])
+        repo.after_commit(lambda: done.append("cache updated"))
+
+        await repo.session.rollback()
+        await repo.commit_unit_of_work()
+        await repo.close()
+
+    assert run(tmp_path, scenario) == []
+
+
+def test_failing_callback_doesnt_stop_the_others(tmp_path):
+    async def scenario(session_pool, done):
+        repo = LazyRequestsRepo(session_pool, unit_of_work=True)
+        await repo.users.upsert_users([USER])
+        repo.after_commit(lambda: 1 / 0)
+        repo.after_commit(lambda: done.append("cache updated"))
+
+        await repo.commit_unit_of_work()
+        await repo.close()
+
+    assert run(tmp_path, scenario) == ["cache updated"]
+
+
+def test_callback_runs_at_once_without_unit_of_work(tmp_path):
+    async def scenario(session_pool, done):
+        async with session_pool() as session:
+            repo = RequestsRepo(session)
+            await repo.users.upsert_users([USER])
+            repo.after_commit(lambda: done.append("cache updated"))
+
+    assert run(tmp_path, scenario) == ["cache updated"]
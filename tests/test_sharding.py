@@ -0,0 +1,76 @@
+import asyncio
+import queue
+
+from tgbot.services.sharding import (
+    ChatAffineDispatcher,
+    serve_updates,
+    shard_for,
+    update_chat_id,
+)
+
+
+def message(chat_id: int, user_id: int = 1) -> dict:
+    return {
+        "message_id": 1,
+        "chat": {"id": chat_id, "type": "group"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Admin"},
+    }
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.updates = []
+
+    async def feed_raw_update(self, bot, update: dict):
+        self.updates.append(update["update_id"])
+
+
+def test_update_chat_id():
+    assert update_chat_id({"update_id": 1, "message": message(-100, 7)}) == -100
+    assert (
+        update_chat_id(
+            {
+                "update_id": 2,
+                "callback_query": {
+                    "id": "1",
+                    "from": {"id": 7},
+                    "message": message(-200),
+                },
+            }
+        )
+        == -200
+    )
+    assert update_chat_id({"update_id": 3, "inline_query": {"from": {"id": 7}}}) == 7
+    assert update_chat_id({"update_id": 4}) == 0
+
+
+def test_shard_for_spreads_chats_and_keeps_them_put():
+    shards = [shard_for(chat_id, 4) for chat_id in range(-8, 8)]
+    assert set(shards) == {0, 1, 2, 3}
+    assert shards == [shard_for(chat_id, 4) for chat_id in range(-8, 8)]
+
+
+def test_route_sends_a_chat_to_one_worker():
+    dispatcher = ChatAffineDispatcher(factory=None, workers=3)
+    dispatcher.queues = [queue.Queue() for _ in range(3)]
+
+    for update_id, chat_id in enumerate([5, 6, 5, 7, 5]):
+        dispatcher.route({"update_id": update_id, "message": message(chat_id)})
+
+    routed = [list(updates.queue) for updates in dispatcher.queues]
+    assert [update["update_id"] for update in routed[shard_for(5, 3)]] == [0, 2, 4]
+    assert dispatcher.routed == [len(updates) for updates in routed]
+    assert sum(dispatcher.routed) == 5
+
+
+def test_serve_updates_handles_queued_updates_until_none():
+    updates = queue.Queue()
+    for update_id in range(5):
+        updates.put({"update_id": update_id})
+    updates.put(None)
+    dp = RecordingDispatcher()
+
+    handled = asyncio.run(serve_updates(None, dp, updates))
+
+    assert handled == 5
+    assert dp.updates == [0, 1, 2, 3, 4]
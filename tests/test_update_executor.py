@@ -0,0 +1,212 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from tgbot.middlewares.update_executor import UpdateExecutorMiddleware
+from tgbot.services.update_executor import UpdateExecutor
+
+
+def make_update(update_id: int, chat_id: int, media_group_id: str | None = None) -> Update:
+    message = {
+        "message_id": update_id,
+        "date": 0,
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "Admin"},
+        "text": f"update {update_id}",
+    }
+    if media_group_id is not None:
+        message["media_group_id"] = media_group_id
+    return Update.model_validate({"update_id": update_id, "message": message})
+
+
+def test_jobs_of_a_chat_run_in_order():
+    async def main():
+        executor = UpdateExecutor()
+        done = []
+
+        async def job(index: int):
+            # Earlier jobs take longer, so running them at once would reverse the order
+            await asyncio.sleep(0.01 * (5 - index))
+            done.append(index)
+
+        for index in range(5):
+            executor.submit(1, lambda index=index: job(index))
+        await executor.close()
+        return done, executor
+
+    done, executor = asyncio.run(main())
+    assert done == [0, 1, 2, 3, 4]
+    assert executor.chats == {}
+
+
+def test_chats_run_concurrently_up_to_the_cap():
+    async def main():
+        executor = UpdateExecutor(max_concurrency=3)
+        running = most = 0
+
+        async def job():
+            nonlocal running, most
+            running += 1
+            most = max(most, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        for chat_id in range(10):
+            executor.submit(chat_id, job)
+        await executor.close()
+        return most, executor.stats
+
+    most, stats = asyncio.run(main())
+    assert most == 3
+    assert stats["submitted_total"] == 10
+    assert stats["pending"] == 0
+
+
+def test_album_part_joins_running_job_ahead_of_queued_jobs():
+    async def main():
+        executor = UpdateExecutor()
+        first_part_done = asyncio.Event()
+        started = []
+
+        async def first_part():
+            started.append("part 1")
+            await first_part_done.wait()
+
+        async def job(name: str):
+            started.append(name)
+
+        executor.submit(1, first_part, group="album")
+        await asyncio.sleep(0)
+        executor.submit(1, lambda: job("text"))
+        executor.submit(1, lambda: job("part 2"), group="album")
+        await asyncio.sleep(0.01)
+        joined = list(started)
+
+        first_part_done.set()
+        await executor.close()
+        return joined, started
+
+    joined, started = asyncio.run(main())
+    assert joined == ["part 1", "part 2"]
+    assert started == ["part 1", "part 2", "text"]
+
+
+def test_queued_album_parts_start_together():
+    async def main():
+        executor = UpdateExecutor()
+        text_done = asyncio.Event()
+        started = []
+
+        async def text():
+            started.append("text 1")
+            await text_done.wait()
+
+        async def job(name: str):
+            started.append(name)
+            await asyncio.sleep(0.01)
+
+        executor.submit(1, text)
+        executor.submit(1, lambda: job("part 1"), group="album")
+        executor.submit(1, lambda: job("text 2"))
+        executor.submit(1, lambda: job("part 2"), group="album")
+        await asyncio.sleep(0.01)
+
+        text_done.set()
+        await executor.close()
+        return started
+
+    assert asyncio.run(main()) == ["text 1", "part 1", "part 2", "text 2"]
+
+
+def test_wait_for_room_blocks_until_jobs_start():
+    async def main():
+        executor = UpdateExecutor(max_concurrency=1, max_pending=2)
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        for _ in range(3):
+            executor.submit(1, job)
+        waiter = asyncio.create_task(executor.wait_for_room())
+        await asyncio.sleep(0.01)
+        blocked = not waiter.done()
+
+        release.set()
+        await asyncio.wait_for(waiter, 1)
+        await executor.close()
+        return blocked, executor.stats
+
+    blocked, stats = asyncio.run(main())
+    assert blocked
+    assert stats["pending_max"] == 3
+
+
+def test_close_drains_queued_jobs():
+    async def main():
+        executor = UpdateExecutor(max_concurrency=2)
+        done = []
+
+        async def job(index: int):
+            await asyncio.sleep(0.01)
+            done.append(index)
+
+        for index in range(6):
+            executor.submit(index % 2, lambda index=index: job(index))
+        await executor.close()
+        return done
+
+    assert sorted(asyncio.run(main())) == list(range(6))
+
+
+def test_failed_job_doesnt_stop_the_chat():
+    async def main():
+        executor = UpdateExecutor()
+        done = []
+
+        async def fail():
+            raise RuntimeError("handler failed")
+
+        async def job():
+            done.append("after")
+
+        executor.submit(1, fail)
+        executor.submit(1, job)
+        await executor.close()
+        return done, executor.stats
+
+    done, stats = asyncio.run(main())
+    assert done == ["after"]
+    assert stats["failed_total"] == 1
+
+
+def test_middleware_is_first_and_keeps_chat_order():
+    async def main():
+        bot = Bot("42:TEST")
+        dp = Dispatcher()
+        executor = UpdateExecutor()
+        middleware = UpdateExecutorMiddleware(executor)
+        middleware.setup(dp)
+        handled = []
+
+        @dp.message()
+        async def handler(message):
+            # The first update of a chat takes the longest
+            await asyncio.sleep(0.02 if message.message_id == 1 else 0)
+            handled.append((message.chat.id, message.message_id))
+
+        for update in (make_update(1, 10), make_update(2, 20), make_update(3, 10)):
+            # Returns once the update is queued, not handled
+            await dp.feed_update(bot, update)
+        queued = list(handled)
+
+        await executor.close()
+        await bot.session.close()
+        return dp.update.outer_middleware[0] is middleware, queued, handled
+
+    first, queued, handled = asyncio.run(main())
+    assert first
+    assert queued == []
+    assert [key for key in handled if key[0] == 10] == [(10, 1), (10, 3)]
+    assert handled[0] == (20, 2)
@@ -0,0 +1,62 @@
+import asyncio
+
+from tgbot.services.user_cache import MAX_FLUSH_ATTEMPTS, UserProfileCache
+
+
+class FailingUserCache(UserProfileCache):
+    """
+    Writes profiles to a dict instead of the database; batches with a bad user fail.
+    """
+
+    def __init__(self, bad_user_ids: set[int]):
+        super().__init__(session_pool=None)
+        self.bad_user_ids = bad_user_ids
+        self.written: dict[int, dict] = {}
+
+    async def _upsert(self, batch: dict[int, dict]):
+        if self.bad_user_ids & batch.keys():
+            raise ValueError("Data too long for column 'full_name'")
+        self.written.update(batch)
+
+
+def queue(cache: UserProfileCache, *user_ids: int):
+    for user_id in user_ids:
+        cache.pending[user_id] = {"user_id": user_id, "full_name": f"User {user_id}"}
+
+
+def test_failing_profile_doesnt_hold_back_the_others():
+    cache = FailingUserCache(bad_user_ids={2})
+    queue(cache, 1, 2, 3)
+
+    asyncio.run(cache.flush())
+
+    assert sorted(cache.written) == [1, 3]
+    assert list(cache.pending) == [2]
+    assert cache.failures == {2: 1}
+
+
+def test_failing_profile_is_dropped_after_max_attempts():
+    cache = FailingUserCache(bad_user_ids={2})
+    queue(cache, 2)
+
+    async def main():
+        for _ in range(MAX_FLUSH_ATTEMPTS + 1):
+            await cache.flush()
+
+    asyncio.run(main())
+
+    assert cache.pending == {}
+    assert cache.failures == {}
+    assert cache.dropped_total == 1
+
+
+def test_profile_written_after_a_failure_is_forgiven():
+    cache = FailingUserCache(bad_user_ids={2})
+    queue(cache, 2)
+    asyncio.run(cache.flush())
+
+    cache.bad_user_ids.clear()
+    asyncio.run(cache.flush())
+
+    assert list(cache.written) == [2]
+    assert cache.failures == {}
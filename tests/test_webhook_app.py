@@ -0,0 +1,124 @@
+import asyncio
+import importlib
+
+import pytest
+from aiogram import Dispatcher
+
+from bot import serve_webhook
+from tgbot.config import Config, TgBot, WebhookConfig
+
+
+def config(workers: int) -> Config:
+    return Config(
+        tg_bot=TgBot(
+            token="42:TEST",
+            admin_ids=[],
+            proxy_url="",
+            use_redis=False,
+            console_log_level="INFO",
+            workers=workers,
+        ),
+        db=None,
+        redis=None,
+        webhook=WebhookConfig(url="https://example.com", secret="secret"),
+        misc=None,
+    )
+
+
+def test_module_builds_no_app_on_import(monkeypatch):
+    # Without a .env, loading the configuration at import time would fail
+    monkeypatch.chdir("/")
+    module = importlib.reload(importlib.import_module("infrastructure.api.app"))
+
+    assert not hasattr(module, "app")
+    assert callable(module.create_app_from_env)
+
+
+def test_webhook_refuses_worker_processes():
+    with pytest.raises(ValueError, match="BOT_WORKERS"):
+        asyncio.run(serve_webhook(config(workers=2)))
+
+
+@pytest.mark.parametrize("register_webhook", [True, False])
+def test_outbox_runs_only_in_the_registering_process(monkeypatch, register_webhook):
+    from infrastructure.api import app as app_module
+
+    created = {}
+
+    def create_dispatcher(config, bot, session_pool=None, run_outbox=True):
+        created["run_outbox"] = run_outbox
+        return Dispatcher()
+
+    async def nothing(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(app_module, "create_dispatcher", create_dispatcher)
+    monkeypatch.setattr(app_module, "set_webhook", nothing)
+    monkeypatch.setattr(app_module, "on_startup", nothing)
+    monkeypatch.setattr(app_module, "on_down", nothing)
+
+    async def main():
+        app = app_module.create_app(config(workers=1), register_webhook)
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(main())
+    assert created["run_outbox"] is register_webhook
+
+
+async def post(app, headers: list[tuple[bytes, bytes]], body: bytes) -> int:
+    """
+    Posts to the webhook path through the ASGI interface, returns the status.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": "/webhook",
+        "raw_path": b"/webhook",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("127.0.0.1", 1),
+        "server": ("127.0.0.1", 443),
+        "app": app,
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return next(m["status"] for m in sent if m["type"] == "http.response.start")
+
+
+@pytest.mark.parametrize(
+    "secret, body, status",
+    [
+        ("секрет".encode(), b'{"update_id": 1}', 403),
+        (b"wrong", b'{"update_id": 1}', 403),
+        (b"secret", b"not json", 400),
+        (b"secret", b'{"message": 1}', 400),
+        (b"secret", b'{"update_id": 1}', 200),
+    ],
+)
+def test_webhook_rejects_bad_requests_without_errors(monkeypatch, secret, body, status):
+    from infrastructure.api import app as app_module
+
+    monkeypatch.setattr(
+        app_module, "create_dispatcher", lambda *args, **kwargs: Dispatcher()
+    )
+
+    async def main():
+        app = app_module.create_app(config(workers=1))
+        async with app.router.lifespan_context(app):
+            return await post(
+                app, [(b"x-telegram-bot-api-secret-token", secret)], body
+            )
+
+    assert asyncio.run(main()) == status
@@ -39,8 +39,13 @@ class DbConfig:
     ) -> str:
         """
         Constructs and returns a SQLAlchemy URL for this database configuration.
+        For SQLite the database is the path of the file, host and credentials are unused.
         """
 
+        if dialect == "sqlite":
+            uri = URL.create(drivername=f"{dialect}+{driver}", database=self.database)
+            return uri.render_as_string(hide_password=False)
+
         if not host:
             host = self.host
         if not port:
@@ -90,6 +95,17 @@ class TgBot:
     proxy_url: str
     use_redis: bool
     console_log_level: str
+    # Seconds without new parts after which a media group is complete, and its upper bound
+    album_quiet_window: float = 0.3
+    album_max_wait: float = 2.0
+    # Report steps edit one inline-keyboard message instead of sending new prompts
+    report_wizard: bool = False
+    # Processes handling updates when polling; updates are routed to them by chat
+    workers: int = 1
+    # Updates handled at once in a process, those of one chat always one by one
+    update_concurrency: int = 32
+    # Bot API server instead of api.telegram.org, e.g. a local or a fake one
+    api_server_url: str | None = None
 
     @staticmethod
     def from_env(env: Env):
@@ -105,12 +121,24 @@ class TgBot:
         #     env.list("ADMINS")
         # ))
         use_redis = env.bool("USE_REDIS")
+        album_quiet_window = env.float("ALBUM_QUIET_WINDOW", 0.3)
+        album_max_wait = env.float("ALBUM_MAX_WAIT", 2.0)
+        report_wizard = env.bool("REPORT_WIZARD", False)
+        workers = env.int("BOT_WORKERS", 1)
+        update_concurrency = env.int("UPDATE_CONCURRENCY", 32)
+        api_server_url = env.str("BOT_API_SERVER_URL", None)
         return TgBot(
             token=token,
             admin_ids=admin_ids,
             proxy_url=proxy_url,
             use_redis=use_redis,
             console_log_level=console_log_level,
+            album_quiet_window=album_quiet_window,
+            album_max_wait=album_max_wait,
+            report_wizard=report_wizard,
+            workers=workers,
+            update_concurrency=update_concurrency,
+            api_server_url=api_server_url,
         )
 
 
@@ -127,32 +155,161 @@ class RedisConfig:
         The port where Redis server is listening.
     redis_host : Optional(str)
         The host where Redis server is located.
+    redis_db : int
+        The number of the Redis database (default is 0).
+    state_ttl : Optional(int)
+        Seconds an FSM state is kept after its last change, None to keep it forever.
+    data_ttl : Optional(int)
+        Seconds FSM data (report drafts) is kept after its last change, None to keep it forever.
     """
 
     redis_pass: Optional[str]
     redis_port: Optional[int]
     redis_host: Optional[str]
+    redis_db: int = 0
+    state_ttl: Optional[int] = None
+    data_ttl: Optional[int] = None
 
     def dsn(self) -> str:
         """
         Constructs and returns a Redis DSN (Data Source Name) for this database configuration.
         """
         if self.redis_pass:
-            return f"redis://:{self.redis_pass}@{self.redis_host}:{self.redis_port}/0"
+            return f"redis://:{self.redis_pass}@{self.redis_host}:{self.redis_port}/{self.redis_db}"
         else:
-            return f"redis://{self.redis_host}:{self.redis_port}/0"
+            return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
     @staticmethod
     def from_env(env: Env):
         """
         Creates the RedisConfig object from environment variables.
         """
-        redis_pass = env.str("REDIS_PASSWORD")
-        redis_port = env.int("REDIS_PORT")
-        redis_host = env.str("REDIS_HOST")
+        redis_pass = env.str("REDIS_PASSWORD", None)
+        redis_port = env.int("REDIS_PORT", 6379)
+        redis_host = env.str("REDIS_HOST", "localhost")
+        redis_db = env.int("REDIS_DB", 0)
+        # Unfinished report drafts expire in two days by default
+        state_ttl = env.int("REDIS_STATE_TTL", 172800) or None
+        data_ttl = env.int("REDIS_DATA_TTL", 172800) or None
 
         return RedisConfig(
-            redis_pass=redis_pass, redis_port=redis_port, redis_host=redis_host
+            redis_pass=redis_pass,
+            redis_port=redis_port,
+            redis_host=redis_host,
+            redis_db=redis_db,
+            state_ttl=state_ttl,
+            data_ttl=data_ttl,
+        )
+
+
+@dataclass
+class WebhookConfig:
+    """
+    Webhook configuration class.
+
+    Attributes
+    ----------
+    url : str
+        Public base URL of the bot, e.g. https://example.com.
+    secret : str
+        Secret token Telegram sends with every update, in the X-Telegram-Bot-Api-Secret-Token header.
+    path : str
+        Path of the webhook endpoint (default is /webhook).
+    host : str
+        Host the webhook server listens on (default is 0.0.0.0).
+    port : int
+        Port the webhook server listens on (default is 8000).
+    """
+
+    url: str
+    secret: str
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 8000
+
+    @property
+    def webhook_url(self) -> str:
+        return self.url.rstrip("/") + self.path
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the WebhookConfig object from environment variables.
+        """
+        url = env.str("WEBHOOK_URL")
+        secret = env.str("WEBHOOK_SECRET")
+        path = env.str("WEBHOOK_PATH", "/webhook")
+        host = env.str("WEBHOOK_HOST", "0.0.0.0")
+        port = env.int("WEBHOOK_PORT", 8000)
+
+        return WebhookConfig(url=url, secret=secret, path=path, host=host, port=port)
+
+
+@dataclass
+class MetricsConfig:
+    """
+    Metrics configuration class.
+
+    Attributes
+    ----------
+    port : int
+        Port /metrics is served on in polling mode; worker N of BOT_WORKERS uses port + N.
+        The webhook app serves /metrics on its own port.
+    host : str
+        Host the metrics server listens on (default is 0.0.0.0).
+    """
+
+    port: int
+    host: str = "0.0.0.0"
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the MetricsConfig object from environment variables.
+        """
+        port = env.int("METRICS_PORT")
+        host = env.str("METRICS_HOST", "0.0.0.0")
+
+        return MetricsConfig(port=port, host=host)
+
+
+@dataclass
+class TracingConfig:
+    """
+    Tracing configuration class.
+
+    Attributes
+    ----------
+    file : str, optional
+        File spans are appended to as OTLP/JSON lines (default is None).
+    otlp_endpoint : str, optional
+        OTLP/HTTP endpoint spans are sent to, e.g. http://collector:4318 (default is None).
+    sample_rate : float
+        Share of updates traced, from 0 to 1 (default is 1.0).
+    service_name : str
+        Service name of the spans (default is cirulnik_admin_bot).
+    """
+
+    file: str | None = None
+    otlp_endpoint: str | None = None
+    sample_rate: float = 1.0
+    service_name: str = "cirulnik_admin_bot"
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the TracingConfig object from environment variables.
+        """
+        file = env.str("TRACING_FILE", None)
+        otlp_endpoint = env.str("TRACING_OTLP_ENDPOINT", None)
+        sample_rate = env.float("TRACING_SAMPLE_RATE", 1.0)
+        service_name = env.str("TRACING_SERVICE_NAME", "cirulnik_admin_bot")
+
+        return TracingConfig(
+            file=file,
+            otlp_endpoint=otlp_endpoint,
+            sample_rate=sample_rate,
+            service_name=service_name,
         )
 
 
@@ -198,12 +355,21 @@ class Config:
         Holds the settings specific to the database (default is None).
     redis : Optional[RedisConfig]
         Holds the settings specific to Redis (default is None).
+    webhook : Optional[WebhookConfig]
+        Holds the webhook settings, None to get updates by polling (default is None).
+    metrics : Optional[MetricsConfig]
+        Holds the metrics settings, None to collect no metrics (default is None).
+    tracing : Optional[TracingConfig]
+        Holds the tracing settings, None to trace nothing (default is None).
     """
 
     tg_bot: TgBot
     misc: Miscellaneous
     db: Optional[DbConfig] = None
     redis: Optional[RedisConfig] = None
+    webhook: Optional[WebhookConfig] = None
+    metrics: Optional[MetricsConfig] = None
+    tracing: Optional[TracingConfig] = None
 
 
 def load_config(path: str | None = None) -> Config:
@@ -219,9 +385,18 @@ def load_config(path: str | None = None) -> Config:
     env = Env()
     env.read_env(path)
 
+    tg_bot = TgBot.from_env(env)
+
     return Config(
-        tg_bot=TgBot.from_env(env),
+        tg_bot=tg_bot,
         db=DbConfig.from_env(env),
-        # redis=RedisConfig.from_env(env),
+        redis=RedisConfig.from_env(env) if tg_bot.use_redis else None,
+        webhook=WebhookConfig.from_env(env) if env.str("WEBHOOK_URL", None) else None,
+        metrics=MetricsConfig.from_env(env) if env.str("METRICS_PORT", None) else None,
+        tracing=(
+            TracingConfig.from_env(env)
+            if env.str("TRACING_FILE", None) or env.str("TRACING_OTLP_ENDPOINT", None)
+            else None
+        ),
         misc=Miscellaneous.from_env(env),
     )
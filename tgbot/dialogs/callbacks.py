@@ -1,3 +1,5 @@
+from functools import partial
+
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from aiogram.utils.formatting import as_key_value, as_marked_list, as_section
@@ -9,6 +11,9 @@ from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.dialogs.states import ActionSelectionStates, UsersMenuStates
 from tgbot.keyboards.reply import admin_menu_keyboard
 from tgbot.messages.handlers_msg import DatabaseHandlerMessages, UserHandlerMessages
+from tgbot.models.report_draft import message_ref
+from tgbot.services.cache_sync import CacheSync
+from tgbot.services.locations_catalog import LocationCatalog
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +31,7 @@ async def set_prev_message(
     answer = await callback_query.message.answer(
         UserHandlerMessages.CANCEL, reply_markup=admin_menu_keyboard()
     )
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
 
 
 async def selected_user(
@@ -63,6 +68,10 @@ async def user_deletion(
     if isinstance(callback_query.message, Message) and user_id:
         try:
             user = await repo.users.del_user_by_id(user_id)
+            # Caches forget the user once the deletion is committed
+            cache_sync: CacheSync = middleware_data["cache_sync"]
+            repo.after_commit(partial(cache_sync.remove_user, user_id))
+            await repo.commit_unit_of_work()
             text = as_section(
                 DatabaseHandlerMessages.SUCCESSFUL_UPDATING.value,
                 as_marked_list(
@@ -114,11 +123,17 @@ async def selected_location(
         await dialog_manager.done()
         return
 
-    location = await repo.locations.get_location_by_id(location_id)
+    location_catalog: LocationCatalog = middleware_data["location_catalog"]
+    location = await location_catalog.get(location_id)
     if isinstance(callback_query.message, Message) and all([user_id, location_id]):
         if location:
             try:
                 await repo.users.del_user_location(user_id, location_id)
+                cache_sync: CacheSync = middleware_data["cache_sync"]
+                repo.after_commit(
+                    partial(cache_sync.remove_access, user_id, location_id)
+                )
+                await repo.commit_unit_of_work()
                 text = as_section(
                     DatabaseHandlerMessages.SUCCESSFUL_UPDATING.value,
                     as_marked_list(
@@ -151,5 +166,5 @@ async def action_done(
     answer = await callback_query.message.answer(
         UserHandlerMessages.COMPLETED, reply_markup=admin_menu_keyboard()
     )
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
     await dialog_manager.done()
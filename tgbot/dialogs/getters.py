@@ -1,6 +1,8 @@
 from aiogram_dialog import DialogManager
 
 from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.locations_catalog import LocationCatalog
 
 
 async def get_users(dialog_manager: DialogManager, repo: RequestsRepo, **kwargs):
@@ -21,9 +23,17 @@ async def get_selected_user(dialog_manager: DialogManager, repo: RequestsRepo, *
     return {"user_id": user_id}
 
 async def get_user_locations(
-    dialog_manager: DialogManager, repo: RequestsRepo, **kwargs
+    dialog_manager: DialogManager,
+    access_index: AccessIndex,
+    location_catalog: LocationCatalog,
+    **kwargs,
 ):
     user_id = dialog_manager.start_data["user_id"]
-    locations = await repo.users.get_all_user_locations_relationships(user_id)
+    location_ids = await access_index.locations_for(user_id)
+    locations = [
+        location
+        for location in await location_catalog.get_all()
+        if location.location_id in location_ids
+    ]
 
     return {"locations": (locations)}
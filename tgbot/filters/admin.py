@@ -1,11 +1,11 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
 
-from tgbot.config import Config
+from tgbot.services.roles import Role
 
 
 class AdminFilter(BaseFilter):
     is_admin: bool = True
 
-    async def __call__(self, obj: Message, config: Config) -> bool:
-        return (obj.from_user.id in config.tg_bot.admin_ids) == self.is_admin
+    async def __call__(self, obj: Message, role: Role = Role.REGULAR) -> bool:
+        return (Role.ADMIN in role) == self.is_admin
@@ -4,10 +4,15 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InaccessibleMessage, Message
 from betterlogging import logging
 
+from infrastructure.database.models.outbox import OutboxStatus
+from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.filters.admin import AdminFilter
 from tgbot.keyboards.reply import admin_menu_keyboard
 from tgbot.messages.handlers_msg import AdminHandlerMessages
 from tgbot.misc.states import CommonStates
+from tgbot.models.report_draft import message_ref
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_prev_message
 
 logger = logging.getLogger(__name__)
@@ -27,7 +32,7 @@ async def admin_start(
         message = event
     else:
         message = event.message
-    await delete_prev_message(state)
+    await delete_prev_message(state, event.bot)
 
     await state.set_state(CommonStates.authorized)
     await state.update_data(
@@ -35,7 +40,7 @@ async def admin_start(
     ) if event.from_user else ...
 
     if message and not isinstance(message, InaccessibleMessage):
-        await message.delete()
+        delete_later(message.bot, [message])
         if db_error:
             answer = await message.answer(
                 "\n".join([AdminHandlerMessages.ERROR, "Database:", str(db_error)])
@@ -46,8 +51,8 @@ async def admin_start(
                 AdminHandlerMessages.GREETINGS, reply_markup=admin_menu_keyboard()
             )
 
-        await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {str(db_error)}")
+        await state.update_data(prev_bot_message=message_ref(answer))
+    await log_state(logger, state, f"Database error: {db_error}, state:", data=False)
 
 
 @admin_router.message(Command("stop"))
@@ -55,3 +60,26 @@ async def stop_bot(message: Message):
     await message.answer(AdminHandlerMessages.STOPPING)
     await message.delete()
     exit()
+
+
+@admin_router.message(Command("outbox"))
+async def outbox_status(message: Message, repo: RequestsRepo | None = None):
+    delete_later(message.bot, [message])
+    if repo is None:
+        await message.answer(AdminHandlerMessages.OUTBOX_UNAVAILABLE)
+        return
+
+    counts = await repo.outbox.get_status_counts()
+    stuck = await repo.outbox.get_stuck()
+
+    lines = [AdminHandlerMessages.OUTBOX_STATUS]
+    lines += [f"{status.value}: {counts.get(status.value, 0)}" for status in OutboxStatus]
+    if stuck:
+        lines += ["", AdminHandlerMessages.OUTBOX_STUCK]
+        lines += [
+            f"#{delivery.id} -> {delivery.chat_id}, {delivery.status}, "
+            f"attempts: {delivery.attempts}, error: {delivery.last_error}"
+            for delivery in stuck
+        ]
+
+    await message.answer("\n".join(lines))
@@ -7,6 +7,9 @@ from tgbot.filters.owner import OwnerFilter
 from tgbot.keyboards.reply import NavButtons, admin_menu_keyboard
 from tgbot.messages.handlers_msg import UserHandlerMessages
 from tgbot.misc.states import CommonStates
+from tgbot.models.report_draft import message_ref
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_location_message, delete_prev_message
 
 logger = logging.getLogger(__name__)
@@ -17,9 +20,9 @@ admin_nav_buttons_router.message.filter(AdminFilter() or OwnerFilter())
 
 @admin_nav_buttons_router.message(F.text.in_(NavButtons.BTN_CANCEL))
 async def btn_cancel(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
-    await delete_location_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
+    await delete_location_message(state, message.bot)
     state_data = await state.get_data()
     await state.clear()
 
@@ -32,6 +35,6 @@ async def btn_cancel(message: types.Message, state: FSMContext):
     answer = await message.answer(
         UserHandlerMessages.CANCEL, reply_markup=admin_menu_keyboard()
     )
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
 
-    logger.debug(f"Back from state: {state} to {await state.get_state()}")
+    await log_state(logger, state, "Back to state:", data=False)
@@ -1,4 +1,5 @@
-import json
+import io
+from functools import partial
 
 from aiogram import Router
 from aiogram.enums import ParseMode
@@ -16,67 +17,104 @@ from tgbot.keyboards.inline import (
 from tgbot.keyboards.reply import admin_menu_keyboard
 from tgbot.messages.handlers_msg import DatabaseHandlerMessages, UserHandlerMessages
 from tgbot.misc.states import AdminStates, CommonStates
-from tgbot.services.utils import delete_prev_message
+from tgbot.models.report_draft import message_ref
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.cache_sync import CacheSync
+from tgbot.services.locations_catalog import LocationCatalog
+from tgbot.services.locations_import import ImportReport, import_locations, read_rows
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
+from tgbot.services.user_cache import UserProfileCache
+from tgbot.services.utils import delete_keyboard_message, delete_prev_message
 
 logger = logging.getLogger(__name__)
 
+# Bot API limits
+MAX_DOCUMENT_SIZE = 20 * 1024 * 1024
+MAX_MESSAGE_LENGTH = 4096
+
 database_locations_router = Router()
 database_locations_router.message.filter(AdminFilter())
 database_locations_router.callback_query.filter(AdminFilter())
 
 
 @database_locations_router.message(Command("loc"))
-async def ask_for_update(message: Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+async def ask_for_update(
+    message: Message,
+    state: FSMContext,
+    repo: RequestsRepo,
+    cache_sync: CacheSync,
+):
+    # Document sent with /loc in the caption is imported right away
+    if message.document:
+        await update_locations(message, state, repo, cache_sync)
+        return
+
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
     answer = await message.answer(DatabaseHandlerMessages.UPDATING_LOCATIONS)
     await state.set_state(AdminStates.updating_locations)
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
 
 
 @database_locations_router.message(AdminStates.updating_locations)
-async def update_locations(message: Message, state: FSMContext, repo: RequestsRepo):
-    await message.delete()
-    await delete_prev_message(state)
-
-    count = 0
-    errors = []
-    if message.text:
-        try:
-            locations = json.loads(message.text)
-            for location in locations:
-                logger.info(f"Location: {location}")
-                try:
-                    await repo.locations.get_or_upsert_location(**location)
-                    count += 1
-                except Exception as e:
-                    errors.append(e)
-                    logger.error(
-                        f"Error updating locations:\n {str(e)} \n{(await state.get_state())}"
-                    )
-        except Exception as e:
-            errors.append(e)
-            logger.error(
-                f"Error JSON parsing:\n {str(e)} \n{(await state.get_state())}"
-            )
-    if message.text is None or errors:
-        answer = await message.answer(
-            "\n".join(
-                [DatabaseHandlerMessages.UNSUCCESSFUL_UPDATING]
-                + [str(e) for e in errors],
-            )
+async def update_locations(
+    message: Message,
+    state: FSMContext,
+    repo: RequestsRepo,
+    cache_sync: CacheSync,
+):
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
+
+    report = ImportReport()
+    try:
+        if message.document:
+            if (message.document.file_size or 0) > MAX_DOCUMENT_SIZE:
+                raise ValueError(DatabaseHandlerMessages.DOCUMENT_TOO_BIG.value)
+            document = await message.bot.download(message.document)
+            rows = read_rows(document, message.document.file_name)
+        elif message.text:
+            rows = read_rows(io.BytesIO(message.text.encode()))
+        else:
+            rows = []
+
+        report = await import_locations(repo, rows)
+        # The catalogs only get the locations once they are committed
+        repo.after_commit(partial(cache_sync.apply_locations, *report.imported))
+        await repo.commit_unit_of_work()
+
+    except Exception as e:
+        await repo.session.rollback()
+        report.imported.clear()
+        report.errors.append((0, str(e)))
+        logger.error(
+            f"Error updating locations:\n {str(e)} \n{(await state.get_state())}"
         )
+
+    logger.info(
+        f"Locations imported: {len(report.imported)}, rejected: {len(report.errors)}"
+    )
+
+    if not report.imported and not report.errors:
+        answer = await message.answer(DatabaseHandlerMessages.UNSUCCESSFUL_UPDATING)
     else:
-        answer = await message.answer(
-            DatabaseHandlerMessages.SUCCESSFUL_UPDATING + str(count)
-        )
+        lines = [DatabaseHandlerMessages.SUCCESSFUL_UPDATING + str(len(report.imported))]
+        if report.errors:
+            lines.append(DatabaseHandlerMessages.UNSUCCESSFUL_UPDATING)
+            lines.extend(
+                DatabaseHandlerMessages.ROW_ERROR.format(row=row, error=error)
+                for row, error in report.errors
+            )
+        text = "\n".join(lines)
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[: MAX_MESSAGE_LENGTH - 1] + "…"
+        answer = await message.answer(text)
 
     await state.clear()
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
 
-    state_data = await state.get_data()
-    logger.debug(f"State data: {state_data}")
-    logger.debug(f"{(await state.get_state())}")
+    await log_state(logger, state)
 
 
 # To filter the callback data, that was created with CallbackData factory, you can use .filter() method
@@ -88,6 +126,10 @@ async def add_location(
     callback_data: UserCallbackData,
     state: FSMContext,
     repo: RequestsRepo,
+    location_catalog: LocationCatalog,
+    access_index: AccessIndex,
+    cache_sync: CacheSync,
+    user_cache: UserProfileCache | None = None,
 ):
     # Firstly, always answer callback query (as Telegram API requires)
     await query.answer()
@@ -100,14 +142,29 @@ async def add_location(
         return
 
     # You can get the data from callback_data object as attributes
-    location = await repo.locations.get_location_by_id(callback_data.location_id)
+    location = await location_catalog.get(callback_data.location_id)
 
     if isinstance(query.message, Message):
         if location:
             try:
-                await repo.users.add_user_location(
+                if not await access_index.has_access(
                     callback_data.user_id, callback_data.location_id
-                )
+                ):
+                    # New users are written behind, the row must exist to refer to it
+                    if user_cache is not None:
+                        await user_cache.flush()
+                    await repo.users.add_user_location(
+                        callback_data.user_id, callback_data.location_id
+                    )
+                    repo.after_commit(
+                        partial(
+                            cache_sync.add_access,
+                            callback_data.user_id,
+                            callback_data.location_id,
+                        )
+                    )
+                    # Committed before the admin is told it's done
+                    await repo.commit_unit_of_work()
                 # Here we use aiogram.utils.formatting to format the text
                 # https://docs.aiogram.dev/en/latest/utils/formatting.html
                 text = as_section(
@@ -133,15 +190,14 @@ async def add_location(
         else:
             await query.message.edit_text("Location not found!")
 
-        state_data = await state.get_data()
         await CommonStates().check_auth(state)
-        keyboard_message: Message | None = state_data.get('keyboard_message')
-        await keyboard_message.delete() if keyboard_message is not None else ...
+        await delete_keyboard_message(state, query.bot)
         keyboard_message = await query.message.answer(
             UserHandlerMessages.COMPLETED, reply_markup=admin_menu_keyboard()
         )
         await state.update_data(
-            keyboard_message=keyboard_message, prev_bot_message=query.message
+            keyboard_message=message_ref(keyboard_message),
+            prev_bot_message=message_ref(query.message),
         )
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
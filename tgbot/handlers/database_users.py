@@ -8,14 +8,15 @@ from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.dialogs.states import UsersMenuStates
 from tgbot.filters.admin import AdminFilter
 from tgbot.filters.owner import OwnerFilter
-from tgbot.keyboards.inline import (
-    UserCallbackData,
-    locations_keyboard,
-    users_update_keyboard,
-)
+from tgbot.keyboards.inline import UserCallbackData, users_update_keyboard
 from tgbot.keyboards.reply import ReplyButtons, cancel_keyboard
 from tgbot.messages.handlers_msg import DatabaseHandlerMessages
 from tgbot.misc.states import AdminStates
+from tgbot.models.report_draft import message_ref
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.locations_catalog import LocationCatalog
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_prev_message
 
 logger = logging.getLogger(__name__)
@@ -29,12 +30,12 @@ database_users_router.callback_query.filter(AdminFilter() or OwnerFilter())
 async def adding_location(
     message: Message,
     state: FSMContext,
-    repo: RequestsRepo,
+    location_catalog: LocationCatalog,
 ):
-    await message.delete()
-    await delete_prev_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
 
-    locations = await repo.locations.get_all_locations()
+    locations = await location_catalog.get_all()
 
     # This method will send an answer to the message with the button, that user pressed
     # Here query - is a CallbackQuery object, which contains message: Message object
@@ -44,17 +45,17 @@ async def adding_location(
         )
         answer = await message.answer(
             DatabaseHandlerMessages.CHOOSE_LOCATION,
-            reply_markup=locations_keyboard(locations),
+            reply_markup=await location_catalog.keyboard(),
         )
     logger.info(f"Locations: {locations}")
 
     await state.set_state(AdminStates.updating_user_location)
     await state.update_data(
-        keyboard_message=keyboard_message,
-        prev_bot_message=answer,
+        keyboard_message=message_ref(keyboard_message),
+        prev_bot_message=message_ref(answer),
     )
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 @database_users_router.callback_query(
@@ -65,8 +66,13 @@ async def updating_location(
     callback_data: UserCallbackData,
     state: FSMContext,
     repo: RequestsRepo,
+    access_index: AccessIndex,
 ):
-    users = await repo.users.get_all_users()
+    # Users who already have access to the location are not offered again
+    granted = await access_index.users_for(callback_data.location_id)
+    users = [
+        user for user in await repo.users.get_all_users() if user.user_id not in granted
+    ]
 
     if isinstance(query.message, Message):
         await query.message.edit_text(
@@ -76,7 +82,7 @@ async def updating_location(
     await state.set_state(AdminStates.adding_user_location)
 
     logger.info(f"Choosen location: {callback_data.location_id}, users: {users}")
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 @database_users_router.message(F.text.in_(ReplyButtons.BTN_UPDATE_USERS))
@@ -85,7 +91,7 @@ async def updating_user(
     state: FSMContext,
     dialog_manager: DialogManager,
 ):
-    await message.delete()
-    await delete_prev_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
 
     await dialog_manager.start(UsersMenuStates.user_selection, mode=StartMode.RESET_STACK)
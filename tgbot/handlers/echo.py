@@ -5,6 +5,8 @@ from aiogram.utils.markdown import hcode
 
 from tgbot.filters.admin import AdminFilter
 from tgbot.messages.bot_msg import EchoMessages
+from tgbot.models.report_draft import message_ref
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_prev_message
 
 
@@ -30,8 +32,8 @@ async def bot_echo_all_admin(message: types.Message, state: FSMContext):
 
 @echo_router.message()
 async def bot_echo(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
     text = [EchoMessages.WRONG, "Message:", message.text]
     answer = await message.answer("\n".join(text if text else ["-- No text --"]))
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
@@ -14,6 +14,9 @@ from tgbot.keyboards.reply import admin_menu_keyboard
 
 from tgbot.messages.handlers_msg import UserHandlerMessages
 from tgbot.misc.states import CommonStates
+from tgbot.models.report_draft import message_ref
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_prev_message
 
 
@@ -34,7 +37,7 @@ async def owner_start(
         message = event
     else:
         message = event.message
-    await delete_prev_message(state)
+    await delete_prev_message(state, event.bot)
 
     await state.set_state(CommonStates.authorized)
     await state.update_data(
@@ -42,7 +45,7 @@ async def owner_start(
     ) if event.from_user else ...
 
     if message and not isinstance(message, InaccessibleMessage):
-        await message.delete()
+        delete_later(message.bot, [message])
         if db_error:
             answer = await message.answer(UserHandlerMessages.ERROR)
 
@@ -51,15 +54,15 @@ async def owner_start(
                 UserHandlerMessages.GREETINGS, reply_markup=admin_menu_keyboard()
             )
 
-        await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {str(db_error)}")
+        await state.update_data(prev_bot_message=message_ref(answer))
+    await log_state(logger, state, f"Database error: {db_error}, state:", data=False)
 
 
 @owner_router.message(Command("help"))
 async def help(message: Message, state: FSMContext):
-    await delete_prev_message(state)
+    await delete_prev_message(state, message.bot)
 
     answer = await message.answer(UserHandlerMessages.HELP)
-    await message.delete()
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    delete_later(message.bot, [message])
+    await state.update_data(prev_bot_message=message_ref(answer))
+    await log_state(logger, state)
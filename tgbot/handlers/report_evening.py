@@ -1,18 +1,16 @@
 from aiogram import F, types, Router
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.types.message import Message
 from betterlogging import logging
 
-from tgbot.keyboards.reply import (
-    NavButtons,
-    nav_keyboard,
-    send_keyboard,
-    excel_keyboard,
-)
+from tgbot.keyboards.inline import NavAction
+from tgbot.keyboards.reply import NavButtons
 from tgbot.messages.handlers_msg import ReportClientsLost, ReportHandlerMessages
 from tgbot.misc.states import ReportMenuStates
-from tgbot.services.utils import delete_prev_message
+from tgbot.models.report_draft import PhotoRef, photo_refs
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
+from tgbot.services.report_wizard import ask, clear_step
 
 
 logger = logging.getLogger(__name__)
@@ -22,8 +20,7 @@ report_evening_router = Router()
 
 @report_evening_router.message(ReportMenuStates.entering_clients_lost)
 async def enter_clients_lost(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
 
     state_data = await state.get_data()
     clients_lost = state_data["clients_lost"] if "clients_lost" in state_data else {}
@@ -35,19 +32,16 @@ async def enter_clients_lost(message: types.Message, state: FSMContext):
             await state.update_data(clients_lost=clients_lost)
 
             if i + 1 < len(list_of_masters_types):
-                answer = await message.answer(
+                await ask(
+                    message,
+                    state,
                     ReportHandlerMessages.CLIENTS_LOST + list_of_masters_types[i + 1],
-                    reply_markup=nav_keyboard(),
                 )
-                await state.update_data(prev_bot_message=answer)
 
                 break
     else:
         await state.set_state(ReportMenuStates.entering_total_clients)
-        answer = await message.answer(
-            ReportHandlerMessages.TOTAL_CLIENTS, reply_markup=nav_keyboard()
-        )
-        await state.update_data(prev_bot_message=answer)
+        await ask(message, state, ReportHandlerMessages.TOTAL_CLIENTS)
 
     state_data = await state.get_data()
     logger.debug(
@@ -55,22 +49,22 @@ async def enter_clients_lost(message: types.Message, state: FSMContext):
         if "clients_lost" in state_data
         else None
     )
-    logger.debug(f"{(await state.get_state())}")
+    await log_state(logger, state, data=False)
 
 
 @report_evening_router.message(ReportMenuStates.entering_total_clients)
 async def enter_total_clients(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(total_clients=message.text)
     await state.set_state(ReportMenuStates.uploading_daily_excel)
-    answer = await message.answer(
+    await ask(
+        message,
+        state,
         ReportHandlerMessages.DAILY_EXCEL,
-        reply_markup=excel_keyboard(),
+        NavAction.NEXT,
         parse_mode="Markdown",
     )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await log_state(logger, state)
 
 
 @report_evening_router.message(
@@ -85,19 +79,16 @@ async def upload_daily_excel(
     excel_photos: list = (
         state_data["daily_excel"] if "daily_excel" in state_data else []
     )
-    logger.debug(f"{await state.get_state()}, excel photos: {len(excel_photos)}")
+    await log_state(
+        logger, state, f"Excel photos: {len(excel_photos)}, state:", data=False
+    )
 
     if (
         message.text in (NavButtons.BTN_NEXT, NavButtons.BTN_BACK)
         and len(excel_photos) > 1
     ):
-        await delete_prev_message(state)
-        await message.delete()
-        for msg in excel_photos:
-            try:
-                await msg.delete()
-            except TelegramBadRequest as e:
-                logger.warning(e.message)
+        await clear_step(message, state)
+        delete_later(message.bot, map(PhotoRef.load, excel_photos))
 
         has_solarium = state_data.get('has_solarium')
         logger.debug(
@@ -106,24 +97,16 @@ async def upload_daily_excel(
 
         if has_solarium:
             await state.set_state(ReportMenuStates.uploading_solarium_counter)
-            answer = await message.answer(
-                ReportHandlerMessages.UPLOAD_SOLARIUM_COUNTER,
-                reply_markup=nav_keyboard(),
-            )
+            await ask(message, state, ReportHandlerMessages.UPLOAD_SOLARIUM_COUNTER)
         else:
             await state.set_state(ReportMenuStates.uploading_z_report)
-            answer = await message.answer(
-                ReportHandlerMessages.Z_REPORT, reply_markup=nav_keyboard()
-            )
-        await state.update_data(prev_bot_message=answer)
-        logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+            await ask(message, state, ReportHandlerMessages.Z_REPORT)
+        await log_state(logger, state)
 
     else:
-        for msg in album if album else [message]:
-            if msg.photo:
-                excel_photos.append(msg)
-            else:
-                await msg.delete()
+        messages = album if album else [message]
+        excel_photos.extend(photo_refs(messages))
+        delete_later(message.bot, [msg for msg in messages if not msg.photo])
 
         await state.update_data(daily_excel=excel_photos)
 
@@ -132,67 +115,44 @@ async def upload_daily_excel(
 async def upload_z_report(
     message: types.Message, state: FSMContext, album: list[Message] | None = None
 ):
-    await delete_prev_message(state)
-    if album:
-        [await message.delete() for message in album]
-    else:
-        await message.delete()
+    await clear_step(message, state, album)
     await state.set_state(ReportMenuStates.entering_sbp_sum)
-    await state.update_data(z_report=album if album else [message])
-    answer = await message.answer(
-        ReportHandlerMessages.SBP_SUM, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await state.update_data(z_report=photo_refs(album if album else [message]))
+    await ask(message, state, ReportHandlerMessages.SBP_SUM)
+    await log_state(logger, state)
 
 
 @report_evening_router.message(ReportMenuStates.entering_sbp_sum)
 async def enter_sbp_sum(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(sbp_sum=message.text)
     await state.set_state(ReportMenuStates.entering_day_resume)
-    answer = await message.answer(
-        ReportHandlerMessages.DAY_RESUME, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await ask(message, state, ReportHandlerMessages.DAY_RESUME)
+    await log_state(logger, state)
 
 
 @report_evening_router.message(ReportMenuStates.entering_day_resume)
 async def enter_day_resume(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(day_resume=message.text)
     await state.set_state(ReportMenuStates.entering_disgruntled_clients)
-    answer = await message.answer(
-        ReportHandlerMessages.DISGRUNTLED_CLIENTS, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await ask(message, state, ReportHandlerMessages.DISGRUNTLED_CLIENTS)
+    await log_state(logger, state)
 
 
 @report_evening_router.message(ReportMenuStates.entering_disgruntled_clients)
 async def enter_disgruntled_clients(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(disgruntled_clients=message.text)
     await state.set_state(ReportMenuStates.entering_argues_with_masters)
-    answer = await message.answer(
-        ReportHandlerMessages.ARGUES_WITH_MASTERS, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await ask(message, state, ReportHandlerMessages.ARGUES_WITH_MASTERS)
+    await log_state(logger, state)
 
 
 @report_evening_router.message(ReportMenuStates.entering_argues_with_masters)
 async def enter_argues_with_masters(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(argues_with_masters=message.text)
     await state.set_state(ReportMenuStates.completing_report)
-    answer = await message.answer(
-        ReportHandlerMessages.SEND_REPORT, reply_markup=send_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await ask(message, state, ReportHandlerMessages.SEND_REPORT, NavAction.SEND)
+    await log_state(logger, state)
@@ -7,19 +7,14 @@ from betterlogging import logging
 from infrastructure.database.models.users import User
 from infrastructure.database.repo.requests import RequestsRepo
 
+from tgbot.config import Config
 from tgbot.handlers.user import user_start
-from tgbot.keyboards.inline import (
-    UserCallbackData,
-    daytime_keyboard,
-    locations_keyboard,
-)
+from tgbot.keyboards.inline import NavAction, UserCallbackData, daytime_keyboard
 from tgbot.keyboards.reply import (
     NavButtons,
     ReplyButtons,
     admin_menu_keyboard,
-    nav_keyboard,
     user_menu_keyboard,
-    send_keyboard,
 )
 from tgbot.messages.handlers_msg import (
     DatabaseHandlerMessages,
@@ -29,6 +24,14 @@ from tgbot.messages.handlers_msg import (
 )
 from tgbot.misc.report_to_owners import ReportBuilder, on_report
 from tgbot.misc.states import CommonStates, ReportMenuStates
+from tgbot.models.report_draft import ReportDraft, message_ref, photo_refs
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.locations_catalog import LocationCatalog
+from tgbot.services.logs import log_state
+from tgbot.services.outbox import OutboxWorker, dump_media
+from tgbot.services.report_wizard import ask, clear_step
+from tgbot.services.roles import Role
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_prev_message
 
 
@@ -42,25 +45,58 @@ report_menu_router = Router()
 )
 async def choose_daytime(message: Message, state: FSMContext, user_from_db: User):
     if user_from_db.username:
-        await message.delete()
-        await delete_prev_message(state)
+        # A new report starts with a new prompt, in the wizard mode too
+        delete_later(message.bot, [message])
+        await delete_prev_message(state, message.bot)
         answer = await message.answer(
             ReportHandlerMessages.CHOOSE_DAYTIME, reply_markup=daytime_keyboard()
         )
         await state.set_state(ReportMenuStates.creating_report)
-        await state.update_data(prev_bot_message=answer)
+        await state.update_data(prev_bot_message=message_ref(answer))
 
     else:
         await state.set_state(CommonStates.unauthorized)
         await user_start(message, state)
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
+
+
+async def ask_location(
+    message: Message,
+    state: FSMContext,
+    daytime: str | None,
+    user_id: int,
+    role: Role,
+    location_catalog: LocationCatalog,
+    access_index: AccessIndex,
+):
+    """
+    Offers the locations the user has access to, all of them to admins.
+    """
+    location_ids = (
+        None if Role.ADMIN in role else await access_index.locations_for(user_id)
+    )
+    if location_ids is not None and not location_ids:
+        await message.edit_text(ReportHandlerMessages.NO_LOCATIONS)
+        return
+
+    await message.edit_text(
+        ReportHandlerMessages.CHOOSE_LOCATION,
+        reply_markup=await location_catalog.keyboard(user_id, location_ids),
+    )
+    await state.update_data(daytime=daytime)
+    await state.set_state(ReportMenuStates.choosing_location)
 
 
 # We can use F.data filter to filter callback queries by data field from CallbackQuery object
 @report_menu_router.callback_query(F.data == "morning")
 async def choosed_morning(
-    query: CallbackQuery, state: FSMContext, user_from_db: User, repo: RequestsRepo
+    query: CallbackQuery,
+    state: FSMContext,
+    user_from_db: User,
+    role: Role,
+    location_catalog: LocationCatalog,
+    access_index: AccessIndex,
 ):
     # Firstly, always answer callback query (as Telegram API requires)
     await query.answer()
@@ -68,30 +104,39 @@ async def choosed_morning(
     # This method will send an answer to the message with the button, that user pressed
     # Here query - is a CallbackQuery object, which contains message: Message object
     if isinstance(query.message, Message):
-        locations = await repo.locations.get_all_locations()
-        await query.message.edit_text(
-            ReportHandlerMessages.CHOOSE_LOCATION,
-            reply_markup=locations_keyboard(locations, user_from_db.user_id),
+        await ask_location(
+            query.message,
+            state,
+            query.data,
+            user_from_db.user_id,
+            role,
+            location_catalog,
+            access_index,
         )
-        await state.update_data(daytime=query.data)
-        await state.set_state(ReportMenuStates.choosing_location)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 @report_menu_router.callback_query(F.data == "evening")
 async def choosed_evening(
-    query: CallbackQuery, state: FSMContext, user_from_db: User, repo: RequestsRepo
+    query: CallbackQuery,
+    state: FSMContext,
+    user_from_db: User,
+    role: Role,
+    location_catalog: LocationCatalog,
+    access_index: AccessIndex,
 ):
     await query.answer()
     if isinstance(query.message, Message):
-        locations = await repo.locations.get_all_locations()
-        await query.message.edit_text(
-            ReportHandlerMessages.CHOOSE_LOCATION,
-            reply_markup=locations_keyboard(locations, user_from_db.user_id),
+        await ask_location(
+            query.message,
+            state,
+            query.data,
+            user_from_db.user_id,
+            role,
+            location_catalog,
+            access_index,
         )
-        await state.update_data(daytime=query.data)
-        await state.set_state(ReportMenuStates.choosing_location)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 # To filter the callback data, that was created with CallbackData factory, you can use .filter() method
@@ -100,7 +145,10 @@ async def choose_location(
     query: CallbackQuery,
     callback_data: UserCallbackData,
     state: FSMContext,
-    repo: RequestsRepo,
+    role: Role,
+    location_catalog: LocationCatalog,
+    access_index: AccessIndex,
+    config: Config,
 ):
     await query.answer()
 
@@ -108,7 +156,18 @@ async def choose_location(
     location_id = callback_data.location_id
 
     if isinstance(query.message, Message) and location_id:
-        location = await repo.locations.get_location_by_id(location_id)
+        # Callback data comes from the client, the access is checked again
+        if Role.ADMIN not in role and not await access_index.has_access(
+            query.from_user.id, location_id
+        ):
+            logger.warning(
+                f"User {query.from_user.id} chose location {location_id} without access"
+            )
+            await query.message.edit_text(ReportHandlerMessages.LOCATION_FORBIDDEN)
+            await log_state(logger, state)
+            return
+
+        location = await location_catalog.get(location_id)
 
         if location:
             try:
@@ -126,9 +185,16 @@ async def choose_location(
                 location_message = await query.message.edit_text(
                     text.as_html(), parse_mode=ParseMode.HTML
                 )
-                await state.update_data(location=text)
-                await state.update_data(location_id=location_id)
-                await state.update_data(has_solarium=location.has_solarium)
+                # The location message stays, the steps get a prompt of their own
+                await state.update_data(
+                    location_id=location_id,
+                    location_name=location.location_name,
+                    address=location.address,
+                    has_solarium=location.has_solarium,
+                    location_message=message_ref(location_message),
+                    prev_bot_message=None,
+                    wizard=config.tg_bot.report_wizard,
+                )
 
                 state_data = await state.get_data()
 
@@ -144,16 +210,9 @@ async def choose_location(
                     )
                     next_state = ReportMenuStates.entering_clients_lost
 
-                answer = await query.message.answer(
-                    answer_text, reply_markup=nav_keyboard()
-                )
+                await ask(query.message, state, answer_text)
                 await state.set_state(next_state)
 
-                await state.update_data(
-                    prev_bot_message=answer,
-                    location_message=location_message,
-                )
-
                 # You can also use MarkdownV2:
                 # await query.message.edit_text(text.as_markdown(), parse_mode=ParseMode.MARKDOWN_V2)
 
@@ -168,7 +227,7 @@ async def choose_location(
             await query.message.edit_text("Location not found!")
             location_message = None
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 @report_menu_router.message(F.photo, ReportMenuStates.uploading_solarium_counter)
@@ -177,69 +236,83 @@ async def upload_solarium_counter(
     state: FSMContext,
     album: list[Message] | None = None,
 ):
-    if album:
-        [await message.delete() for message in album]
-    else:
-        await message.delete()
-    await delete_prev_message(state)
-    await state.update_data(solarium_counter=album if album else [message])
+    await clear_step(message, state, album)
+    await state.update_data(solarium_counter=photo_refs(album if album else [message]))
 
     state_data = await state.get_data()
     if state_data["daytime"] == "morning":
         await state.set_state(ReportMenuStates.completing_report)
-        answer = await message.answer(
-            ReportHandlerMessages.SEND_REPORT, reply_markup=send_keyboard()
-        )
+        await ask(message, state, ReportHandlerMessages.SEND_REPORT, NavAction.SEND)
 
     elif state_data["daytime"] == "evening":
         await state.set_state(ReportMenuStates.uploading_z_report)
-        answer = await message.answer(
-            ReportHandlerMessages.Z_REPORT, reply_markup=nav_keyboard()
-        )
-    else:
-        answer = None
-
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+        await ask(message, state, ReportHandlerMessages.Z_REPORT)
+    await log_state(logger, state)
 
 
 @report_menu_router.message(
     F.text == NavButtons.BTN_SEND, ReportMenuStates.completing_report
 )
 async def complete_report(
-    message: types.Message, state: FSMContext, user_from_db: User, repo: RequestsRepo
+    message: types.Message,
+    state: FSMContext,
+    role: Role,
+    access_index: AccessIndex,
+    repo: RequestsRepo | None = None,
+    outbox: OutboxWorker | None = None,
 ):
-    await message.delete()
-    await delete_prev_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
 
     state_data = await state.get_data()
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
-
-    author, author_name = state_data["author"], state_data["author_name"]
-    await state.clear()
-    await state.update_data(author=author, author_name=author_name)
-    await CommonStates().check_auth(state)
+    await log_state(logger, state)
 
     location_id: int | None = state_data.get("location_id")
-    users = await repo.users.get_users_by_location(location_id)
+    # Authors have access to their location, but don't get their own report
+    recipients = list(
+        await access_index.users_for(location_id) - {message.from_user.id}
+    )
 
-    if state_data["daytime"] == "morning":
-        report = ReportBuilder(state_data)
-        text = report.construct_morning_report()
+    draft = ReportDraft.from_state(state_data)
+    if draft.daytime in ("morning", "evening"):
+        report = ReportBuilder(draft)
+        text = (
+            report.construct_morning_report()
+            if draft.daytime == "morning"
+            else report.construct_evening_report()
+        )
         media = report.build_album()
-        await on_report(message.bot, [user.user_id for user in users], text, media)
 
-    elif state_data["daytime"] == "evening":
-        report = ReportBuilder(state_data)
-        text = report.construct_evening_report()
-        media = report.build_album()
-        await on_report(message.bot, [user.user_id for user in users], text, media)
+        if repo is not None and outbox is not None:
+            # Delivered in the background, the author doesn't wait for the fan-out
+            try:
+                await repo.outbox.enqueue(
+                    recipients, text, ParseMode.MARKDOWN_V2, dump_media(media)
+                )
+                await repo.commit_unit_of_work()
+            except Exception as e:
+                logger.error(f"Error queueing the report:\n {str(e)}")
+                await repo.session.rollback()
+                # The draft is kept, so the author can send it again
+                await ask(
+                    message, state, ReportHandlerMessages.REPORT_NOT_SENT, NavAction.SEND
+                )
+                return
+            outbox.notify()
+        else:
+            await on_report(message.bot, recipients, text, media)
+
+    # The draft is dropped only once the report is queued
+    author, author_name = state_data["author"], state_data["author_name"]
+    await state.clear()
+    await state.update_data(author=author, author_name=author_name)
+    await CommonStates().check_auth(state)
 
     await message.answer(
         ReportHandlerMessages.REPORT_MORNING_COMPLETED
         if state_data["daytime"] == "morning"
         else ReportHandlerMessages.REPORT_EVENING_COMPLETED,
         reply_markup=admin_menu_keyboard()
-        if user_from_db.is_owner
+        if Role.OWNER in role
         else user_menu_keyboard(),
     )
@@ -3,10 +3,12 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types.message import Message
 from betterlogging import logging
 
-from tgbot.keyboards.reply import nav_keyboard, send_keyboard
+from tgbot.keyboards.inline import NavAction
 from tgbot.messages.handlers_msg import ReportHandlerMessages, ReportMastersQuantity
 from tgbot.misc.states import ReportMenuStates
-from tgbot.services.utils import delete_prev_message
+from tgbot.models.report_draft import photo_refs
+from tgbot.services.logs import log_state
+from tgbot.services.report_wizard import ask, clear_step
 
 
 logger = logging.getLogger(__name__)
@@ -16,8 +18,7 @@ report_morning_router = Router()
 
 @report_morning_router.message(ReportMenuStates.entering_masters_quantity)
 async def enter_masters_quantity(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
 
     state_data = await state.get_data()
     masters_quantity = (
@@ -31,20 +32,16 @@ async def enter_masters_quantity(message: types.Message, state: FSMContext):
             await state.update_data(masters_quantity=masters_quantity)
 
             if i + 1 < len(list_of_masters_types):
-                answer = await message.answer(
-                    ReportHandlerMessages.MASTERS_QUANTITY
-                    + list_of_masters_types[i + 1],
-                    reply_markup=nav_keyboard(),
+                await ask(
+                    message,
+                    state,
+                    ReportHandlerMessages.MASTERS_QUANTITY + list_of_masters_types[i + 1],
                 )
-                await state.update_data(prev_bot_message=answer)
 
                 break
     else:
         await state.set_state(ReportMenuStates.entering_latecomers)
-        answer = await message.answer(
-            ReportHandlerMessages.LATECOMERS, reply_markup=nav_keyboard()
-        )
-        await state.update_data(prev_bot_message=answer)
+        await ask(message, state, ReportHandlerMessages.LATECOMERS)
 
     state_data = await state.get_data()
     logger.debug(
@@ -52,33 +49,25 @@ async def enter_masters_quantity(message: types.Message, state: FSMContext):
         if "masters_quantity" in state_data
         else None
     )
-    logger.debug(f"{(await state.get_state())}")
+    await log_state(logger, state, data=False)
 
 
 @report_morning_router.message(ReportMenuStates.entering_latecomers)
 async def enter_latecomers(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(latecomers=message.text)
     await state.set_state(ReportMenuStates.entering_absent)
-    answer = await message.answer(
-        ReportHandlerMessages.ABSENT, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {(await state.get_data())}")
+    await ask(message, state, ReportHandlerMessages.ABSENT)
+    await log_state(logger, state)
 
 
 @report_morning_router.message(ReportMenuStates.entering_absent)
 async def enter_absent(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
+    await clear_step(message, state)
     await state.update_data(absent=message.text)
     await state.set_state(ReportMenuStates.uploading_open_check)
-    answer = await message.answer(
-        ReportHandlerMessages.OPEN_CHECK, reply_markup=nav_keyboard()
-    )
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await ask(message, state, ReportHandlerMessages.OPEN_CHECK)
+    await log_state(logger, state)
 
 
 # To get high quality photo from message: F.photo[-1].as_('largest_photo')
@@ -88,12 +77,8 @@ async def upload_open_reciept(
     state: FSMContext,
     album: list[Message] | None = None,
 ):
-    if album:
-        [await message.delete() for message in album]
-    else:
-        await message.delete()
-    await delete_prev_message(state)
-    await state.update_data(open_check=album if album else [message])
+    await clear_step(message, state, album)
+    await state.update_data(open_check=photo_refs(album if album else [message]))
 
     state_data = await state.get_data()
 
@@ -104,14 +89,9 @@ async def upload_open_reciept(
 
     if has_solarium:
         await state.set_state(ReportMenuStates.uploading_solarium_counter)
-        answer = await message.answer(
-            ReportHandlerMessages.UPLOAD_SOLARIUM_COUNTER, reply_markup=nav_keyboard()
-        )
+        await ask(message, state, ReportHandlerMessages.UPLOAD_SOLARIUM_COUNTER)
     else:
         await state.set_state(ReportMenuStates.completing_report)
-        answer = await message.answer(
-            ReportHandlerMessages.SEND_REPORT, reply_markup=send_keyboard()
-        )
+        await ask(message, state, ReportHandlerMessages.SEND_REPORT, NavAction.SEND)
 
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
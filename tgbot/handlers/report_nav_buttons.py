@@ -1,9 +1,10 @@
 from aiogram import F, Router, types
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
 from betterlogging import logging
 
 from infrastructure.database.models.users import User
+from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.handlers.report_evening import (
     enter_clients_lost,
     enter_day_resume,
@@ -13,19 +14,27 @@ from tgbot.handlers.report_evening import (
     upload_daily_excel,
     upload_z_report,
 )
-from tgbot.handlers.report_menu import choose_daytime
+from tgbot.handlers.report_menu import choose_daytime, complete_report
 from tgbot.handlers.report_morning import (
     enter_absent,
     enter_latecomers,
     enter_masters_quantity,
 )
-from tgbot.keyboards.reply import NavButtons, nav_keyboard, user_menu_keyboard
+from tgbot.keyboards.inline import NAV_ACTION_BUTTONS, NavAction, NavCallbackData
+from tgbot.keyboards.reply import NavButtons, user_menu_keyboard
 from tgbot.messages.handlers_msg import (
     ReportClientsLost,
     ReportHandlerMessages,
     ReportMastersQuantity,
 )
 from tgbot.misc.states import CommonStates, ReportMenuStates
+from tgbot.models.report_draft import PhotoRef, message_ref
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.logs import log_state
+from tgbot.services.message_deleter import delete_later
+from tgbot.services.outbox import OutboxWorker
+from tgbot.services.report_wizard import ask, clear_step
+from tgbot.services.roles import Role
 from tgbot.services.utils import delete_location_message, delete_prev_message
 
 logger = logging.getLogger(__name__)
@@ -40,90 +49,86 @@ async def btn_back(message: types.Message, state: FSMContext, user_from_db: User
     match current_state := await state.get_state():
         # Morning report
         case "ReportMenuStates:entering_masters_quantity":
-            await delete_location_message(state)
+            await delete_location_message(state, message.bot)
             await state.set_state(ReportMenuStates.choosing_location)
             await state.update_data(masters_quantity={})
-            await choose_daytime(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await choose_daytime(message, state, user_from_db)
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_latecomers":
-            await message.delete()
-            await delete_prev_message(state)
+            await clear_step(message, state)
             await state.set_state(ReportMenuStates.entering_masters_quantity)
             await state.update_data(masters_quantity={})
-            answer = await message.answer(
+            await ask(
+                message,
+                state,
                 ReportHandlerMessages.MASTERS_QUANTITY + ReportMastersQuantity.MALE,
-                reply_markup=nav_keyboard(),
             )
-            await state.update_data(prev_bot_message=answer)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_absent":
             await state.set_state(ReportMenuStates.entering_masters_quantity)
             await enter_masters_quantity(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:uploading_open_check":
             await state.set_state(ReportMenuStates.entering_latecomers)
             await enter_latecomers(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         # Evening report
         case "ReportMenuStates:entering_clients_lost":
-            await delete_location_message(state)
+            await delete_location_message(state, message.bot)
             await state.set_state(ReportMenuStates.choosing_location)
             await state.update_data(clients_lost={})
             await choose_daytime(message, state, user_from_db)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_total_clients":
-            await message.delete()
-            await delete_prev_message(state)
+            await clear_step(message, state)
             await state.set_state(ReportMenuStates.entering_clients_lost)
             await state.update_data(clients_lost={})
-            answer = await message.answer(
+            await ask(
+                message,
+                state,
                 ReportHandlerMessages.CLIENTS_LOST + ReportClientsLost.MALE,
-                reply_markup=nav_keyboard(),
             )
-            await state.update_data(prev_bot_message=answer)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:uploading_daily_excel":
             await state.set_state(ReportMenuStates.entering_clients_lost)
-            for msg in state_data["daily_excel"]:
-                try:
-                    await msg.delete()
-                except TelegramBadRequest as e:
-                    logger.warning(e.message)
+            delete_later(
+                message.bot, map(PhotoRef.load, state_data.get("daily_excel", []))
+            )
             await state.update_data(daily_excel=[])
             await enter_clients_lost(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:uploading_z_report":
             await state.set_state(ReportMenuStates.entering_total_clients)
             await state.update_data(daily_excel=[])
             await enter_total_clients(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_sbp_sum":
             await state.set_state(ReportMenuStates.uploading_daily_excel)
             await upload_daily_excel(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_day_resume":
             await state.set_state(ReportMenuStates.uploading_z_report)
             await upload_z_report(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_disgruntled_clients":
             await state.set_state(ReportMenuStates.entering_sbp_sum)
             await enter_sbp_sum(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:entering_argues_with_masters":
             await state.set_state(ReportMenuStates.entering_day_resume)
             await enter_day_resume(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         # Common states
         case "ReportMenuStates:uploading_solarium_counter":
@@ -136,7 +141,7 @@ async def btn_back(message: types.Message, state: FSMContext, user_from_db: User
                 logger.debug(f"Time of day: {state_data['daytime']}")
                 await state.set_state(ReportMenuStates.entering_total_clients)
                 await enter_total_clients(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
         case "ReportMenuStates:completing_report":
             if state_data["daytime"] == "morning":
@@ -148,7 +153,7 @@ async def btn_back(message: types.Message, state: FSMContext, user_from_db: User
                 logger.debug(f"Time of day: {state_data['daytime']}")
                 await state.set_state(ReportMenuStates.entering_disgruntled_clients)
                 await enter_disgruntled_clients(message, state)
-            logger.debug(f"Back to state: {await state.get_state()}")
+            await log_state(logger, state, "Back to state:", data=False)
 
     # Restoring data from previous step, except for some keys in state data
     state_data.pop("prev_bot_message") if "prev_bot_message" in state_data else ...
@@ -156,14 +161,16 @@ async def btn_back(message: types.Message, state: FSMContext, user_from_db: User
     state_data.pop("clients_lost") if "clients_lost" in state_data else ...
     state_data.pop("daily_excel") if "daily_excel" in state_data else ...
     await state.update_data(**state_data)
-    logger.debug(f"Back from state: {current_state} to {await state.get_state()}")
+    await log_state(
+        logger, state, f"Back from state: {current_state} to", data=False
+    )
 
 
 @report_nav_buttons_router.message(F.text.in_(NavButtons.BTN_CANCEL))
 async def btn_cancel(message: types.Message, state: FSMContext):
-    await message.delete()
-    await delete_prev_message(state)
-    await delete_location_message(state)
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
+    await delete_location_message(state, message.bot)
     state_data = await state.get_data()
     await state.clear()
 
@@ -176,6 +183,83 @@ async def btn_cancel(message: types.Message, state: FSMContext):
     answer = await message.answer(
         ReportHandlerMessages.REPORT_CANCELED, reply_markup=user_menu_keyboard()
     )
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
+
+    await log_state(logger, state)
+
+
+# Inline nav buttons of the report wizard, see tgbot.services.report_wizard
+def pressed(query: CallbackQuery, callback_data: NavCallbackData) -> Message | None:
+    """
+    Returns the wizard prompt as if the user had sent the text of the pressed button,
+    so the reply nav handlers serve the inline buttons too.
+    """
+    if not isinstance(query.message, Message):
+        return None
+    return query.message.model_copy(
+        update={
+            "text": NAV_ACTION_BUTTONS[callback_data.action].value,
+            "from_user": query.from_user,
+        }
+    )
+
+
+@report_nav_buttons_router.callback_query(
+    NavCallbackData.filter(F.action == NavAction.BACK)
+)
+async def wizard_back(
+    query: CallbackQuery,
+    callback_data: NavCallbackData,
+    state: FSMContext,
+    user_from_db: User,
+):
+    await query.answer()
+    if message := pressed(query, callback_data):
+        await btn_back(message, state, user_from_db)
+
+
+@report_nav_buttons_router.callback_query(
+    NavCallbackData.filter(F.action == NavAction.CANCEL)
+)
+async def wizard_cancel(
+    query: CallbackQuery, callback_data: NavCallbackData, state: FSMContext
+):
+    await query.answer()
+    if message := pressed(query, callback_data):
+        await btn_cancel(message, state)
+
+
+@report_nav_buttons_router.callback_query(
+    NavCallbackData.filter(F.action == NavAction.NEXT),
+    ReportMenuStates.uploading_daily_excel,
+)
+async def wizard_next(
+    query: CallbackQuery, callback_data: NavCallbackData, state: FSMContext
+):
+    await query.answer()
+    if message := pressed(query, callback_data):
+        await upload_daily_excel(message, state)
+
+
+@report_nav_buttons_router.callback_query(
+    NavCallbackData.filter(F.action == NavAction.SEND),
+    ReportMenuStates.completing_report,
+)
+async def wizard_send(
+    query: CallbackQuery,
+    callback_data: NavCallbackData,
+    state: FSMContext,
+    role: Role,
+    access_index: AccessIndex,
+    repo: RequestsRepo | None = None,
+    outbox: OutboxWorker | None = None,
+):
+    await query.answer()
+    if message := pressed(query, callback_data):
+        await complete_report(message, state, role, access_index, repo, outbox)
+
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+@report_nav_buttons_router.callback_query(NavCallbackData.filter())
+async def wizard_stale_button(query: CallbackQuery):
+    # Button of a prompt from another step
+    await query.answer()
@@ -4,10 +4,15 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, ReplyKeyboardRemove
 from betterlogging import logging
 
+from infrastructure.database.models.users import User
 from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.keyboards.reply import user_menu_keyboard
 from tgbot.messages.handlers_msg import UserHandlerMessages
 from tgbot.misc.states import CommonStates
+from tgbot.models.report_draft import message_ref
+from tgbot.services.logs import log_state
+from tgbot.services.user_cache import UserProfileCache
+from tgbot.services.message_deleter import delete_later
 from tgbot.services.utils import delete_location_message, delete_prev_message
 
 logger = logging.getLogger(__name__)
@@ -21,15 +26,15 @@ async def user_start(
     state: FSMContext,
     db_error: Exception | None = None,
 ):
-    await message.delete() if message is not None else ...
-    await delete_prev_message(state)
+    delete_later(message.bot if message is not None else None, [message])
+    await delete_prev_message(state, message.bot if message is not None else None)
 
     if message.text:
         await state.update_data(author=None)
         await state.update_data(author_name=None)
 
     state_data = await state.get_data()
-    await delete_location_message(state)
+    await delete_location_message(state, message.bot)
 
     if auth := await CommonStates().check_auth(state):
         logger.info(f'Auth for {state_data.get("author_name")} has been passed')
@@ -63,7 +68,7 @@ async def user_start(
             else:
                 answer = None
 
-    await state.update_data(prev_bot_message=answer)
+    await state.update_data(prev_bot_message=message_ref(answer))
 
     logger.info(
         " ".join(
@@ -75,23 +80,29 @@ async def user_start(
         )
     )
 
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    await log_state(logger, state)
 
 
 @user_router.message(Command("help"))
 async def help(message: Message, state: FSMContext):
-    await delete_prev_message(state)
+    await delete_prev_message(state, message.bot)
 
     answer = await message.answer(UserHandlerMessages.HELP)
-    await message.delete()
-    await state.update_data(prev_bot_message=answer)
-    logger.debug(f"{await state.get_state()}, {await state.get_data()}")
+    delete_later(message.bot, [message])
+    await state.update_data(prev_bot_message=message_ref(answer))
+    await log_state(logger, state)
 
 
 @user_router.message(CommonStates.unauthorized)
-async def user_auth(message: Message, state: FSMContext, repo: RequestsRepo):
-    await message.delete()
-    await delete_prev_message(state)
+async def user_auth(
+    message: Message,
+    state: FSMContext,
+    repo: RequestsRepo,
+    user_from_db: User | None = None,
+    user_cache: UserProfileCache | None = None,
+):
+    delete_later(message.bot, [message])
+    await delete_prev_message(state, message.bot)
 
     # Saving user info to DB
     if user := message.from_user:
@@ -100,13 +111,20 @@ async def user_auth(message: Message, state: FSMContext, repo: RequestsRepo):
             UserHandlerMessages.GREETINGS.format(user=message.text),
             reply_markup=user_menu_keyboard(),
         )
-        await state.update_data(prev_bot_message=answer)
+        await state.update_data(prev_bot_message=message_ref(answer))
         await state.update_data(author_name=message.text)
 
+        # New users are written behind, make sure the row exists before updating it
+        if user_cache is not None:
+            await user_cache.flush()
+
         user_id = message.from_user.id
         result = await repo.users.set_user_logged_as(user_id, message.text)
         logger.info(f"Update in users table: {result}")
 
+        if user_from_db is not None:
+            user_from_db.logged_as = message.text
+
     else:
         author = None
 
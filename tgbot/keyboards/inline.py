@@ -8,6 +8,7 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from infrastructure.database.models.locations import Location
 from infrastructure.database.models.users import User
+from tgbot.keyboards.reply import NavButtons
 
 
 class InlineButtons(str, Enum):
@@ -107,3 +108,43 @@ def locations_keyboard(
     keyboard.adjust(1)
 
     return keyboard.as_markup()
+
+
+class NavAction(str, Enum):
+    NEXT = "next"
+    SEND = "send"
+    BACK = "back"
+    CANCEL = "cancel"
+
+
+# Inline counterparts of the reply nav buttons, handled as if their text was sent
+NAV_ACTION_BUTTONS = {
+    NavAction.NEXT: NavButtons.BTN_NEXT,
+    NavAction.SEND: NavButtons.BTN_SEND,
+    NavAction.BACK: NavButtons.BTN_BACK,
+    NavAction.CANCEL: NavButtons.BTN_CANCEL,
+}
+
+
+class NavCallbackData(CallbackData, prefix="nav"):
+    action: NavAction
+
+
+def wizard_nav_keyboard(primary: NavAction | None = None):
+    """
+    Inline nav keyboard of the report wizard: the primary action (next or send)
+    on its own row, back and cancel below, as in the reply nav keyboards.
+    """
+    keyboard = InlineKeyboardBuilder()
+    actions = [NavAction.BACK, NavAction.CANCEL]
+    if primary is not None:
+        actions.insert(0, primary)
+
+    for action in actions:
+        keyboard.button(
+            text=NAV_ACTION_BUTTONS[action], callback_data=NavCallbackData(action=action)
+        )
+
+    keyboard.adjust(*((1, 2) if primary is not None else (2,)))
+
+    return keyboard.as_markup()
@@ -4,8 +4,11 @@ from tgbot.keyboards.reply import NavButtons, ReplyButtons
 
 
 class AdminHandlerMessages(str, Enum):
-    GREETINGS = "Hello, admin! It's Cirulnik admin bot.\nPress /stop to stop bot\nPress /loc to update locations"
+    GREETINGS = "Hello, admin! It's Cirulnik admin bot.\nPress /stop to stop bot\nPress /loc to update locations\nPress /outbox to check reports delivery"
     STOPPING = "Stopping bot..."
+    OUTBOX_STATUS = "Reports delivery queue:"
+    OUTBOX_STUCK = "Stuck deliveries:"
+    OUTBOX_UNAVAILABLE = "Reports delivery queue is not available without database"
     ERROR = "Error!\n"
 
 
@@ -13,7 +16,12 @@ class DatabaseHandlerMessages(str, Enum):
     UPDATING_USER = "Пользователь:"
     DELETING_LOCATION = "❌ Удаление доступа"
     ADDING_LOCATION = "✅ Добавление доступа"
-    UPDATING_LOCATIONS = "Отправьте список локаций в JSON формате для обновления"
+    UPDATING_LOCATIONS = (
+        "Отправьте список локаций в JSON формате для обновления "
+        "или прикрепите файл JSON/CSV (location_id, location_name, address, has_solarium)"
+    )
+    DOCUMENT_TOO_BIG = "Файл слишком большой, максимум 20 МБ"
+    ROW_ERROR = "Строка {row}: {error}"
     SUCCESSFUL_UPDATING = "Обновлено: "
     UNSUCCESSFUL_UPDATING = "Ошибка обновления\!\n"
     CHOOSE_USER = "Выберите пользователя:"
@@ -33,6 +41,8 @@ class UserHandlerMessages(str, Enum):
 class ReportHandlerMessages(str, Enum):
     CHOOSE_DAYTIME = "Выберите время суток:"
     CHOOSE_LOCATION = "Выберите салон, в котором сегодня работаете:"
+    NO_LOCATIONS = "У вас нет доступа ни к одному салону, обратитесь к администратору"
+    LOCATION_FORBIDDEN = "Нет доступа к этому салону!"
 
     # Morning report messages
     MASTERS_QUANTITY = "Сколько сегодня мастеров на смене? Укажите количество:\n"
@@ -61,6 +71,10 @@ class ReportHandlerMessages(str, Enum):
     REPORT_CANCELED = "Отправка отчета отменена!"
     REPORT_MORNING_COMPLETED = "Спасибо, утренний отчет отправлен! ☀️\nХорошего дня!"
     REPORT_EVENING_COMPLETED = "Спасибо, вечерний отчет отправлен! 🌙"
+    REPORT_NOT_SENT = (
+        "Не удалось отправить отчет, попробуйте еще раз.\n"
+        f'Нажмите кнопку "{NavButtons.BTN_SEND.value}" чтобы отправить отчет'
+    )
 
 
 class ReportMastersQuantity(str, Enum):
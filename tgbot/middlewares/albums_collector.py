@@ -1,17 +1,47 @@
 import asyncio
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, Awaitable
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
+from betterlogging import logging
 from cachetools import TTLCache
 
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Album:
+    started_at: float
+    future: asyncio.Future
+    messages: list[Message] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
 class AlbumsMiddleware(BaseMiddleware):
-    def __init__(self, wait_time_seconds: int):
+    """
+    Collects messages of a media group and passes them to the handler at once,
+    as data["album"] sorted by message_id, with the first received part as the event.
+
+    An album is complete when no new part has arrived for quiet_window seconds,
+    or max_wait seconds after its first part. Parts arriving after that are dropped
+    for max_wait seconds more, instead of being handled as an album of their own.
+    Only the first part waits, the others are dropped right away.
+    """
+
+    def __init__(self, quiet_window: float = 0.3, max_wait: float = 2.0):
         super().__init__()
-        self.wait_time_seconds = wait_time_seconds
-        self.albums_cache = TTLCache(ttl=float(wait_time_seconds) + 20.0, maxsize=1000)
-        self.lock = asyncio.Lock()
+        self.quiet_window = quiet_window
+        self.max_wait = max_wait
+        self.albums: dict[str, _Album] = {}
+        # Media groups completed lately, their late parts are dropped
+        self.completed: TTLCache[str, None] = TTLCache(maxsize=10000, ttl=max_wait)
+        self.late_parts_total = 0
+        # Album assembly latency, from the first part to completion
+        self.albums_total = 0
+        self.assembly_seconds_total = 0.0
+        self.assembly_seconds_max = 0.0
 
     async def __call__(
         self,
@@ -33,31 +63,65 @@ class AlbumsMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         album_id: str = event.media_group_id
+        loop = asyncio.get_running_loop()
+
+        if album_id in self.completed:
+            self.late_parts_total += 1
+            logger.warning(
+                f"Album {album_id}: part {event.message_id} arrived after the album "
+                f"was complete, dropped"
+            )
+            return
 
-        async with self.lock:
-            self.albums_cache.setdefault(album_id, list())
-            self.albums_cache[album_id].append(event)
+        album = self.albums.get(album_id)
+        if album is not None:
+            # Not the first part: extend the quiet window and drop the update
+            album.messages.append(event)
+            self._schedule(album_id, album, loop)
+            return
 
-        # Wait for some time until other updates are collected
-        await asyncio.sleep(self.wait_time_seconds)
+        album = _Album(started_at=loop.time(), future=loop.create_future())
+        album.messages.append(event)
+        self.albums[album_id] = album
+        self._schedule(album_id, album, loop)
 
-        # Find the smallest message_id in batch, this will be our only update
-        # which will pass to handlers
-        my_message_id = smallest_message_id = event.message_id
+        messages = await album.future
+        data["album"] = sorted(messages, key=lambda message: message.message_id)
 
-        item: Message
-        for item in self.albums_cache[album_id]:
-            smallest_message_id = min(smallest_message_id, item.message_id)
+        return await handler(event, data)
 
-        # If current message_id in not the smallest, drop the update;
-        # it's already saved in self.albums_cache
-        if my_message_id != smallest_message_id:
-            return
+    def _schedule(self, album_id: str, album: _Album, loop: asyncio.AbstractEventLoop):
+        if album.timer is not None:
+            album.timer.cancel()
 
-        # If current message_id is the smallest,
-        # add all other messages to data and pass to handler
-        # context = data["context"]
-        # context.album = self.albums_cache[album_id]
-        data["album"] = self.albums_cache[album_id]
+        deadline = min(loop.time() + self.quiet_window, album.started_at + self.max_wait)
+        album.timer = loop.call_at(deadline, self._complete, album_id, album)
 
-        return await handler(event, data)
+    def _complete(self, album_id: str, album: _Album):
+        if self.albums.get(album_id) is album:
+            del self.albums[album_id]
+        self.completed[album_id] = None
+
+        latency = asyncio.get_running_loop().time() - album.started_at
+        self.albums_total += 1
+        self.assembly_seconds_total += latency
+        self.assembly_seconds_max = max(self.assembly_seconds_max, latency)
+        logger.debug(
+            f"Album {album_id}: {len(album.messages)} parts assembled in {latency:.3f}s"
+        )
+
+        if not album.future.done():
+            album.future.set_result(album.messages)
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            "albums_total": self.albums_total,
+            "assembly_seconds_avg": (
+                self.assembly_seconds_total / self.albums_total
+                if self.albums_total
+                else 0.0
+            ),
+            "assembly_seconds_max": self.assembly_seconds_max,
+            "late_parts_total": self.late_parts_total,
+        }
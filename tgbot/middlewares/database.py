@@ -3,12 +3,26 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
-from infrastructure.database.repo.requests import RequestsRepo
+from infrastructure.database.repo.requests import LazyRequestsRepo
+from tgbot.services.user_cache import UserProfileCache
 
 
 class DatabaseMiddleware(BaseMiddleware):
-    def __init__(self, session_pool) -> None:
+    """
+    Passes a lazy repository and the user profile to handlers.
+
+    A session is checked out from the pool only when a handler actually queries
+    the database; updates_without_db counts the updates that never did.
+
+    Repositories run in unit-of-work mode: they only flush, and everything written
+    while handling the update is committed once, after the handler returns.
+    """
+
+    def __init__(self, session_pool, user_cache: UserProfileCache | None = None) -> None:
         self.session_pool = session_pool
+        self.user_cache = user_cache
+        self.updates_total = 0
+        self.updates_without_db = 0
 
     async def __call__(
         self,
@@ -24,28 +38,51 @@ class DatabaseMiddleware(BaseMiddleware):
             )
             return await handler(event, data)
 
-        async with self.session_pool() as session:
-            repo = RequestsRepo(session)
-            event_from_user = data.get("event_from_user")
+        repo = LazyRequestsRepo(self.session_pool, unit_of_work=True)
+        event_from_user = data.get("event_from_user")
 
+        try:
             try:
-                user = (
-                    await repo.users.get_or_upsert_user(
+                if event_from_user is None:
+                    user = None
+                elif self.user_cache is not None:
+                    # Profile is served from memory, changes are written behind
+                    user = await self.user_cache.get_user(
+                        repo,
+                        event_from_user.id,
+                        event_from_user.username,
+                        event_from_user.full_name,
+                        event_from_user.language_code,
+                    )
+                else:
+                    user = await repo.users.get_or_upsert_user(
                         event_from_user.id,
                         event_from_user.username,
                         event_from_user.full_name,
                         event_from_user.language_code,
                     )
-                    if event_from_user is not None
-                    else None
-                )
 
                 # access to session in handlers: repo.session.execute(stmt)
                 data["repo"] = repo
                 data["user_from_db"] = user
+                data["user_cache"] = self.user_cache
 
             except Exception as e:
                 data["db_error"] = e
 
             result = await handler(event, data)
-        return result
+            await repo.commit_unit_of_work()
+            return result
+
+        finally:
+            await repo.close()
+            self.updates_total += 1
+            if not repo.touched:
+                self.updates_without_db += 1
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "updates_total": self.updates_total,
+            "updates_without_db": self.updates_without_db,
+        }
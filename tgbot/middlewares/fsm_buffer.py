@@ -0,0 +1,61 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+from betterlogging import logging
+
+from tgbot.services.buffered_state import BufferedFSMContext
+
+
+logger = logging.getLogger(__name__)
+
+
+class FSMBufferMiddleware(BaseMiddleware):
+    """
+    Replaces the FSM context of an update with a BufferedFSMContext, so the state
+    and data are read once and written once, when the handler returns.
+
+    calls_total counts the storage requests handlers asked for,
+    round_trips_total the ones actually made.
+    """
+
+    def __init__(self) -> None:
+        self.calls_total = 0
+        self.round_trips_total = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        context: FSMContext | None = data.get("state")
+        if context is None or isinstance(context, BufferedFSMContext):
+            return await handler(event, data)
+
+        state = (
+            BufferedFSMContext(context, data["raw_state"])
+            if "raw_state" in data
+            else BufferedFSMContext(context)
+        )
+        data["state"] = state
+
+        try:
+            return await handler(event, data)
+
+        finally:
+            # Changes made before an error are kept, as without the buffer
+            await state.flush()
+            self.calls_total += state.calls
+            self.round_trips_total += state.round_trips
+            logger.debug(
+                f"FSM storage: {state.round_trips} round-trips for {state.calls} calls"
+            )
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls_total": self.calls_total,
+            "round_trips_total": self.round_trips_total,
+        }
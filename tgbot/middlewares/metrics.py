@@ -0,0 +1,71 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from tgbot.services.metrics import (
+    API_DURATION,
+    API_ERRORS,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Times handlers, labelled with the handler and the FSM state the update came in.
+    Register it as an inner middleware, the handler is known only there.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        labels = (
+            type(event).__name__,
+            getattr(handler_object.callback, "__name__", "unknown")
+            if handler_object
+            else "unknown",
+            data.get("raw_state") or "none",
+        )
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.inc(*labels, type(e).__name__)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, *labels)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Times Bot API requests of a session and counts the failed ones, by method.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            API_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            API_DURATION.observe(time.perf_counter() - started, name)
@@ -0,0 +1,46 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from betterlogging import logging
+
+from tgbot.services.roles import Role, RoleIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class RoleMiddleware(BaseMiddleware):
+    """
+    Resolves the role of the user once per update, so filters don't query the database.
+    Must be registered after DatabaseMiddleware to use its repo.
+    """
+
+    def __init__(self, role_index: RoleIndex) -> None:
+        self.role_index = role_index
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        event_from_user = data.get("event_from_user")
+        role = Role.REGULAR
+
+        if event_from_user is not None:
+            try:
+                role = await self.role_index.resolve(
+                    event_from_user.id, data.get("repo")
+                )
+            except Exception as e:
+                logger.error(f"Error resolving role:\n {str(e)}")
+                role = (
+                    Role.ADMIN
+                    if event_from_user.id in self.role_index.admin_ids
+                    else Role.REGULAR
+                )
+
+        data["role"] = role
+        data["role_index"] = self.role_index
+        return await handler(event, data)
@@ -0,0 +1,22 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class ServicesMiddleware(BaseMiddleware):
+    """
+    Passes long-lived services (caches, indexes) to handlers by their keyword names.
+    """
+
+    def __init__(self, **services: Any) -> None:
+        self.services = services
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        data.update(self.services)
+        return await handler(event, data)
@@ -0,0 +1,109 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from tgbot.middlewares.update_executor import register_first
+from tgbot.services.tracing import CLIENT, tracer
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Starts the root span of an update. If the update waited in the UpdateExecutor,
+    the span starts when it was queued and the wait is its "queue" child span.
+    Use setup() to register it, before the executor's middleware.
+    """
+
+    def setup(self, dp: Dispatcher):
+        register_first(dp, self)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        context = UserContextMiddleware.resolve_event_context(event)
+        queued_at = data.get("update_queued_at")
+
+        with tracer.start_trace(
+            f"update {event.event_type}",
+            start_ns=queued_at,
+            update_id=event.update_id,
+            chat_id=context.chat_id,
+            user_id=context.user_id,
+        ) as span:
+            if span is not None and queued_at is not None:
+                tracer.end_span(tracer.start_span("queue", start_ns=queued_at))
+            return await handler(event, data)
+
+
+class TracedMiddleware(BaseMiddleware):
+    """
+    Wraps a middleware in a span named after it; the span includes the middlewares
+    and the handler it calls.
+    """
+
+    def __init__(self, middleware: BaseMiddleware) -> None:
+        self.middleware = middleware
+        self.name = f"middleware {type(middleware).__name__}"
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with tracer.span(self.name):
+            return await self.middleware(handler, event, data)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """
+    Span of the matched handler, with the FSM state the update came in.
+    Register it as an inner middleware, the handler is known only there.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = (
+            getattr(handler_object.callback, "__name__", "unknown")
+            if handler_object
+            else "unknown"
+        )
+        with tracer.span(f"handler {name}", state=data.get("raw_state")):
+            return await handler(event, data)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """
+    Span of every Bot API request made while handling a traced update.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with tracer.span(
+            f"telegram {method.__api_method__}",
+            kind=CLIENT,
+            chat_id=getattr(method, "chat_id", None),
+        ):
+            return await make_request(bot, method)
@@ -0,0 +1,56 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import TelegramObject, Update
+
+from tgbot.services.update_executor import UpdateExecutor
+
+
+def register_first(dp: Dispatcher, middleware: BaseMiddleware):
+    """
+    Registers an outer middleware of updates ahead of the ones aiogram registered.
+    """
+    middlewares = list(dp.update.outer_middleware)
+    for registered in middlewares:
+        dp.update.outer_middleware.unregister(registered)
+
+    dp.update.outer_middleware(middleware)
+    for registered in middlewares:
+        dp.update.outer_middleware(registered)
+
+
+class UpdateExecutorMiddleware(BaseMiddleware):
+    """
+    Hands every update over to the UpdateExecutor and returns at once, so updates of
+    one chat are handled in order and updates of different chats concurrently.
+
+    Must be the first outer middleware of updates: the ones after it, FSM context
+    included, run when the update's turn comes, so they see the state left by the
+    previous update of the chat. Use setup() to register it.
+    """
+
+    def __init__(self, executor: UpdateExecutor) -> None:
+        self.executor = executor
+
+    def setup(self, dp: Dispatcher):
+        register_first(dp, self)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        context = UserContextMiddleware.resolve_event_context(event)
+        chat_id = context.chat_id or context.user_id
+        media_group_id = getattr(event.event, "media_group_id", None)
+
+        data["update_queued_at"] = time.time_ns()
+        self.executor.submit(chat_id, lambda: handler(event, data), media_group_id)
+        # Polling waits here when too many updates are queued
+        await self.executor.wait_for_room()
@@ -1,54 +1,63 @@
 from datetime import datetime
-from typing import Any, Tuple
-
 from aiogram import Bot
 from aiogram.enums import ParseMode
-from aiogram.types import DateTime, Message
-from aiogram.utils.formatting import Bold, HashTag, Text, as_list, as_section
+from aiogram.types import DateTime
+from aiogram.utils.formatting import (
+    Bold,
+    HashTag,
+    Text,
+    as_key_value,
+    as_list,
+    as_marked_list,
+    as_section,
+)
 from aiogram.utils.media_group import MediaGroupBuilder, MediaType
 from betterlogging import logging
 
+from tgbot.models.report_draft import PhotoRef, ReportDraft
 from tgbot.services import broadcaster
 
 logger = logging.getLogger(__name__)
 
 
 class ReportBuilder:
-    def __init__(self, data: dict[str, Any]):
+    def __init__(self, draft: ReportDraft):
         self.content: Text
         self.date: DateTime = datetime.today()
-        self.location: Text = data.get("location", "")
-        self.author: str | None = "@" + str(data.get("author"))
-        self.author_name: str | None = data.get("author_name")
-        self.location_text: Tuple[str] = (
-            self.location.as_kwargs()["text"] if self.location else (""),
+        self.draft = draft
+        self.location: Text | None = (
+            as_marked_list(
+                as_key_value("Филиал", draft.location_name),
+                as_key_value("Адрес", draft.address),
+            )
+            if draft.location_name
+            else None
         )
-        self.solarium_counter: list[Message] = data.get("solarium_counter", [])
+        self.location_tag: str = draft.location_name.replace(" ", "_") or "N/A"
+        self.author: str | None = "@" + str(draft.author)
+        self.author_name: str | None = draft.author_name
+        self.solarium_counter: list[PhotoRef] = draft.solarium_counter
         # Morning report
-        self.masters_quantity: dict[str, str] = data.get(
-            "masters_quantity", {"data": "N/A"}
-        )
-        self.latecomers: str | None = data.get("latecomers")
-        self.absent: str | None = data.get("absent")
-        self.open_check: list[Message] = data.get("open_check", [])
+        self.masters_quantity: dict[str, str] = draft.masters_quantity or {"data": "N/A"}
+        self.latecomers: str | None = draft.latecomers
+        self.absent: str | None = draft.absent
+        self.open_check: list[PhotoRef] = draft.open_check
         # Evening report
-        self.clients_lost: dict[str, str] = data.get("clients_lost", {"data": "N/A"})
-        self.total_clients: str | None = data.get("total_clients")
-        self.sbp_sum: str | None = data.get("sbp_sum")
-        self.daily_excel: list[Message] = data.get("daily_excel", [])
-        self.z_report: list[Message] = data.get("z_report", [])
-        self.day_resume: str | None = data.get("day_resume")
-        self.disgruntled_clients: str | None = data.get("disgruntled_clients")
-        self.argues_with_masters: str | None = data.get("argues_with_masters")
+        self.clients_lost: dict[str, str] = draft.clients_lost or {"data": "N/A"}
+        self.total_clients: str | None = draft.total_clients
+        self.sbp_sum: str | None = draft.sbp_sum
+        self.daily_excel: list[PhotoRef] = draft.daily_excel
+        self.z_report: list[PhotoRef] = draft.z_report
+        self.day_resume: str | None = draft.day_resume
+        self.disgruntled_clients: str | None = draft.disgruntled_clients
+        self.argues_with_masters: str | None = draft.argues_with_masters
 
     def construct_morning_report(self) -> str:
         content = as_list(
             Bold("Утренний отчет ☀️"),
             self.date.strftime("%d.%m.%y"),
-            HashTag(
-                self.location_text[0].split("\n")[0].split(": ")[1].replace(" ", "_")
-            ),
-            self.location.as_kwargs()["text"] if self.location else None,
+            HashTag(self.location_tag),
+            self.location,
             as_section(
                 Bold("Администратор:"),
                 f"{self.author_name} ({self.author})",
@@ -67,10 +76,8 @@ class ReportBuilder:
         content = as_list(
             Bold("Вечерний отчет 🌙"),
             self.date.strftime("%d.%m.%y"),
-            HashTag(
-                self.location_text[0].split("\n")[0].split(": ")[1].replace(" ", "_")
-            ),
-            self.location.as_kwargs()["text"] if self.location else None,
+            HashTag(self.location_tag),
+            self.location,
             as_section(
                 Bold("Администратор:"),
                 f"{self.author_name} ({self.author})",
@@ -93,15 +100,12 @@ class ReportBuilder:
 
     def build_album(self, parse_mode=ParseMode.MARKDOWN_V2) -> list[MediaType]:
         album_builder = MediaGroupBuilder(caption=self.content.as_markdown())
-        photo_messages = (
-            self.z_report + self.daily_excel + self.open_check + self.solarium_counter
-        )
-        logger.debug(f"----------Photo messages:\n{photo_messages}")
+        photos = self.draft.photos
+        logger.debug("----------Photos:\n%s", photos)
 
         [
-            album_builder.add_photo(media=m.photo[-1].file_id, parse_mode=parse_mode)
-            for m in photo_messages
-            if m.photo is not None
+            album_builder.add_photo(media=photo.file_id, parse_mode=parse_mode)
+            for photo in photos
         ]
 
         return album_builder.build()
@@ -115,9 +119,16 @@ async def on_report(
 ):
     try:
         logger.info("Sending report...")
-        await broadcaster.broadcast(
+        results = await broadcaster.broadcast(
             bot, admin_ids, report, parse_mode=ParseMode.MARKDOWN_V2, media=media
-        ) if bot else ...
+        ) if bot else []
+
+        for result in results:
+            if not result.ok:
+                logger.warning(
+                    f"Report not delivered to {result.chat_id} "
+                    f"after {result.attempts} attempts: {result.error}"
+                )
 
     except Exception as err:
         logging.exception(err)
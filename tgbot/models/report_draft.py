@@ -0,0 +1,155 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field, fields
+from typing import Any
+
+from aiogram import Bot
+from aiogram.types import Message
+
+
+@dataclass(slots=True, frozen=True)
+class MessageRef:
+    """
+    Reference to a sent message, enough to delete or edit it later.
+    Kept in FSM data as a [chat_id, message_id] list.
+    """
+
+    chat_id: int
+    message_id: int
+
+    @classmethod
+    def from_message(cls, message: Message) -> "MessageRef":
+        return cls(message.chat.id, message.message_id)
+
+    @classmethod
+    def load(cls, value: Any) -> "MessageRef | None":
+        """
+        Restores a reference from its FSM data value.
+        """
+        if value is None or isinstance(value, cls):
+            return value
+        return cls(*value)
+
+    def dump(self) -> list:
+        return [self.chat_id, self.message_id]
+
+    async def delete(self, bot: Bot) -> bool:
+        return await bot.delete_message(self.chat_id, self.message_id)
+
+
+@dataclass(slots=True, frozen=True)
+class PhotoRef:
+    """
+    Reference to a message with a photo, the largest size of the photo is kept.
+    Kept in FSM data as a [chat_id, message_id, file_id, file_unique_id] list.
+    """
+
+    chat_id: int
+    message_id: int
+    file_id: str
+    file_unique_id: str
+
+    @classmethod
+    def from_message(cls, message: Message) -> "PhotoRef | None":
+        """
+        Returns None if the message has no photo.
+        """
+        if not message.photo:
+            return None
+        photo = message.photo[-1]
+        return cls(message.chat.id, message.message_id, photo.file_id, photo.file_unique_id)
+
+    @classmethod
+    def load(cls, value: Any) -> "PhotoRef":
+        if isinstance(value, cls):
+            return value
+        return cls(*value)
+
+    def dump(self) -> list:
+        return [self.chat_id, self.message_id, self.file_id, self.file_unique_id]
+
+    async def delete(self, bot: Bot) -> bool:
+        return await bot.delete_message(self.chat_id, self.message_id)
+
+
+def message_ref(message: Message | None) -> list | None:
+    """
+    Converts a message to the compact value stored in FSM data.
+    :param message: Message to refer to, or None.
+    :return: [chat_id, message_id] list, None if there is no message.
+    """
+
+    return MessageRef.from_message(message).dump() if message is not None else None
+
+
+def photo_refs(messages: Iterable[Message]) -> list[list]:
+    """
+    Converts photo messages (e.g. an album) to the compact values stored in FSM data.
+    Messages without a photo are skipped.
+    :param messages: Messages to refer to.
+    :return: List of [chat_id, message_id, file_id, file_unique_id] lists.
+    """
+
+    return [
+        ref.dump()
+        for ref in map(PhotoRef.from_message, messages)
+        if ref is not None
+    ]
+
+
+# Draft fields holding lists of photo references
+PHOTO_FIELDS = ("open_check", "solarium_counter", "daily_excel", "z_report")
+
+
+@dataclass(slots=True)
+class ReportDraft:
+    """
+    Typed view of the report being filled in, as kept in FSM data.
+
+    FSM data holds only plain values: texts, location_id, and message references as
+    short lists, so a draft stays small in any storage.
+    """
+
+    daytime: str | None = None
+    author: str | None = None
+    author_name: str | None = None
+    location_id: int | None = None
+    location_name: str = ""
+    address: str = ""
+    has_solarium: bool = False
+    # Morning report
+    masters_quantity: dict[str, str] = field(default_factory=dict)
+    latecomers: str | None = None
+    absent: str | None = None
+    open_check: list[PhotoRef] = field(default_factory=list)
+    solarium_counter: list[PhotoRef] = field(default_factory=list)
+    # Evening report
+    clients_lost: dict[str, str] = field(default_factory=dict)
+    total_clients: str | None = None
+    sbp_sum: str | None = None
+    daily_excel: list[PhotoRef] = field(default_factory=list)
+    z_report: list[PhotoRef] = field(default_factory=list)
+    day_resume: str | None = None
+    disgruntled_clients: str | None = None
+    argues_with_masters: str | None = None
+
+    @classmethod
+    def from_state(cls, data: dict[str, Any]) -> "ReportDraft":
+        """
+        Builds a draft from FSM data, keys that aren't draft fields are ignored.
+        :param data: FSM data.
+        :return: ReportDraft.
+        """
+
+        names = {draft_field.name for draft_field in fields(cls)}
+        values = {key: value for key, value in data.items() if key in names}
+        for name in PHOTO_FIELDS:
+            if name in values:
+                values[name] = [PhotoRef.load(value) for value in values[name] or ()]
+        return cls(**values)
+
+    @property
+    def photos(self) -> list[PhotoRef]:
+        """
+        All report photos in the order they are sent to the owners.
+        """
+        return self.z_report + self.daily_excel + self.open_check + self.solarium_counter
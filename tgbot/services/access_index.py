@@ -0,0 +1,89 @@
+import asyncio
+from collections import defaultdict
+
+from betterlogging import logging
+
+from infrastructure.database.repo.requests import RequestsRepo
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccessIndex:
+    """
+    Bidirectional in-memory index over the user-location relationships.
+
+    Maps every location to the users receiving its reports and every user to the
+    locations they have access to. The index is loaded from the database once and
+    must be updated together with add_user_location, del_user_location and
+    del_user_by_id calls, through CacheSync when other processes run the bot too.
+    """
+
+    def __init__(self, session_pool) -> None:
+        self.session_pool = session_pool
+        self.users_by_location: defaultdict[int, set[int]] = defaultdict(set)
+        self.locations_by_user: defaultdict[int, set[int]] = defaultdict(set)
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def load(self):
+        """
+        Loads all relationships from the database, replacing the index content.
+        """
+        async with self._load_lock:
+            async with self.session_pool() as session:
+                pairs = await RequestsRepo(session).users.get_all_user_location_pairs()
+
+            self.users_by_location.clear()
+            self.locations_by_user.clear()
+            for user_id, location_id in pairs:
+                self.add(user_id, location_id)
+            self._loaded = True
+            logger.info(f"Access index: {len(pairs)} user-location relationships")
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as e:
+            # The index is loaded on first use then
+            logger.error(f"Error loading access index:\n {str(e)}")
+
+    async def _ensure_loaded(self):
+        if not self._loaded:
+            await self.load()
+
+    async def users_for(self, location_id: int | None) -> frozenset[int]:
+        """
+        Returns IDs of the users with access to the location.
+        """
+        await self._ensure_loaded()
+        return frozenset(self.users_by_location.get(location_id, ()))
+
+    async def locations_for(self, user_id: int) -> frozenset[int]:
+        """
+        Returns IDs of the locations the user has access to.
+        """
+        await self._ensure_loaded()
+        return frozenset(self.locations_by_user.get(user_id, ()))
+
+    async def has_access(self, user_id: int, location_id: int) -> bool:
+        await self._ensure_loaded()
+        return location_id in self.locations_by_user.get(user_id, ())
+
+    def invalidate(self):
+        """
+        Makes the index reload from the database on next access.
+        """
+        self._loaded = False
+
+    def add(self, user_id: int, location_id: int):
+        self.users_by_location[location_id].add(user_id)
+        self.locations_by_user[user_id].add(location_id)
+
+    def remove(self, user_id: int, location_id: int):
+        self.users_by_location[location_id].discard(user_id)
+        self.locations_by_user[user_id].discard(location_id)
+
+    def remove_user(self, user_id: int):
+        for location_id in self.locations_by_user.pop(user_id, set()):
+            self.users_by_location[location_id].discard(user_id)
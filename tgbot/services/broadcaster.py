@@ -1,12 +1,286 @@
 import asyncio
 import logging
-from typing import Union
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Union
 
 from aiogram import Bot
 from aiogram import exceptions
 from aiogram.enums import ParseMode
 from aiogram.types import InlineKeyboardMarkup, Message
 from aiogram.utils.media_group import MediaType
+from cachetools import TTLCache
+
+from tgbot.services.message_deleter import chunked, group_by_chat
+
+
+# Telegram allows about 30 messages per second overall and 1 per second per chat
+GLOBAL_RATE = 30.0
+PER_CHAT_RATE = 1.0
+MAX_RETRIES = 3
+# Backoff before retrying after network and server errors
+RETRY_BACKOFF = 0.5
+
+
+@dataclass
+class SendResult:
+    """
+    Outcome of delivering to one recipient.
+
+    Attributes:
+        chat_id (int | str): Recipient.
+        ok (bool): True if the message was delivered.
+        attempts (int): Requests made, retries included.
+        error (str | None): Last error if the message wasn't delivered.
+        retryable (bool): True if the message may still be delivered later,
+            i.e. the last error was a flood wait, a network or a server error.
+    """
+
+    chat_id: Union[int, str]
+    ok: bool
+    attempts: int
+    error: str | None = None
+    retryable: bool = False
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: allows `rate` acquisitions per second on average,
+    with bursts of up to `capacity`. Can be paused, e.g. on a flood wait.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated_at: float | None = None
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """
+        Stops handing out tokens for the given number of seconds.
+        """
+        now = asyncio.get_running_loop().time()
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    async def acquire(self):
+        # Waiters are served in order
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                if self.updated_at is not None:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                    )
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Broadcaster:
+    """
+    Sends messages to many recipients concurrently, within a global rate limit and
+    a per-chat one. A flood wait returned for any recipient pauses all senders.
+    Failed requests are retried at most max_retries times.
+    """
+
+    def __init__(
+        self,
+        rate: float = GLOBAL_RATE,
+        per_chat_rate: float = PER_CHAT_RATE,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.bucket = TokenBucket(rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets: TTLCache[Union[int, str], TokenBucket] = TTLCache(
+            maxsize=10000, ttl=60
+        )
+        self.max_retries = max_retries
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, 1)
+        return bucket
+
+    async def deliver(
+        self, chat_id: Union[int, str], request: Callable[[], Awaitable[Any]]
+    ) -> SendResult:
+        """
+        Makes a request to one chat within the rate limits, retrying it if needed.
+        :param chat_id: Recipient.
+        :param request: Function making the request, called once per attempt.
+        :return: SendResult.
+        """
+
+        attempts = 0
+        while True:
+            attempts += 1
+            chat_bucket = self._chat_bucket(chat_id)
+            await chat_bucket.acquire()
+            await self.bucket.acquire()
+
+            try:
+                await request()
+
+            except exceptions.TelegramRetryAfter as e:
+                logging.error(
+                    f"Target [ID:{chat_id}]: Flood limit is exceeded. Sleep {e.retry_after} seconds."
+                )
+                # Every sender waits, not only this one
+                self.bucket.pause(e.retry_after)
+                chat_bucket.pause(e.retry_after)
+                error = e
+
+            except (exceptions.TelegramNetworkError, exceptions.TelegramServerError) as e:
+                logging.error(f"Target [ID:{chat_id}]: {e}")
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempts - 1))
+                error = e
+
+            except exceptions.TelegramBadRequest as e:
+                logging.error(f"Telegram server says - {e}")
+                return SendResult(chat_id, False, attempts, str(e))
+            except exceptions.TelegramForbiddenError as e:
+                logging.error(f"Target [ID:{chat_id}]: got TelegramForbiddenError")
+                return SendResult(chat_id, False, attempts, str(e))
+            except exceptions.TelegramAPIError as e:
+                logging.exception(f"Target [ID:{chat_id}]: failed")
+                return SendResult(chat_id, False, attempts, str(e))
+
+            else:
+                logging.info(f"Target [ID:{chat_id}]: success")
+                return SendResult(chat_id, True, attempts)
+
+            if attempts > self.max_retries:
+                return SendResult(chat_id, False, attempts, str(error), retryable=True)
+
+    async def send_message(
+        self,
+        bot: Bot,
+        user_id: Union[int, str],
+        text: str,
+        disable_notification: bool = False,
+        reply_markup: InlineKeyboardMarkup | None = None,
+        parse_mode: ParseMode | None = None,
+        media: list[MediaType] = [],
+    ) -> SendResult:
+        async def request():
+            if len(media) == 0:
+                await bot.send_message(
+                    user_id,
+                    text,
+                    disable_notification=disable_notification,
+                    reply_markup=reply_markup,
+                    parse_mode=parse_mode,
+                )
+            else:
+                await bot.send_media_group(
+                    user_id,
+                    media,
+                    disable_notification=disable_notification,
+                )
+
+        return await self.deliver(user_id, request)
+
+    async def broadcast(
+        self,
+        bot: Bot,
+        users: list[Union[int, str]],
+        text: str,
+        disable_notification: bool = False,
+        reply_markup: InlineKeyboardMarkup | None = None,
+        parse_mode: ParseMode | None = None,
+        media: list[MediaType] = [],
+    ) -> list[SendResult]:
+        return list(
+            await asyncio.gather(
+                *(
+                    self.send_message(
+                        bot,
+                        user_id,
+                        text,
+                        disable_notification,
+                        reply_markup,
+                        parse_mode,
+                        media,
+                    )
+                    for user_id in users
+                )
+            )
+        )
+
+    async def broadcast_messages_copies(
+        self,
+        users: list[Union[int, str]],
+        messages: list[Message],
+        disable_notification: bool = False,
+    ) -> list[SendResult]:
+        # copyMessages copies up to 100 messages of one chat, in message_id order
+        sources = [
+            (from_chat_id, list(chunk))
+            for from_chat_id, message_ids in group_by_chat(messages).items()
+            for chunk in chunked(sorted(set(message_ids)))
+        ]
+        copies = {(message.chat.id, message.message_id): message for message in messages}
+
+        async def copy_to(user_id: Union[int, str]) -> SendResult:
+            result = SendResult(user_id, True, 0)
+            for from_chat_id, message_ids in sources:
+                bot = copies[from_chat_id, message_ids[0]].bot
+                refused = False
+
+                async def copy_bulk():
+                    nonlocal refused
+                    try:
+                        await bot.copy_messages(
+                            user_id,
+                            from_chat_id,
+                            message_ids,
+                            disable_notification=disable_notification,
+                        )
+                    except exceptions.TelegramBadRequest:
+                        refused = True
+                        raise
+
+                chunk_result = await self.deliver(user_id, copy_bulk)
+                result.attempts += chunk_result.attempts
+
+                if refused:
+                    # Bulk call refused, copy the messages one by one
+                    logging.info(
+                        f"Target [ID:{user_id}]: copying {len(message_ids)} messages one by one"
+                    )
+                    for message_id in message_ids:
+                        message = copies[from_chat_id, message_id]
+                        chunk_result = await self.deliver(
+                            user_id,
+                            lambda: message.send_copy(
+                                user_id, disable_notification=disable_notification
+                            ),
+                        )
+                        result.attempts += chunk_result.attempts
+                        if not chunk_result.ok:
+                            result.ok, result.error = False, chunk_result.error
+                            result.retryable = chunk_result.retryable
+
+                elif not chunk_result.ok:
+                    result.ok, result.error = False, chunk_result.error
+                    result.retryable = chunk_result.retryable
+            return result
+
+        return list(await asyncio.gather(*(copy_to(user_id) for user_id in users)))
+
+
+# Shared by all senders of the process, so the limits hold across broadcasts
+default_broadcaster = Broadcaster()
 
 
 async def send_message(
@@ -17,7 +291,7 @@ async def send_message(
     reply_markup: InlineKeyboardMarkup | None = None,
     parse_mode: ParseMode | None = None,
     media: list[MediaType] = [],
-) -> bool:
+) -> SendResult:
     """
     Safe messages sender
 
@@ -27,42 +301,12 @@ async def send_message(
     :param disable_notification: disable notification or not.
     :param reply_markup: reply markup.
     :param media: list of media, only if sending meadiafile or album.
-    :return: success.
+    :return: SendResult.
     """
 
-    try:
-        if len(media) == 0:
-            await bot.send_message(
-                user_id,
-                text,
-                disable_notification=disable_notification,
-                reply_markup=reply_markup,
-                parse_mode=parse_mode,
-            )
-        else:
-            await bot.send_media_group(
-                user_id,
-                media,
-                disable_notification=disable_notification,
-            )
-    except exceptions.TelegramBadRequest as e:
-        logging.error(f"Telegram server says - {e}")
-    except exceptions.TelegramForbiddenError:
-        logging.error(f"Target [ID:{user_id}]: got TelegramForbiddenError")
-    except exceptions.TelegramRetryAfter as e:
-        logging.error(
-            f"Target [ID:{user_id}]: Flood limit is exceeded. Sleep {e.retry_after} seconds."
-        )
-        await asyncio.sleep(e.retry_after)
-        return await send_message(
-            bot, user_id, text, disable_notification, reply_markup, parse_mode, media
-        )  # Recursive call
-    except exceptions.TelegramAPIError:
-        logging.exception(f"Target [ID:{user_id}]: failed")
-    else:
-        logging.info(f"Target [ID:{user_id}]: success")
-        return True
-    return False
+    return await default_broadcaster.send_message(
+        bot, user_id, text, disable_notification, reply_markup, parse_mode, media
+    )
 
 
 async def broadcast(
@@ -73,69 +317,54 @@ async def broadcast(
     reply_markup: InlineKeyboardMarkup | None = None,
     parse_mode: ParseMode | None = None,
     media=[],
-) -> int:
+) -> list[SendResult]:
     """
-    Simple broadcaster.
+    Concurrent broadcaster, within the Telegram rate limits.
     :param bot: Bot instance.
     :param users: List of users.
     :param text: Text of the message.
     :param disable_notification: Disable notification or not.
     :param reply_markup: Reply markup.
     :parse_mode: Parse mode, default is MARKDOWN_V2.
-    :return: Count of messages.
+    :return: SendResult for every user.
     """
 
-    logging.info(
-        f"\n-------Broadcast Content-------\nBroadcasting text...:\n{text}\n----------\nBroadcasting media...:\n{media}"
+    logging.debug(
+        "\n-------Broadcast Content-------\nBroadcasting text...:\n%s\n----------\nBroadcasting media...:\n%s",
+        text,
+        media,
     )
 
-    count = 0
+    results = []
     try:
-        for user_id in users:
-            if await send_message(
-                bot,
-                user_id,
-                text,
-                disable_notification,
-                reply_markup,
-                parse_mode,
-                media,
-            ):
-                count += 1
-            await asyncio.sleep(
-                0.05
-            )  # 20 messages per second (Limit: 30 messages per second)
+        results = await default_broadcaster.broadcast(
+            bot, users, text, disable_notification, reply_markup, parse_mode, media
+        )
     finally:
-        logging.info(f"{count} messages successful sent.")
+        logging.info(f"{sum(result.ok for result in results)} messages successful sent.")
 
-    return count
+    return results
 
 
 async def broadcast_messages_copies(
     users: list[Union[str, int]],
     messages: list[Message],
     disable_notification: bool = False,
-) -> int:
+) -> list[SendResult]:
     """
-    Simple broadcaster.
-    :param bot: Bot instance.
+    Concurrent broadcaster of message copies, within the Telegram rate limits.
     :param users: List of users.
-    :param message: Message.
+    :param messages: Messages to copy, in order.
     :param disable_notification: Disable notification or not.
-    :return: Count of messages.
+    :return: SendResult for every user.
     """
-    count = 0
+
+    results = []
     try:
-        for user_id in users:
-            for message in messages:
-                if await message.send_copy(
-                    user_id, disable_notification=disable_notification
-                ):
-                    count += 1
-            await asyncio.sleep(
-                0.05
-            )  # 20 messages per second (Limit: 30 messages per second)
+        results = await default_broadcaster.broadcast_messages_copies(
+            users, messages, disable_notification
+        )
     finally:
-        logging.info(f"{count} messages successful copied.")
+        logging.info(f"{sum(result.ok for result in results)} messages successful copied.")
 
-    return count
+    return results
@@ -0,0 +1,102 @@
+import copy
+from collections.abc import Mapping
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType
+
+
+_UNSET: Any = object()
+
+
+class BufferedFSMContext(FSMContext):
+    """
+    FSMContext that reads the state and data from the storage at most once and keeps
+    all changes in memory until flush().
+
+    Attributes:
+        calls (int): Reads and writes made by handlers.
+        round_trips (int): Requests actually made to the storage.
+    """
+
+    def __init__(self, context: FSMContext, raw_state: str | None | Any = _UNSET):
+        """
+        :param context: Context to buffer, its storage and key are used.
+        :param raw_state: State already read by the FSM middleware, saves a read.
+        """
+        super().__init__(storage=context.storage, key=context.key)
+        self._state = raw_state
+        self._data: dict[str, Any] | None = None
+        self._state_changed = False
+        self._data_changed = False
+        self.calls = 0
+        self.round_trips = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return self._state_changed or self._data_changed
+
+    async def _load_data(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = await self.storage.get_data(key=self.key)
+            self.round_trips += 1
+        return self._data
+
+    async def set_state(self, state: StateType = None) -> None:
+        self.calls += 1
+        self._state = state.state if isinstance(state, State) else state
+        self._state_changed = True
+
+    async def get_state(self) -> str | None:
+        self.calls += 1
+        if self._state is _UNSET:
+            self._state = await self.storage.get_state(key=self.key)
+            self.round_trips += 1
+        return self._state
+
+    async def set_data(self, data: Mapping[str, Any]) -> None:
+        self.calls += 1
+        self._data = copy.deepcopy(dict(data))
+        self._data_changed = True
+
+    async def get_data(self) -> dict[str, Any]:
+        self.calls += 1
+        # Handlers may change the returned dict, as with a storage round-trip
+        return copy.deepcopy(await self._load_data())
+
+    async def get_value(self, key: str, default: Any | None = None) -> Any | None:
+        self.calls += 1
+        return copy.deepcopy((await self._load_data()).get(key, default))
+
+    async def update_data(
+        self,
+        data: Mapping[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        self.calls += 1
+        if data:
+            kwargs.update(data)
+        (await self._load_data()).update(copy.deepcopy(kwargs))
+        self._data_changed = True
+        return copy.deepcopy(self._data)
+
+    async def clear(self) -> None:
+        self.calls += 1
+        self._state = None
+        self._data = {}
+        self._state_changed = self._data_changed = True
+
+    async def flush(self) -> None:
+        """
+        Writes the changed state and data to the storage, one request for each.
+        """
+        if self._state_changed:
+            await self.storage.set_state(key=self.key, state=self._state)
+            self.round_trips += 1
+            self._state_changed = False
+
+        if self._data_changed:
+            await self.storage.set_data(key=self.key, data=self._data or {})
+            self.round_trips += 1
+            self._data_changed = False
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import uuid
+from contextlib import suppress
+
+from betterlogging import logging
+from redis.asyncio import Redis
+
+from infrastructure.database.models import Location
+from tgbot.services.access_index import AccessIndex
+from tgbot.services.locations_catalog import LocationCatalog
+from tgbot.services.roles import RoleIndex
+from tgbot.services.user_cache import UserProfileCache
+
+
+logger = logging.getLogger(__name__)
+
+# Redis channel the processes of the bot publish their cache changes on
+CHANNEL = "tgbot:cache"
+# Seconds before subscribing again after the connection to Redis was lost
+RESUBSCRIBE_DELAY = 1.0
+
+
+class CacheSync:
+    """
+    Keeps the in-memory caches of all the bot's processes in step.
+
+    Handlers change the caches through this class once their writes are committed.
+    The change is applied in this process and published on a Redis channel; the
+    other processes apply it when they receive it. Locations changed elsewhere
+    make the catalog reload from the database.
+
+    Changes published while a process isn't subscribed are lost, so after
+    subscribing again the access index and the catalog are reloaded, and cached
+    roles dropped. Without Redis only the caches of this process change.
+    """
+
+    def __init__(
+        self,
+        access_index: AccessIndex,
+        location_catalog: LocationCatalog,
+        user_cache: UserProfileCache | None = None,
+        role_index: RoleIndex | None = None,
+        redis: Redis | None = None,
+    ) -> None:
+        self.access_index = access_index
+        self.location_catalog = location_catalog
+        self.user_cache = user_cache
+        self.role_index = role_index
+        self.redis = redis
+        # Messages of this process come back from the channel and are skipped
+        self.origin = uuid.uuid4().hex
+        self.published_total = 0
+        self.received_total = 0
+        self._subscribed = asyncio.Event()
+        self._listen_task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def add_access(self, user_id: int, location_id: int):
+        self.access_index.add(user_id, location_id)
+        self._publish("add_access", user_id, location_id)
+
+    def remove_access(self, user_id: int, location_id: int):
+        self.access_index.remove(user_id, location_id)
+        self._publish("remove_access", user_id, location_id)
+
+    def remove_user(self, user_id: int):
+        """
+        Forgets a deleted user: the profile, the role and the access.
+        """
+        self._forget_user(user_id)
+        self._publish("remove_user", user_id)
+
+    def apply_locations(self, *locations: Location):
+        self.location_catalog.apply(*locations)
+        self._publish("locations")
+
+    def _forget_user(self, user_id: int):
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
+        if self.role_index is not None:
+            self.role_index.invalidate(user_id)
+        self.access_index.remove_user(user_id)
+
+    def _publish(self, change: str, *args: int):
+        if self.redis is None:
+            return
+
+        message = json.dumps({"origin": self.origin, "change": change, "args": args})
+        task = asyncio.create_task(self.redis.publish(CHANNEL, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        if (error := task.exception()) is not None:
+            logger.error(f"Error publishing a cache change:\n {str(error)}")
+            return
+        self.published_total += 1
+
+    def receive(self, data: str | bytes):
+        """
+        Applies a change published by another process.
+        """
+        message = json.loads(data)
+        if message["origin"] == self.origin:
+            return
+
+        change, args = message["change"], message["args"]
+        if change == "add_access":
+            self.access_index.add(*args)
+        elif change == "remove_access":
+            self.access_index.remove(*args)
+        elif change == "remove_user":
+            self._forget_user(*args)
+        elif change == "locations":
+            self.location_catalog.invalidate()
+        else:
+            logger.warning(f"Unknown cache change: {change}")
+            return
+        self.received_total += 1
+
+    def reload(self):
+        """
+        Makes the caches shared with the other processes reload from the database.
+        """
+        self.access_index.invalidate()
+        self.location_catalog.invalidate()
+        if self.role_index is not None:
+            self.role_index.invalidate()
+
+    async def _listen(self):
+        first = True
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    if not first:
+                        self.reload()
+                    first = False
+                    self._subscribed.set()
+                    logger.info(f"Subscribed to cache changes on {CHANNEL}")
+
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.receive(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Error receiving cache changes:\n {str(e)}")
+
+            self._subscribed.clear()
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def start(self):
+        if self.redis is not None and self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen())
+
+    async def wait_subscribed(self):
+        await self._subscribed.wait()
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listen_task
+            self._listen_task = None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "published_total": self.published_total,
+            "received_total": self.received_total,
+        }
@@ -0,0 +1,87 @@
+import json
+from typing import Any, Callable
+
+from aiogram import Bot, types
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
+
+from tgbot.config import RedisConfig
+
+
+# Marks a Telegram object (e.g. a stored bot message) in the serialized FSM data
+TELEGRAM_TYPE_KEY = "__telegram__"
+
+
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, types.TelegramObject):
+        return {
+            TELEGRAM_TYPE_KEY: type(obj).__name__,
+            "data": obj.model_dump(mode="json", exclude_none=True),
+        }
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} can't be stored in FSM data")
+
+
+def json_dumps(data: Any) -> str:
+    """
+    Serializes FSM data, Telegram objects included.
+    :param data: FSM data dict.
+    :return: JSON string.
+    """
+
+    return json.dumps(data, default=_encode, ensure_ascii=False)
+
+
+def make_json_loads(bot: Bot | None = None) -> Callable[[str | bytes], Any]:
+    """
+    Returns a deserializer for json_dumps output.
+    :param bot: Bot the restored Telegram objects are bound to, so that methods
+        like message.delete() keep working.
+    :return: Function converting a JSON string back to FSM data.
+    """
+
+    context = {"bot": bot} if bot is not None else {}
+
+    def object_hook(obj: dict) -> Any:
+        type_name = obj.get(TELEGRAM_TYPE_KEY)
+        if type_name is None:
+            return obj
+
+        telegram_type = getattr(types, type_name, None)
+        if not isinstance(telegram_type, type) or not issubclass(
+            telegram_type, types.TelegramObject
+        ):
+            raise ValueError(f"Unknown Telegram type in FSM data: {type_name}")
+        return telegram_type.model_validate(obj["data"], context=context)
+
+    def json_loads(value: str | bytes) -> Any:
+        return json.loads(value, object_hook=object_hook)
+
+    return json_loads
+
+
+def create_redis_storage(
+    config: RedisConfig, bot: Bot | None = None, redis: Redis | None = None
+) -> RedisStorage:
+    """
+    Creates FSM storage shared by all the bot processes.
+    :param config: Redis configuration.
+    :param bot: Bot that restored messages are bound to.
+    :param redis: Redis client to use instead of connecting to config.dsn(),
+        e.g. fakeredis.aioredis.FakeRedis() to run without a Redis server.
+    :return: RedisStorage.
+    """
+
+    if redis is None:
+        redis = Redis.from_url(config.dsn())
+
+    return RedisStorage(
+        redis=redis,
+        # aiogram_dialog keeps its stacks under a separate destiny
+        key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
+        state_ttl=config.state_ttl,
+        data_ttl=config.data_ttl,
+        json_loads=make_json_loads(bot),
+        json_dumps=json_dumps,
+    )
@@ -0,0 +1,116 @@
+import asyncio
+
+from aiogram.types import InlineKeyboardMarkup
+from betterlogging import logging
+from cachetools import LRUCache
+
+from infrastructure.database.models import Location
+from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.keyboards.inline import locations_keyboard
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocationCatalog:
+    """
+    In-memory catalog of all locations.
+
+    Rows are loaded from the database once, on first use. Every change applied
+    to the catalog bumps its version, and rendered locations keyboards are cached
+    per version, so the report flow needs no database round-trip.
+    """
+
+    def __init__(self, session_pool, keyboards_maxsize: int = 1000) -> None:
+        self.session_pool = session_pool
+        self.version = 0
+        self.locations: dict[int, Location] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._sorted: list[Location] | None = None
+        self._keyboards: LRUCache = LRUCache(maxsize=keyboards_maxsize)
+
+    async def load(self):
+        """
+        Loads all locations from the database, replacing the catalog content.
+        """
+        async with self._load_lock:
+            async with self.session_pool() as session:
+                locations = await RequestsRepo(session).locations.get_all_locations()
+
+            self.locations = {
+                location.location_id: self._snapshot(location) for location in locations
+            }
+            self._loaded = True
+            self._bump()
+            logger.info(f"Location catalog v{self.version}: {len(self.locations)} locations")
+
+    async def _ensure_loaded(self):
+        if not self._loaded:
+            await self.load()
+
+    async def get_all(self) -> list[Location]:
+        await self._ensure_loaded()
+        if self._sorted is None:
+            self._sorted = sorted(
+                self.locations.values(), key=lambda location: location.location_name
+            )
+        return self._sorted
+
+    async def get(self, location_id: int) -> Location | None:
+        await self._ensure_loaded()
+        return self.locations.get(location_id)
+
+    async def keyboard(
+        self, user_id: int | None = None, location_ids: frozenset[int] | None = None
+    ) -> InlineKeyboardMarkup:
+        """
+        Returns the locations keyboard rendered for the current catalog version.
+        :param user_id: User ID packed into the callback data of the buttons.
+        :param location_ids: Locations to offer, e.g. the ones the user has access to;
+            all of them if None.
+        :return: InlineKeyboardMarkup.
+        """
+        locations = await self.get_all()
+        key = (user_id, location_ids)
+        markup = self._keyboards.get(key)
+        if markup is None:
+            if location_ids is not None:
+                locations = [
+                    location
+                    for location in locations
+                    if location.location_id in location_ids
+                ]
+            markup = locations_keyboard(locations, user_id)
+            self._keyboards[key] = markup
+        return markup
+
+    def apply(self, *locations: Location):
+        """
+        Puts created or updated locations into the catalog and bumps its version.
+        """
+        for location in locations:
+            self.locations[location.location_id] = self._snapshot(location)
+        self._bump()
+
+    def invalidate(self):
+        """
+        Makes the catalog reload from the database on next access.
+        """
+        self._loaded = False
+        self._bump()
+
+    def _bump(self):
+        self.version += 1
+        self._sorted = None
+        self._keyboards.clear()
+
+    @staticmethod
+    def _snapshot(location: Location) -> Location:
+        # Detached copy, so the catalog doesn't depend on the state of a handler's session
+        return Location(
+            location_id=location.location_id,
+            location_name=location.location_name,
+            address=location.address,
+            has_solarium=location.has_solarium,
+        )
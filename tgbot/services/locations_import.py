@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import IO
+
+from betterlogging import logging
+from sqlalchemy.exc import SQLAlchemyError
+
+from infrastructure.database.models import Location
+from infrastructure.database.repo.requests import RequestsRepo
+
+
+logger = logging.getLogger(__name__)
+
+# Rows written with one multi-row statement
+CHUNK_SIZE = 200
+
+FIELD_ALIASES = {"id": "location_id", "title": "location_name"}
+LOCATION_FIELDS = ("location_id", "location_name", "address", "has_solarium")
+TRUE_VALUES = ("1", "true", "yes", "y", "да", "+")
+FALSE_VALUES = ("", "0", "false", "no", "n", "нет", "-")
+
+
+@dataclass
+class ImportReport:
+    """
+    Result of a locations import.
+
+    Attributes:
+        imported (list[Location]): Created or updated locations.
+        errors (list[tuple[int, str]]): Row number and error for every rejected row,
+            row 0 refers to the whole document.
+    """
+
+    imported: list[Location] = field(default_factory=list)
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+def normalize_row(raw: dict) -> dict:
+    """
+    Validates a parsed row and converts it to get_or_upsert_location arguments.
+    :param raw: Row as parsed from JSON or CSV.
+    :return: Dict with location_name, address, has_solarium and optional location_id.
+    """
+
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+
+    row = {}
+    for key, value in raw.items():
+        key = FIELD_ALIASES.get(str(key).strip(), str(key).strip())
+        if key not in LOCATION_FIELDS:
+            raise ValueError(f"unknown field {key!r}")
+        row[key] = value.strip() if isinstance(value, str) else value
+
+    for key in ("location_name", "address"):
+        if not row.get(key):
+            raise ValueError(f"{key} is required")
+        if len(str(row[key])) > 128:
+            raise ValueError(f"{key} is longer than 128 characters")
+        row[key] = str(row[key])
+
+    location_id = row.pop("location_id", None)
+    if location_id not in (None, ""):
+        if isinstance(location_id, bool) or not str(location_id).isdigit():
+            raise ValueError(f"location_id must be a positive integer, got {location_id!r}")
+        row["location_id"] = int(location_id)
+
+    has_solarium = row.get("has_solarium", False)
+    if isinstance(has_solarium, str):
+        if has_solarium.lower() in TRUE_VALUES:
+            has_solarium = True
+        elif has_solarium.lower() in FALSE_VALUES:
+            has_solarium = False
+    if not isinstance(has_solarium, bool):
+        raise ValueError(f"has_solarium must be a boolean, got {has_solarium!r}")
+    row["has_solarium"] = has_solarium
+
+    return row
+
+
+def read_rows(
+    stream: IO[bytes], file_name: str | None = None
+) -> Iterator[tuple[int, dict | Exception]]:
+    """
+    Parses locations from a binary stream, row by row.
+    CSV (.csv) and JSON lines (.jsonl, .ndjson) are read incrementally, anything else
+    is parsed as a JSON array.
+    :param stream: Binary stream with the document.
+    :param file_name: Name of the document, used to detect its format.
+    :return: Iterator of row number and normalized row, or the exception that rejected it.
+    """
+
+    extension = file_name.rsplit(".", 1)[-1].lower() if file_name and "." in file_name else ""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    try:
+        if extension == "csv":
+            sample = text_stream.read(4096)
+            text_stream.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            raw_rows = enumerate(csv.DictReader(text_stream, dialect=dialect), start=1)
+
+        elif extension in ("jsonl", "ndjson"):
+            raw_rows = (
+                (line_number, line)
+                for line_number, line in enumerate(text_stream, start=1)
+                if line.strip()
+            )
+
+        else:
+            document = json.load(text_stream)
+            if not isinstance(document, list):
+                raise ValueError("JSON document must be a list of locations")
+            raw_rows = enumerate(document, start=1)
+
+        for row_number, raw in raw_rows:
+            try:
+                if isinstance(raw, str):
+                    raw = json.loads(raw)
+                yield row_number, normalize_row(raw)
+            except ValueError as e:
+                yield row_number, e
+
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        yield 0, e
+
+    finally:
+        text_stream.detach()
+
+
+async def import_locations(
+    repo: RequestsRepo,
+    rows: Iterable[tuple[int, dict | Exception]],
+    chunk_size: int = CHUNK_SIZE,
+) -> ImportReport:
+    """
+    Writes parsed rows with one multi-row upsert per chunk, all in a single transaction,
+    committed here or, in unit-of-work mode, by the owner of the unit.
+    A chunk that fails is rolled back to its savepoint and retried row by row,
+    so a bad row is reported without losing the rest of the chunk.
+    :param repo: Repository to write with.
+    :param rows: Row number and row (or parsing error) pairs, as read_rows yields them.
+    :param chunk_size: Number of rows written with one statement.
+    :return: ImportReport.
+    """
+
+    report = ImportReport()
+    chunk: list[tuple[int, dict]] = []
+
+    for row_number, row in rows:
+        if isinstance(row, Exception):
+            report.errors.append((row_number, str(row)))
+            continue
+
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            await _import_chunk(repo, chunk, report)
+            chunk = []
+
+    if chunk:
+        await _import_chunk(repo, chunk, report)
+
+    await repo.commit()
+    return report
+
+
+async def _import_chunk(
+    repo: RequestsRepo, chunk: list[tuple[int, dict]], report: ImportReport
+):
+    # One statement can't update the same row twice, the last duplicate wins
+    unique_rows: dict[tuple, tuple[int, dict]] = {}
+    for row_number, row in chunk:
+        key = (
+            ("location_id", row["location_id"])
+            if "location_id" in row
+            else ("location_name", row["location_name"])
+        )
+        if key in unique_rows:
+            report.errors.append(
+                (unique_rows[key][0], f"overridden by row {row_number}")
+            )
+        unique_rows[key] = (row_number, row)
+
+    try:
+        async with repo.savepoint():
+            report.imported.extend(
+                await repo.locations.upsert_locations(
+                    [row for _, row in unique_rows.values()]
+                )
+            )
+        return
+
+    except SQLAlchemyError as e:
+        logger.warning(f"Chunk of {len(unique_rows)} locations failed, retrying by row: {e}")
+
+    for row_number, row in unique_rows.values():
+        try:
+            async with repo.savepoint():
+                report.imported.extend(await repo.locations.upsert_locations([row]))
+        except SQLAlchemyError as e:
+            report.errors.append((row_number, str(getattr(e, "orig", None) or e)))
@@ -0,0 +1,84 @@
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+
+
+def brief(value: Any) -> Any:
+    """
+    Replaces messages in FSM data with short references, for logging.
+    """
+    if isinstance(value, Message):
+        return f"<Message {value.chat.id}:{value.message_id}>"
+    if isinstance(value, dict):
+        return {key: brief(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [brief(item) for item in value]
+    return value
+
+
+async def log_state(
+    logger: logging.Logger,
+    state: FSMContext,
+    text: str = "",
+    data: bool = True,
+    level: int = logging.DEBUG,
+):
+    """
+    Logs the FSM state and data of a handler, reading them from the storage
+    only if the level is enabled.
+    The record is "<text> <state>, <data>", state and data are also passed
+    as the fsm_state and fsm_data attributes of the record.
+    :param logger: Logger of the handler.
+    :param state: FSM context.
+    :param text: Text before the state.
+    :param data: Whether to log the data along with the state.
+    :param level: Level of the record.
+    """
+
+    if not logger.isEnabledFor(level):
+        return
+
+    current_state = await state.get_state()
+    state_data = brief(await state.get_data()) if data else None
+
+    msg = f"{text} %s" if text else "%s"
+    args: tuple = (current_state,)
+    if data:
+        msg += ", %s"
+        args += (state_data,)
+
+    logger.log(
+        level,
+        msg,
+        *args,
+        extra={"fsm_state": current_state, "fsm_data": state_data},
+        stacklevel=2,
+    )
+
+
+def setup_queue_logging() -> QueueListener:
+    """
+    Moves the root logger's handlers to a thread behind a queue, so writing log
+    records to stdout or files never blocks the event loop.
+    The listener is stopped, and the queue flushed, on exit.
+    :return: The started listener.
+    """
+
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, QueueHandler):
+            return handler.listener
+
+    queue: SimpleQueue = SimpleQueue()
+    handler = QueueHandler(queue)
+    handler.listener = QueueListener(queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [handler]
+
+    handler.listener.start()
+    atexit.register(handler.listener.stop)
+    return handler.listener
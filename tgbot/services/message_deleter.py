@@ -0,0 +1,183 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from typing import TypeVar
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+from betterlogging import logging
+
+from tgbot.models.report_draft import MessageRef, PhotoRef
+
+
+logger = logging.getLogger(__name__)
+
+# Bot API limit of copyMessages and deleteMessages
+BULK_LIMIT = 100
+# Attempts of a deletion request answered with a flood wait
+MAX_ATTEMPTS = 3
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int = BULK_LIMIT) -> Iterable[Sequence[T]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def group_by_chat(
+    messages: Iterable[Message | MessageRef | PhotoRef],
+) -> dict[int, list[int]]:
+    """
+    Groups message IDs by chat, keeping their order.
+    :param messages: Messages or references to them.
+    :return: Dict of chat_id to list of message IDs.
+    """
+    groups: dict[int, list[int]] = {}
+    for message in messages:
+        chat_id = message.chat.id if isinstance(message, Message) else message.chat_id
+        groups.setdefault(chat_id, []).append(message.message_id)
+
+    return groups
+
+
+async def _request(send: Callable[[], Awaitable[T]]) -> T:
+    """
+    Makes a request, waiting out flood waits between attempts.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return await send()
+        except TelegramRetryAfter as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            logger.debug(f"Flood limit is exceeded. Sleep {e.retry_after} seconds.")
+            await asyncio.sleep(e.retry_after)
+
+
+async def delete_messages(
+    bot: Bot | None, messages: Iterable[Message | MessageRef | PhotoRef | None]
+):
+    """
+    Deletes messages with one deleteMessages call per chat and 100 messages.
+    Flood waits are waited out. Messages of a chunk are deleted one by one only if
+    the bulk call is rejected as a bad request, e.g. when one of them is too old
+    to be deleted; other errors drop the chunk.
+    :param bot: Bot instance.
+    :param messages: Messages or references to them, None values are skipped.
+    """
+    if bot is None:
+        return
+
+    groups = group_by_chat(message for message in messages if message is not None)
+    for chat_id, message_ids in groups.items():
+        for chunk in chunked(message_ids):
+            try:
+                await _request(lambda: bot.delete_messages(chat_id, list(chunk)))
+                continue
+            except TelegramBadRequest as e:
+                logger.debug(e.message, exc_info=False)
+            except TelegramAPIError as e:
+                logger.warning(f"Messages in chat {chat_id} not deleted: {e.message}")
+                continue
+
+            for message_id in chunk:
+                try:
+                    await _request(lambda: bot.delete_message(chat_id, message_id))
+                except TelegramAPIError as e:
+                    logger.debug(e.message, exc_info=False)
+
+
+class MessageDeleter:
+    """
+    Deletes messages in the background, so handlers don't wait for the Bot API.
+
+    Messages handed to schedule() are collected per chat for window seconds after
+    the first one, then deleted with bulk calls. Messages already deleted or not
+    found are skipped by the Bot API, other errors are logged and dropped.
+    """
+
+    def __init__(self, window: float = 0.3) -> None:
+        self.window = window
+        # chat_id -> (bot, message IDs in order, without duplicates)
+        self.pending: dict[int, tuple[Bot, dict[int, None]]] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.scheduled_total = 0
+        self.requests_total = 0
+
+    def schedule(
+        self, bot: Bot | None, messages: Iterable[Message | MessageRef | PhotoRef | None]
+    ):
+        """
+        Queues messages for deletion, returns right away.
+        :param bot: Bot instance, nothing is deleted if None.
+        :param messages: Messages or references to them, None values are skipped.
+        """
+        if bot is None:
+            return
+
+        groups = group_by_chat(message for message in messages if message is not None)
+        for chat_id, message_ids in groups.items():
+            _, pending = self.pending.setdefault(chat_id, (bot, {}))
+            pending.update(dict.fromkeys(message_ids))
+            self.scheduled_total += len(message_ids)
+
+            if chat_id not in self._timers:
+                self._timers[chat_id] = asyncio.get_running_loop().call_later(
+                    self.window, self._start_flush, chat_id
+                )
+
+    def _start_flush(self, chat_id: int):
+        task = asyncio.create_task(self.flush_chat(chat_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush_chat(self, chat_id: int):
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+
+        bot, message_ids = self.pending.pop(chat_id, (None, {}))
+        if not message_ids:
+            return
+
+        refs = [MessageRef(chat_id, message_id) for message_id in message_ids]
+        self.requests_total += -(-len(refs) // BULK_LIMIT)
+        try:
+            await delete_messages(bot, refs)
+        except Exception as e:
+            logger.error(f"Error deleting messages in chat {chat_id}:\n {str(e)}")
+
+    async def flush(self):
+        """
+        Deletes everything queued right away and waits for running deletions.
+        """
+        await asyncio.gather(*(self.flush_chat(chat_id) for chat_id in list(self.pending)))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "scheduled_total": self.scheduled_total,
+            "requests_total": self.requests_total,
+        }
+
+
+# Shared by all handlers of the process
+default_deleter = MessageDeleter()
+
+
+def delete_later(
+    bot: Bot | None, messages: Iterable[Message | MessageRef | PhotoRef | None]
+):
+    """
+    Hands messages to the background deleter, without waiting for the deletion.
+    :param bot: Bot instance.
+    :param messages: Messages or references to them, None values are skipped.
+    """
+    default_deleter.schedule(bot, messages)
@@ -0,0 +1,258 @@
+import bisect
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Protocol
+
+from aiohttp import web
+from betterlogging import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds; from a cached DB read to a slow Bot API upload
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(Protocol):
+    name: str
+
+    def render(self) -> Iterable[str]: ...
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count per bucket (not cumulative, +Inf last), sum
+        self.values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts, total = self.values.setdefault(
+            labels, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """
+        Observes the duration of a with block.
+        """
+        return _Timer(self, labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            rendered = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{rendered} {_number(total[0])}"
+            yield f"{self.name}_count{rendered} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class StatsCollector:
+    """
+    Exposes the stats property of a component: keys ending with _total as
+    counters, the others as gauges, all prefixed with the name.
+    """
+
+    def __init__(self, name: str, source: Any, documentation: str):
+        self.name = name
+        self.source = source
+        self.documentation = documentation
+
+    def render(self) -> Iterable[str]:
+        for key, value in self.source.stats.items():
+            name = f"{self.name}_{key}"
+            kind = "counter" if key.endswith("_total") else "gauge"
+            yield f"# HELP {name} {self.documentation}: {key.replace('_', ' ')}"
+            yield f"# TYPE {name} {kind}"
+            yield f"{name} {_number(value)}"
+
+
+class GaugeCollector:
+    """
+    Gauges read when scraped: values() returns the value of every gauge by its name suffix.
+    """
+
+    def __init__(
+        self, name: str, values: Callable[[], dict[str, float]], documentation: str
+    ):
+        self.name = name
+        self.values = values
+        self.documentation = documentation
+
+    def render(self) -> Iterable[str]:
+        for key, value in self.values().items():
+            name = f"{self.name}_{key}"
+            yield f"# HELP {name} {self.documentation}: {key.replace('_', ' ')}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {_number(value)}"
+
+
+class MetricsRegistry:
+    """
+    Metrics of the process in the Prometheus text format.
+    A metric registered again under the same name replaces the old one,
+    e.g. collectors of a recreated dispatcher.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(
+            line for metric in list(self.metrics.values()) for line in metric.render()
+        ) + "\n"
+
+
+registry = MetricsRegistry()
+
+HANDLER_DURATION = registry.register(
+    Histogram(
+        "tgbot_handler_duration_seconds",
+        "Time handlers took, by the FSM state the update was handled in",
+        ("event", "handler", "state"),
+    )
+)
+HANDLER_ERRORS = registry.register(
+    Counter(
+        "tgbot_handler_errors_total",
+        "Handlers that raised an exception",
+        ("event", "handler", "state", "error"),
+    )
+)
+API_DURATION = registry.register(
+    Histogram(
+        "tgbot_api_request_duration_seconds",
+        "Bot API request latency, by method",
+        ("method",),
+    )
+)
+API_ERRORS = registry.register(
+    Counter(
+        "tgbot_api_errors_total",
+        "Bot API requests that failed, by method and error",
+        ("method", "error"),
+    )
+)
+DB_POOL_WAIT = registry.register(
+    Histogram(
+        "tgbot_db_pool_wait_seconds",
+        "Time spent getting a connection from the database pool",
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+    )
+)
+
+
+def register_pool_metrics(pool):
+    """
+    Exposes the state of a SQLAlchemy queue pool.
+    """
+
+    registry.register(
+        GaugeCollector(
+            "tgbot_db_pool",
+            lambda: {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            },
+            "Database connection pool",
+        )
+    )
+
+
+class MetricsServer:
+    """
+    Serves the registry at /metrics, for the modes without the webhook app.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.runner: web.AppRunner | None = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logger.info(f"Metrics are served on {self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
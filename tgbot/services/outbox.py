@@ -0,0 +1,218 @@
+import asyncio
+import datetime
+from collections.abc import Sequence
+from contextlib import suppress
+
+from aiogram import Bot
+from aiogram.client.default import Default
+from aiogram.types import (
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+)
+from aiogram.utils.media_group import MediaType
+from betterlogging import logging
+
+from infrastructure.database.models.outbox import OutboxMessage
+from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.services.broadcaster import Broadcaster, SendResult, default_broadcaster
+
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES: dict[str, type[MediaType]] = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "audio": InputMediaAudio,
+    "document": InputMediaDocument,
+}
+
+
+def dump_media(media: list[MediaType]) -> list[dict] | None:
+    """
+    Serializes a media group for the outbox; only media sent by file_id or URL can be stored.
+    """
+    return [
+        item.model_dump(
+            mode="json",
+            exclude_none=True,
+            # Bot defaults (parse_mode etc.) are resolved again when sending
+            exclude={name for name, value in item if isinstance(value, Default)},
+        )
+        for item in media
+    ] or None
+
+
+def load_media(media: list[dict] | None) -> list[MediaType]:
+    return [MEDIA_TYPES[item["type"]](**item) for item in media or []]
+
+
+class OutboxWorker:
+    """
+    Delivers messages queued in the outbox table with a pool of workers.
+
+    Every worker claims a batch of due deliveries and sends them concurrently
+    through the broadcaster, so the Telegram rate limits are shared with the rest
+    of the process. A delivery that failed with a flood wait, a network or a server
+    error is retried with exponential backoff; after max_attempts attempts, or on
+    an error that won't go away (blocked bot, bad request), it is marked dead.
+
+    Claims expire after lock_for, so deliveries of a worker that died are picked up
+    again; while a batch is being sent, flood waits included, its claims are
+    extended every third of lock_for. A worker whose claim was lost anyway doesn't
+    record the outcome over the worker that claimed the delivery next. Call
+    notify() after committing new deliveries to skip the poll interval.
+    """
+
+    def __init__(
+        self,
+        session_pool,
+        bot: Bot,
+        workers: int = 2,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        poll_interval: float = 1.0,
+        backoff_base: float = 2.0,
+        max_backoff: float = 300.0,
+        lock_for: datetime.timedelta = datetime.timedelta(minutes=5),
+        broadcaster: Broadcaster = default_broadcaster,
+    ) -> None:
+        self.session_pool = session_pool
+        self.bot = bot
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.lock_for = lock_for
+        self.broadcaster = broadcaster
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self):
+        """
+        Wakes up the workers, e.g. after new deliveries were committed.
+        """
+        self._wakeup.set()
+
+    def retry_at(self, attempts: int) -> datetime.datetime:
+        delay = min(self.backoff_base**attempts, self.max_backoff)
+        return datetime.datetime.now() + datetime.timedelta(seconds=delay)
+
+    async def process_batch(self) -> int:
+        """
+        Claims and delivers one batch of due deliveries.
+        :return: Number of deliveries claimed.
+        """
+
+        async with self.session_pool() as session:
+            messages = await RequestsRepo(session).outbox.claim_due(
+                self.batch_size, self.lock_for
+            )
+            if not messages:
+                return 0
+
+            keeper = asyncio.create_task(self._keep_claims(messages))
+            try:
+                results = await asyncio.gather(
+                    *(self.deliver(message) for message in messages)
+                )
+            finally:
+                keeper.cancel()
+                with suppress(asyncio.CancelledError):
+                    await keeper
+
+            repo = RequestsRepo(session)
+            for message, result in zip(messages, results):
+                if result.ok:
+                    if not await repo.outbox.mark_sent(message.id, message.attempts):
+                        self._claim_lost(message)
+                    continue
+
+                retry_at = (
+                    self.retry_at(message.attempts)
+                    if result.retryable and message.attempts < self.max_attempts
+                    else None
+                )
+                if not await repo.outbox.mark_failed(
+                    message.id, message.attempts, result.error, retry_at
+                ):
+                    self._claim_lost(message)
+                elif retry_at is None:
+                    logger.warning(
+                        f"Outbox message {message.id} to {message.chat_id} is dead "
+                        f"after {message.attempts} attempts: {result.error}"
+                    )
+
+            return len(messages)
+
+    async def _keep_claims(self, messages: Sequence[OutboxMessage]):
+        """
+        Extends the claims of the deliveries being sent until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.lock_for.total_seconds() / 3)
+            try:
+                async with self.session_pool() as session:
+                    repo = RequestsRepo(session)
+                    for message in messages:
+                        await repo.outbox.extend_claim(
+                            message.id, message.attempts, self.lock_for
+                        )
+
+            except Exception as e:
+                logger.error(f"Error extending outbox claims:\n {str(e)}")
+
+    @staticmethod
+    def _claim_lost(message: OutboxMessage):
+        logger.warning(
+            f"Outbox message {message.id} to {message.chat_id} was claimed again "
+            f"while being sent, its outcome isn't recorded"
+        )
+
+    async def deliver(self, message: OutboxMessage) -> SendResult:
+        try:
+            return await self.broadcaster.send_message(
+                self.bot,
+                message.chat_id,
+                message.text,
+                parse_mode=message.parse_mode,
+                media=load_media(message.media),
+            )
+
+        except Exception as e:
+            logger.exception(f"Outbox message {message.id}: failed")
+            return SendResult(message.chat_id, False, 0, str(e))
+
+    async def _work(self):
+        while True:
+            try:
+                claimed = await self.process_batch()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Error processing outbox:\n {str(e)}")
+                claimed = 0
+
+            if claimed < self.batch_size:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                self._wakeup.clear()
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
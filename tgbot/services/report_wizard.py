@@ -0,0 +1,98 @@
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+from betterlogging import logging
+
+from tgbot.keyboards.inline import NavAction, wizard_nav_keyboard
+from tgbot.keyboards.reply import excel_keyboard, nav_keyboard, send_keyboard
+from tgbot.models.report_draft import MessageRef, message_ref
+from tgbot.services.message_deleter import delete_later
+from tgbot.services.utils import delete_prev_message
+
+
+logger = logging.getLogger(__name__)
+
+# Reply keyboards of the classic mode by the primary action of the step
+REPLY_KEYBOARDS = {
+    None: nav_keyboard,
+    NavAction.NEXT: excel_keyboard,
+    NavAction.SEND: send_keyboard,
+}
+
+
+async def clear_step(
+    message: Message, state: FSMContext, album: list[Message] | None = None
+):
+    """
+    Removes the user's input of a report step and, in the classic mode, the previous prompt.
+    In the wizard mode the prompt is kept, ask() edits it.
+    :param message: The user's message, or the prompt itself if a wizard button was pressed.
+    :param state: FSM context of the report.
+    :param album: All messages of the input if it is an album.
+    """
+    state_data = await state.get_data()
+
+    if not state_data.get("wizard"):
+        delete_later(message.bot, album or [message])
+        await delete_prev_message(state, message.bot)
+        return
+
+    anchor = MessageRef.load(state_data.get("prev_bot_message"))
+    delete_later(
+        message.bot,
+        [
+            msg
+            for msg in album or [message]
+            if anchor is None or msg.message_id != anchor.message_id
+        ],
+    )
+
+
+async def ask(
+    message: Message,
+    state: FSMContext,
+    text: str,
+    primary: NavAction | None = None,
+    parse_mode: str | None = None,
+):
+    """
+    Shows the prompt of the next report step.
+    In the classic mode a new message with a reply keyboard is sent. In the wizard
+    mode the anchored prompt is edited, with inline nav buttons; a new anchor is sent
+    only if there is none or it can't be edited anymore.
+    :param message: Message of the report's chat.
+    :param state: FSM context of the report.
+    :param text: Text of the prompt.
+    :param primary: Nav action besides back and cancel: next or send.
+    :param parse_mode: Parse mode of the text.
+    """
+    state_data = await state.get_data()
+
+    if not state_data.get("wizard"):
+        answer = await message.answer(
+            text, reply_markup=REPLY_KEYBOARDS[primary](), parse_mode=parse_mode
+        )
+        await state.update_data(prev_bot_message=message_ref(answer))
+        return
+
+    reply_markup = wizard_nav_keyboard(primary)
+    anchor = MessageRef.load(state_data.get("prev_bot_message"))
+    if anchor is not None and message.bot is not None:
+        try:
+            await message.bot.edit_message_text(
+                text,
+                chat_id=anchor.chat_id,
+                message_id=anchor.message_id,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode,
+            )
+            return
+
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                return
+            logger.debug(f"Prompt {anchor} is not editable: {e.message}")
+            delete_later(message.bot, [anchor])
+
+    answer = await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    await state.update_data(prev_bot_message=message_ref(answer))
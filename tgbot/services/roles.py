@@ -0,0 +1,68 @@
+from enum import Flag, auto
+
+from betterlogging import logging
+from cachetools import TTLCache
+
+from infrastructure.database.repo.requests import RequestsRepo
+
+
+logger = logging.getLogger(__name__)
+
+
+class Role(Flag):
+    REGULAR = 0
+    ADMIN = auto()
+    OWNER = auto()
+
+
+class RoleIndex:
+    """
+    Cross-update cache of user roles keyed by user_id.
+
+    The admin role comes from Config.tg_bot.admin_ids, the owner role from the
+    users table (is_owner of an active user). The bot never changes is_owner or
+    active, they are edited in the database, so such changes are picked up only
+    when the cached role expires after ttl seconds. Roles of deleted users are
+    dropped right away.
+    """
+
+    def __init__(self, admin_ids: list[int], ttl: float = 300.0, maxsize: int = 10000):
+        self.admin_ids = frozenset(admin_ids)
+        self.roles: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: int) -> Role | None:
+        return self.roles.get(user_id)
+
+    async def resolve(self, user_id: int, repo: RequestsRepo | None = None) -> Role:
+        """
+        Returns the cached role or resolves it with a single query.
+        :param user_id: The user's ID.
+        :param repo: Repository used to read owner flags, admin role only if None.
+        :return: Role flags of the user.
+        """
+
+        role = self.roles.get(user_id)
+        if role is not None:
+            return role
+
+        role = Role.ADMIN if user_id in self.admin_ids else Role.REGULAR
+        if repo is None:
+            return role
+
+        flags = await repo.users.get_user_role_flags(user_id)
+        if flags is not None:
+            is_owner, active = flags
+            if is_owner and active:
+                role |= Role.OWNER
+
+        self.roles[user_id] = role
+        return role
+
+    def invalidate(self, user_id: int | None = None):
+        """
+        Drops the cached role of the user, or all roles if user_id is None.
+        """
+        if user_id is None:
+            self.roles.clear()
+        else:
+            self.roles.pop(user_id, None)
@@ -0,0 +1,255 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from multiprocessing.context import BaseContext
+
+from aiogram import Bot, Dispatcher
+from aiogram.utils.backoff import Backoff, BackoffConfig
+from aiohttp import ClientTimeout
+from betterlogging import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Builds the bot and the dispatcher of a worker process from the worker's index.
+# Must be picklable: a module-level function, or a functools.partial of one.
+DispatcherFactory = Callable[[int], Awaitable[tuple[Bot, Dispatcher]]]
+
+# Seconds to wait for a worker to start or to finish its updates
+WORKER_TIMEOUT = 60.0
+POLLING_BACKOFF = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+def update_chat_id(update: dict) -> int:
+    """
+    Finds the chat a raw update belongs to, without parsing it.
+    Callback queries belong to the chat of their message; updates without a chat,
+    e.g. inline queries, to the chat with their user.
+    :param update: Update as returned by getUpdates.
+    :return: Chat ID, 0 if the update has neither a chat nor a user.
+    """
+
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+
+        user = event.get("from") or event.get("user")
+        if user:
+            return user["id"]
+    return 0
+
+
+def shard_for(chat_id: int, workers: int) -> int:
+    """
+    Index of the worker handling the chat; the same in every process and run.
+    """
+    return chat_id % workers
+
+
+async def serve_updates(bot: Bot, dp: Dispatcher, updates: multiprocessing.Queue) -> int:
+    """
+    Feeds the updates from the queue to the dispatcher until None is received.
+    Updates are handled as tasks started in the order they were queued, as with polling.
+    :return: Number of updates handled.
+    """
+
+    loop = asyncio.get_running_loop()
+    tasks: set[asyncio.Task] = set()
+    handled = 0
+
+    async def handle(update: dict):
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception:
+            logger.exception(f"Update {update.get('update_id')}: failed")
+
+    stopped = False
+    while not stopped:
+        batch = [await loop.run_in_executor(None, updates.get)]
+        # Take everything already queued, to hop threads once per batch
+        with suppress(queue.Empty):
+            while batch[-1] is not None:
+                batch.append(updates.get_nowait())
+
+        for update in batch:
+            if update is None:
+                stopped = True
+                break
+            task = asyncio.create_task(handle(update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            handled += 1
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return handled
+
+
+async def _run_worker(
+    index: int,
+    factory: DispatcherFactory,
+    updates: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+):
+    bot, dp = await factory(index)
+    handled = 0
+    try:
+        await dp.emit_startup(bot=bot)
+        events.put(("ready", index, dp.resolve_used_update_types()))
+        handled = await serve_updates(bot, dp, updates)
+
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await dp.storage.close()
+        await bot.session.close()
+        events.put(("done", index, handled))
+
+
+def worker_main(
+    index: int,
+    factory: DispatcherFactory,
+    updates: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+):
+    """
+    Entry point of a worker process.
+    Ctrl+C is left to the ingress, which stops the workers once the routed updates are handled.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, factory, updates, events))
+
+
+class ChatAffineDispatcher:
+    """
+    Spreads updates over worker processes, each running its own Dispatcher.
+
+    The ingress, in this process, only decodes the updates' JSON and routes every
+    update by its chat ID to one worker, which parses and handles it. Updates of a
+    chat always go to the same worker and reach it in the order they arrived, so
+    FSM state in memory, albums and the report steps work as with one process.
+    """
+
+    def __init__(
+        self,
+        factory: DispatcherFactory,
+        workers: int,
+        context: BaseContext | None = None,
+    ):
+        self.factory = factory
+        self.workers = workers
+        # Workers start from scratch, without the event loop of this process
+        self.context = context or multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.queues: list[multiprocessing.Queue] = []
+        self.processes: list[multiprocessing.Process] = []
+        self.routed = [0] * workers
+        self.handled = [0] * workers
+
+    async def _next_event(self, timeout: float = WORKER_TIMEOUT) -> tuple:
+        return await asyncio.to_thread(self.events.get, timeout=timeout)
+
+    async def start(self) -> list[str]:
+        """
+        Starts the workers and waits until all of them are ready.
+        :return: Update types the dispatchers handle.
+        """
+
+        for index in range(self.workers):
+            updates = self.context.Queue()
+            process = self.context.Process(
+                target=worker_main,
+                args=(index, self.factory, updates, self.events),
+                name=f"dispatcher-{index}",
+                daemon=True,
+            )
+            process.start()
+            self.queues.append(updates)
+            self.processes.append(process)
+
+        allowed_updates: set[str] = set()
+        for _ in range(self.workers):
+            kind, index, update_types = await self._next_event()
+            if kind != "ready":
+                raise RuntimeError(f"Dispatcher worker {index} failed to start")
+            allowed_updates.update(update_types)
+            logger.info(f"Dispatcher worker {index} is ready")
+        return sorted(allowed_updates)
+
+    def route(self, update: dict):
+        index = shard_for(update_chat_id(update), self.workers)
+        self.queues[index].put(update)
+        self.routed[index] += 1
+
+    async def stop(self):
+        """
+        Lets the workers finish the updates routed to them, then stops them.
+        """
+
+        for updates in self.queues:
+            updates.put(None)
+
+        with suppress(queue.Empty):
+            for _ in range(len(self.processes)):
+                _, index, handled = await self._next_event()
+                self.handled[index] = handled
+
+        for process in self.processes:
+            await asyncio.to_thread(process.join, WORKER_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"{process.name} didn't stop, terminating it")
+                process.terminate()
+
+        self.queues, self.processes = [], []
+        logger.info(f"Updates handled by the workers: {self.handled}")
+
+    async def poll(
+        self, bot: Bot, allowed_updates: list[str], polling_timeout: int = 30
+    ):
+        """
+        Long-polls Telegram and routes the updates. The JSON isn't parsed into
+        aiogram types here, the workers do that.
+        """
+
+        session = await bot.session.create_session()
+        url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+        timeout = ClientTimeout(total=bot.session.timeout + polling_timeout)
+        backoff = Backoff(config=POLLING_BACKOFF)
+        offset = None
+
+        while True:
+            params = {"timeout": polling_timeout, "allowed_updates": allowed_updates}
+            if offset is not None:
+                params["offset"] = offset
+
+            try:
+                async with session.post(url, json=params, timeout=timeout) as response:
+                    data = await response.json(loads=bot.session.json_loads)
+                if not data.get("ok"):
+                    raise RuntimeError(data.get("description"))
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Failed to fetch updates - {type(e).__name__}: {e}")
+                await backoff.asleep()
+                continue
+
+            backoff.reset()
+            for update in data["result"]:
+                self.route(update)
+                offset = update["update_id"] + 1
+
+    async def run_polling(self, bot: Bot, polling_timeout: int = 30):
+        allowed_updates = await self.start()
+        try:
+            await self.poll(bot, allowed_updates, polling_timeout)
+        finally:
+            await self.stop()
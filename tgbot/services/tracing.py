@@ -0,0 +1,336 @@
+import abc
+import asyncio
+import json
+import os
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+from betterlogging import logging
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# Longest SQL statement kept in a span
+MAX_STATEMENT = 1000
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: int
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+
+# Span of the code running now; None outside of traces and in traces not sampled
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def encode_spans(spans: list[Span], service_name: str) -> dict:
+    """
+    Encodes spans as an OTLP/JSON ExportTraceServiceRequest.
+    """
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [_attribute("service.name", service_name)]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "tgbot"},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_id or "",
+                                "name": span.name,
+                                "kind": span.kind,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    _attribute(key, value)
+                                    for key, value in span.attributes.items()
+                                    if value is not None
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error is not None
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanExporter(abc.ABC):
+    """
+    Collects finished spans and writes them in batches from a background task,
+    so handlers never wait for the export.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        interval: float = 2.0,
+        max_batch: int = 512,
+        max_buffer: int = 10000,
+    ):
+        self.service_name = service_name
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self.buffer: list[Span] = []
+        self.dropped_total = 0
+        self._task: asyncio.Task | None = None
+
+    def export(self, span: Span):
+        if len(self.buffer) >= self.max_buffer:
+            self.dropped_total += 1
+            return
+        self.buffer.append(span)
+
+    @abc.abstractmethod
+    async def write(self, request: dict):
+        """
+        Writes one OTLP/JSON export request.
+        """
+
+    async def flush(self):
+        while self.buffer:
+            spans, self.buffer = (
+                self.buffer[: self.max_batch],
+                self.buffer[self.max_batch :],
+            )
+            try:
+                await self.write(encode_spans(spans, self.service_name))
+            except Exception as e:
+                self.dropped_total += len(spans)
+                logger.error(f"Error exporting {len(spans)} spans:\n {str(e)}")
+
+    async def _work(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._work())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends every batch as one line of OTLP/JSON, the format of the
+    OpenTelemetry Collector's otlpjsonfile receiver.
+    """
+
+    def __init__(self, path: str, service_name: str, **kwargs: Any):
+        super().__init__(service_name, **kwargs)
+        self.path = path
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+    async def write(self, request: dict):
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        await asyncio.to_thread(self._append, line)
+
+
+class OTLPSpanExporter(SpanExporter):
+    """
+    Posts batches to an OTLP/HTTP endpoint in JSON, e.g. http://collector:4318.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, **kwargs: Any):
+        super().__init__(service_name, **kwargs)
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.session: aiohttp.ClientSession | None = None
+
+    async def write(self, request: dict):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(10))
+        async with self.session.post(url=self.url, json=request) as response:
+            response.raise_for_status()
+
+    async def close(self):
+        await super().close()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class Tracer:
+    """
+    Starts spans of sampled updates and hands the finished ones to the exporter.
+    Without an exporter nothing is traced.
+    """
+
+    def __init__(self):
+        self.exporter: SpanExporter | None = None
+        self.sample_rate = 0.0
+
+    def configure(self, exporter: SpanExporter | None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(
+        self,
+        name: str,
+        parent: Span | None = None,
+        kind: int = INTERNAL,
+        start_ns: int | None = None,
+        **attributes: Any,
+    ) -> Span | None:
+        """
+        Starts a child of the parent, the current span by default.
+        :return: The span, None if the code isn't traced.
+        """
+
+        parent = parent or current_span.get()
+        if parent is None:
+            return None
+        return Span(
+            name=name,
+            trace_id=parent.trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id,
+            kind=kind,
+            start_ns=start_ns or time.time_ns(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, error: BaseException | None = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def _activate(self, span: Span | None) -> Iterator[Span | None]:
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span is not None:
+                span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            if span is not None:
+                self.end_span(span)
+
+    def start_trace(
+        self,
+        name: str,
+        kind: int = SERVER,
+        start_ns: int | None = None,
+        **attributes: Any,
+    ):
+        """
+        Context manager of a root span; the trace is sampled at sample_rate.
+        """
+
+        span = None
+        if self.exporter is not None and random.random() < self.sample_rate:
+            span = Span(
+                name=name,
+                trace_id=os.urandom(16).hex(),
+                span_id=os.urandom(8).hex(),
+                parent_id=None,
+                kind=kind,
+                start_ns=start_ns or time.time_ns(),
+                attributes=attributes,
+            )
+        return self._activate(span)
+
+    def span(self, name: str, kind: int = INTERNAL, **attributes: Any):
+        """
+        Context manager of a child of the current span, if the code is traced.
+        """
+        return self._activate(self.start_span(name, kind=kind, **attributes))
+
+
+# Shared by everything traced in the process
+tracer = Tracer()
+
+
+def trace_engine(engine):
+    """
+    Traces every SQL statement of an engine run while handling a traced update.
+    """
+
+    sync_engine = engine.sync_engine
+    db_system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span(
+            f"db {statement.split(None, 1)[0].upper() if statement else 'query'}",
+            kind=CLIENT,
+            **{"db.system": db_system, "db.statement": statement[:MAX_STATEMENT]},
+        )
+        if span is not None:
+            context._tracing_span = span
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_tracing_span", None)
+        if span is not None:
+            context._tracing_span = None
+            tracer.end_span(span)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_tracing_span", None)
+        if span is not None:
+            context._tracing_span = None
+            tracer.end_span(span, exception_context.original_exception)
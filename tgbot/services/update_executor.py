@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+
+from betterlogging import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Job:
+    run: Callable[[], Awaitable]
+    group: Hashable | None
+    submitted_at: float
+
+
+@dataclass
+class _ChatQueue:
+    chat_id: Hashable
+    pending: deque[_Job] = field(default_factory=deque)
+    # Media group of the running jobs, parts of it run together
+    group: Hashable | None = None
+    running: int = 0
+
+
+class UpdateExecutor:
+    """
+    Runs update handling jobs: jobs of one chat strictly one after another, in the
+    order they were submitted, jobs of different chats concurrently, at most
+    max_concurrency of them at once.
+
+    Jobs of a media group run together with the running job of the same group, even
+    when other jobs of the chat are queued: AlbumsMiddleware holds the first part
+    until the album is complete and drops the other parts right away, so they must
+    not wait behind it. They don't take a concurrency slot either.
+
+    Submitting never waits; callers apply backpressure with wait_for_room(),
+    which returns once fewer than max_pending jobs are waiting.
+    """
+
+    def __init__(self, max_concurrency: int = 32, max_pending: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.chats: dict[Hashable, _ChatQueue] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._room = asyncio.Event()
+        self._room.set()
+        self._tasks: set[asyncio.Task] = set()
+        # Jobs submitted but not started yet, behind jobs of their chat or for a slot
+        self.pending = 0
+        self.pending_max = 0
+        self.running = 0
+        self.submitted_total = 0
+        self.started_total = 0
+        self.failed_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def submit(
+        self,
+        chat_id: Hashable,
+        run: Callable[[], Awaitable],
+        group: Hashable | None = None,
+    ):
+        """
+        Queues a job of a chat.
+        :param chat_id: Jobs with the same key run in order.
+        :param run: Function making the job's coroutine, called when it is its turn.
+        :param group: Media group of the update, if any.
+        """
+
+        job = _Job(run, group, asyncio.get_running_loop().time())
+        self.submitted_total += 1
+        self.pending += 1
+        self.pending_max = max(self.pending_max, self.pending)
+        if self.pending >= self.max_pending:
+            self._room.clear()
+
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = _ChatQueue(chat_id)
+
+        # Even when other jobs of the chat wait: the part belongs to the running album
+        if group is not None and chat.running and chat.group == group:
+            self._start(chat, job, joined=True)
+            return
+
+        chat.pending.append(job)
+        if not chat.running:
+            self._start_next(chat)
+
+    async def wait_for_room(self):
+        await self._room.wait()
+
+    def _start_next(self, chat: _ChatQueue):
+        if not chat.pending:
+            del self.chats[chat.chat_id]
+            return
+
+        job = chat.pending.popleft()
+        chat.group = job.group
+        self._start(chat, job)
+        # Parts of the same album queued behind it run along, wherever they are queued
+        if job.group is not None:
+            parts = [queued for queued in chat.pending if queued.group == job.group]
+            for part in parts:
+                chat.pending.remove(part)
+                self._start(chat, part, joined=True)
+
+    def _start(self, chat: _ChatQueue, job: _Job, joined: bool = False):
+        chat.running += 1
+        task = asyncio.create_task(self._run(chat, job, joined))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, chat: _ChatQueue, job: _Job, joined: bool):
+        try:
+            if joined:
+                await self._execute(job)
+            else:
+                async with self._slots:
+                    await self._execute(job)
+
+        finally:
+            chat.running -= 1
+            if not chat.running:
+                chat.group = None
+                self._start_next(chat)
+
+    async def _execute(self, job: _Job):
+        wait = asyncio.get_running_loop().time() - job.submitted_at
+        self.started_total += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.pending -= 1
+        if self.pending < self.max_pending:
+            self._room.set()
+
+        self.running += 1
+        try:
+            await job.run()
+        except Exception:
+            self.failed_total += 1
+            logger.exception("Update handling failed")
+        finally:
+            self.running -= 1
+
+    async def close(self):
+        """
+        Waits until every submitted job is done, jobs started meanwhile included.
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            "submitted_total": self.submitted_total,
+            "failed_total": self.failed_total,
+            "running": self.running,
+            "pending": self.pending,
+            "pending_max": self.pending_max,
+            "chats": len(self.chats),
+            "wait_seconds_avg": (
+                self.wait_seconds_total / self.started_total
+                if self.started_total
+                else 0.0
+            ),
+            "wait_seconds_max": self.wait_seconds_max,
+        }
@@ -0,0 +1,187 @@
+import asyncio
+from contextlib import suppress
+from typing import Optional
+
+from betterlogging import logging
+from cachetools import TTLCache
+from sqlalchemy.orm import object_session
+
+from infrastructure.database.models import User
+from infrastructure.database.repo.requests import RequestsRepo
+
+
+logger = logging.getLogger(__name__)
+
+# Failed flushes of a profile before its write is dropped
+MAX_FLUSH_ATTEMPTS = 3
+
+
+class UserProfileCache:
+    """
+    Write-behind cache of user profiles keyed by user_id.
+
+    Profiles are served from memory. A write is queued only for new users and
+    when username, full_name or language differ from the cached profile; queued
+    writes are flushed to the database in one batch every flush_interval seconds.
+
+    Cached profiles expire after ttl seconds, so changes made directly in the
+    database (is_owner, active, logged_as) are picked up eventually.
+
+    If a batch fails, its profiles are written one by one; a profile failing
+    MAX_FLUSH_ATTEMPTS flushes is dropped, so it doesn't hold back the others.
+    Rows other tables refer to (user_locations) must be flushed before writing them.
+    """
+
+    PROFILE_FIELDS = ("username", "full_name", "language")
+
+    def __init__(
+        self,
+        session_pool,
+        flush_interval: float = 1.0,
+        ttl: float = 600.0,
+        maxsize: int = 10000,
+    ) -> None:
+        self.session_pool = session_pool
+        self.flush_interval = flush_interval
+        self.users: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # user_id -> values to upsert, survives cache eviction until flushed
+        self.pending: dict[int, dict] = {}
+        # user_id -> failed flushes of the queued profile
+        self.failures: dict[int, int] = {}
+        self.dropped_total = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def get_user(
+        self,
+        repo: RequestsRepo,
+        user_id: int,
+        username: Optional[str] = None,
+        full_name: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> User:
+        """
+        Returns the cached profile, loading it from the database on a cache miss
+        and queueing a write if the Telegram profile has changed.
+        :param repo: Repository used to load the user on a cache miss.
+        :param user_id: The user's ID.
+        :param username: The user's username.
+        :param full_name: The user's full name.
+        :param language: The user's language.
+        :return: User object.
+        """
+
+        values = {
+            "user_id": user_id,
+            "username": username,
+            "full_name": full_name,
+            "language": language or "en",
+        }
+
+        user = self.users.get(user_id)
+        if user is None:
+            user = await repo.users.get_user_by_id(user_id)
+
+            if user is None:
+                user = User(**values, active=True, is_owner=False, logged_as=None)
+                self.pending[user_id] = values
+                self.users[user_id] = user
+                return user
+
+            # Cached profiles must not be tracked by the handler's session
+            if (session := object_session(user)) is not None:
+                session.expunge(user)
+            self.users[user_id] = user
+
+        if any(getattr(user, field) != values[field] for field in self.PROFILE_FIELDS):
+            for field in self.PROFILE_FIELDS:
+                setattr(user, field, values[field])
+            self.pending[user_id] = values
+
+        return user
+
+    def invalidate(self, user_id: int):
+        """
+        Drops the cached profile, e.g. after the user has been deleted.
+        """
+        self.users.pop(user_id, None)
+        self.pending.pop(user_id, None)
+        self.failures.pop(user_id, None)
+
+    async def flush(self):
+        """
+        Writes all queued profiles to the database with one multi-row upsert.
+        """
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            batch, self.pending = self.pending, {}
+            try:
+                await self._upsert(batch)
+                for user_id in batch:
+                    self.failures.pop(user_id, None)
+                logger.debug(f"Flushed {len(batch)} user profiles")
+
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+
+            except Exception as e:
+                logger.error(f"Error flushing user profiles:\n {str(e)}")
+                await self._flush_one_by_one(batch)
+
+    async def _flush_one_by_one(self, batch: dict[int, dict]):
+        for user_id in list(batch):
+            try:
+                await self._upsert({user_id: batch[user_id]})
+                del batch[user_id]
+                self.failures.pop(user_id, None)
+
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+
+            except Exception as e:
+                self._retry_later(user_id, batch.pop(user_id), e)
+
+    async def _upsert(self, batch: dict[int, dict]):
+        async with self.session_pool() as session:
+            await RequestsRepo(session).users.upsert_users(list(batch.values()))
+
+    def _requeue(self, batch: dict[int, dict]):
+        # Keep newer values queued after the batch was taken
+        self.pending = batch | self.pending
+
+    def _retry_later(self, user_id: int, values: dict, error: Exception):
+        attempts = self.failures.get(user_id, 0) + 1
+        if attempts < MAX_FLUSH_ATTEMPTS:
+            self.failures[user_id] = attempts
+            self.pending.setdefault(user_id, values)
+            return
+
+        # The next update of the user loads the profile from the database again
+        self.failures.pop(user_id, None)
+        self.users.pop(user_id, None)
+        self.dropped_total += 1
+        logger.error(
+            f"User {user_id}: profile dropped after {attempts} failed writes:\n"
+            f" {str(error)}"
+        )
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        await self.flush()
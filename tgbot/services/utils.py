@@ -1,29 +1,39 @@
+from aiogram import Bot
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
-from aiogram.exceptions import TelegramAPIError
 from betterlogging import logging
 
+from tgbot.models.report_draft import MessageRef
+from tgbot.services.message_deleter import delete_later
+
 
 logger = logging.getLogger(__name__)
 
 
-async def delete_prev_message(state: FSMContext):
+async def delete_prev_message(state: FSMContext, bot: Bot | None):
+    if bot is None:
+        return
+    state_data = await state.get_data()
+
+    delete_later(
+        bot,
+        [
+            MessageRef.load(state_data.get("prev_bot_message")),
+            MessageRef.load(state_data.get("keyboard_message")),
+        ],
+    )
+
+
+async def delete_keyboard_message(state: FSMContext, bot: Bot | None):
+    if bot is None:
+        return
     state_data = await state.get_data()
 
-    try:
-        prev_bot_message: Message | None = state_data.get("prev_bot_message")
-        await prev_bot_message.delete() if prev_bot_message is not None else ...
-        keyboard_message: Message | None = state_data.get("keyboard_message")
-        await keyboard_message.delete() if keyboard_message is not None else ...
-    except TelegramAPIError as e:
-        logger.debug(e.message, exc_info=False)
+    delete_later(bot, [MessageRef.load(state_data.get("keyboard_message"))])
 
 
-async def delete_location_message(state: FSMContext):
+async def delete_location_message(state: FSMContext, bot: Bot | None):
+    if bot is None:
+        return
     state_data = await state.get_data()
 
-    try:
-        location_message: Message | None = state_data.get("location_message")
-        await location_message.delete() if location_message is not None else ...
-    except TelegramAPIError as e:
-        logger.debug(e.message, exc_info=False)
+    delete_later(bot, [MessageRef.load(state_data.get("location_message"))])